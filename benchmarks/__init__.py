@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark suite of pywhip, see ``benchmarks/README.rst``."""
+
+import os
+
+
+def benchmark_sizes():
+    """Dataset sizes (number of rows) to benchmark
+
+    Defined by the comma separated ``PYWHIP_BENCHMARK_ROWS`` environment
+    variable, e.g. ``10000,100000,1000000,10000000``, only 10000 rows by
+    default to keep a benchmark run short.
+
+    Returns
+    -------
+    list
+    """
+    rows = os.environ.get('PYWHIP_BENCHMARK_ROWS', '10000')
+    return [int(size) for size in rows.split(',')]
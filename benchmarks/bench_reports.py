@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of the html and json report generation."""
+
+import os
+import csv
+import json
+
+from pywhip import Whip, whip_csv
+from pywhip.state import save_state, load_state
+
+from . import benchmark_sizes
+from .generate import dataset, load_specifications
+
+
+class Reports(object):
+    """Report generation of a validated dataset
+
+    The validation state is stored next to the dataset, the validation itself
+    only runs once for each dataset.
+    """
+
+    params = benchmark_sizes()
+    param_names = ['rows']
+    timeout = 86400
+
+    def setup(self, rows):
+        filename = dataset('csv', rows)
+        state_file = filename + '.state'
+        with open(filename) as data:
+            field_names = next(csv.reader(data, delimiter='\t'))
+
+        if not os.path.exists(state_file):
+            whip_it = whip_csv(filename, load_specifications(), '\t')
+            save_state(state_file, whip_it, field_names, {})
+
+        self.whip_it = Whip(load_specifications())
+        self.whip_it._prepare(field_names)
+        self.whip_it._load_state(
+            load_state(state_file, self.whip_it, field_names)['whip'])
+        self.whip_it._finalize_report()
+
+    def time_build_report(self, rows):
+        self.whip_it._finalize_report()
+
+    def time_html(self, rows):
+        self.whip_it.get_report('html')
+
+    def peakmem_html(self, rows):
+        self.whip_it.get_report('html')
+
+    def time_json(self, rows):
+        json.dumps(self.whip_it.get_report('json'), default=str)
+
+    def peakmem_json(self, rows):
+        json.dumps(self.whip_it.get_report('json'), default=str)
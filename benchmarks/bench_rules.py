@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of the individual rules of the example specifications."""
+
+from time import perf_counter
+
+from pywhip import Whip
+
+from . import benchmark_sizes
+from .generate import generate_rows, load_specifications
+
+
+def _rules():
+    """`field.rule` names of the example specifications"""
+    return ['{}.{}'.format(field, rule) for field, rules in
+            load_specifications().items() for rule in rules]
+
+
+class Rules(object):
+    """Validation of a single field-rule combination
+
+    The rows are streamed from the generator of the synthetic dataset,
+    keeping the memory usage independent of the number of rows. The
+    generation of the rows is measured as well, at the same cost for each
+    rule.
+    """
+
+    params = (_rules(), benchmark_sizes())
+    param_names = ['rule', 'rows']
+    timeout = 86400
+
+    def setup(self, rule, rows):
+        field, rule = rule.split('.')
+        self.schema = {field: {rule: load_specifications()[field][rule]}}
+
+    def _validate(self, rows):
+        generator = generate_rows(rows)
+        field_names = next(generator)
+        Whip(self.schema)._whip((dict(zip(field_names, row))
+                                 for row in generator), field_names)
+
+    def time_rule(self, rule, rows):
+        self._validate(rows)
+
+    def track_rows_per_second(self, rule, rows):
+        start = perf_counter()
+        self._validate(rows)
+        return rows / (perf_counter() - start)
+    track_rows_per_second.unit = 'rows/s'
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of the startup time, each run in a new interpreter."""
+
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "tests", "data")
+
+
+def timeraw_import_pywhip():
+    """Target is less than 100 ms"""
+    return "import pywhip"
+
+
+def timeraw_import_cli():
+    return "import pywhip.cli"
+
+
+def timeraw_whip_small_csv():
+    """Validation of a small file, including all imports"""
+    return """
+import yaml
+from pywhip import whip_csv
+
+with open({specifications!r}) as specs:
+    specifications = yaml.safe_load(specs)
+whip_csv({data!r}, specifications, '\\t').get_report('html')
+""".format(specifications=os.path.join(DATA_DIR,
+                                       "example_dwc_occurrence.yaml"),
+           data=os.path.join(DATA_DIR, "example_dwc_occurrence_draft.tsv"))
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of the validation of complete datasets."""
+
+import csv
+import tempfile
+from time import perf_counter
+
+from pywhip import Whip, whip_csv, whip_dwca
+from pywhip.datasets import whip_csv_files
+
+from . import benchmark_sizes
+from .generate import dataset, load_specifications
+
+
+class WhipCSV(object):
+    """Validation of tab delimited files"""
+
+    params = (benchmark_sizes(), [0., 0.05, 0.5], [100, 10000])
+    param_names = ['rows', 'error_rate', 'cardinality']
+    timeout = 86400
+
+    def setup(self, rows, error_rate, cardinality):
+        self.filename = dataset('csv', rows, error_rate, cardinality)
+        self.specifications = load_specifications()
+
+    def time_whip_csv(self, rows, error_rate, cardinality):
+        whip_csv(self.filename, self.specifications, '\t')
+
+    def peakmem_whip_csv(self, rows, error_rate, cardinality):
+        whip_csv(self.filename, self.specifications, '\t')
+
+    def track_rows_per_second(self, rows, error_rate, cardinality):
+        start = perf_counter()
+        whip_csv(self.filename, self.specifications, '\t')
+        return rows / (perf_counter() - start)
+    track_rows_per_second.unit = 'rows/s'
+
+
+class WhipCSVBatches(object):
+    """Validation of tab delimited files in batches of rows"""
+
+    params = (benchmark_sizes(), [0.05, 0.5], [100, 10000], [65536])
+    param_names = ['rows', 'error_rate', 'cardinality', 'batch_size']
+    timeout = 86400
+
+    def setup(self, rows, error_rate, cardinality, batch_size):
+        self.filename = dataset('csv', rows, error_rate, cardinality)
+        self.specifications = load_specifications()
+
+    def time_whip_csv(self, rows, error_rate, cardinality, batch_size):
+        whip_csv(self.filename, self.specifications, '\t',
+                 batch_size=batch_size)
+
+    def track_rows_per_second(self, rows, error_rate, cardinality,
+                              batch_size):
+        start = perf_counter()
+        whip_csv(self.filename, self.specifications, '\t',
+                 batch_size=batch_size)
+        return rows / (perf_counter() - start)
+    track_rows_per_second.unit = 'rows/s'
+
+
+class WhipCSVPipeline(object):
+    """Validation of tab delimited files, read and parsed in separate
+    threads"""
+
+    params = (benchmark_sizes(), [0.05], [100, 10000], [None, 65536])
+    param_names = ['rows', 'error_rate', 'cardinality', 'batch_size']
+    timeout = 86400
+
+    def setup(self, rows, error_rate, cardinality, batch_size):
+        self.filename = dataset('csv', rows, error_rate, cardinality)
+        self.specifications = load_specifications()
+
+    def time_whip_csv(self, rows, error_rate, cardinality, batch_size):
+        whip_csv(self.filename, self.specifications, '\t',
+                 batch_size=batch_size, pipeline=True)
+
+    def peakmem_whip_csv(self, rows, error_rate, cardinality, batch_size):
+        whip_csv(self.filename, self.specifications, '\t',
+                 batch_size=batch_size, pipeline=True)
+
+
+class WhipCSVWorkers(object):
+    """Validation of tab delimited files by worker processes"""
+
+    params = (benchmark_sizes(), [0.05], [10000], [2, 4], [None, 65536])
+    param_names = ['rows', 'error_rate', 'cardinality', 'workers',
+                   'batch_size']
+    timeout = 86400
+
+    def setup(self, rows, error_rate, cardinality, workers, batch_size):
+        self.filename = dataset('csv', rows, error_rate, cardinality)
+        self.specifications = load_specifications()
+
+    def time_whip_csv(self, rows, error_rate, cardinality, workers,
+                      batch_size):
+        whip_csv(self.filename, self.specifications, '\t',
+                 batch_size=batch_size, workers=workers)
+
+    def track_rows_per_second(self, rows, error_rate, cardinality, workers,
+                              batch_size):
+        start = perf_counter()
+        whip_csv(self.filename, self.specifications, '\t',
+                 batch_size=batch_size, workers=workers)
+        return rows / (perf_counter() - start)
+    track_rows_per_second.unit = 'rows/s'
+
+
+class WhipCSVFiles(object):
+    """Validation of many small tab delimited files"""
+
+    params = ([100], [100], [None, 1, 4])
+    param_names = ['files', 'rows', 'workers']
+    timeout = 86400
+
+    def setup(self, files, rows, workers):
+        self.filenames = [dataset('csv', rows, seed=seed)
+                          for seed in range(files)]
+        self.specifications = load_specifications()
+        self.output_directory = tempfile.mkdtemp()
+
+    def track_files_per_second(self, files, rows, workers):
+        start = perf_counter()
+        if workers is None:
+            # a Whip, i.e. compiled specifications, for each file
+            for filename in self.filenames:
+                whip_csv(filename, self.specifications, '\t')
+        else:
+            whip_csv_files(self.filenames, self.specifications, '\t',
+                           self.output_directory, 'json', workers=workers)
+        return files / (perf_counter() - start)
+    track_files_per_second.unit = 'files/s'
+
+
+class CheckRecord(object):
+    """Latency of the validation of single records"""
+
+    params = ([10000], [0.05], [100, 10000])
+    param_names = ['rows', 'error_rate', 'cardinality']
+    timeout = 86400
+
+    def setup(self, rows, error_rate, cardinality):
+        with open(dataset('csv', rows, error_rate, cardinality)) as dwc:
+            self.records = list(csv.DictReader(dwc, delimiter='\t'))
+        self.whip_it = Whip(load_specifications())
+
+    def _latencies(self):
+        check = self.whip_it.check
+        latencies = []
+        for record in self.records:
+            start = perf_counter()
+            check(record)
+            latencies.append(perf_counter() - start)
+        return sorted(latencies)
+
+    def track_p50_latency(self, rows, error_rate, cardinality):
+        latencies = self._latencies()
+        return 1e6 * latencies[len(latencies) // 2]
+    track_p50_latency.unit = 'us'
+
+    def track_p99_latency(self, rows, error_rate, cardinality):
+        latencies = self._latencies()
+        return 1e6 * latencies[int(0.99 * len(latencies))]
+    track_p99_latency.unit = 'us'
+
+
+class WhipDwCA(object):
+    """Validation of Darwin Core Archives"""
+
+    params = (benchmark_sizes(), [0.05])
+    param_names = ['rows', 'error_rate']
+    timeout = 86400
+
+    def setup(self, rows, error_rate):
+        self.filename = dataset('dwca', rows, error_rate)
+        self.specifications = load_specifications()
+
+    def time_whip_dwca(self, rows, error_rate):
+        whip_dwca(self.filename, self.specifications)
+
+    def peakmem_whip_dwca(self, rows, error_rate):
+        whip_dwca(self.filename, self.specifications)
+
+    def track_rows_per_second(self, rows, error_rate):
+        start = perf_counter()
+        whip_dwca(self.filename, self.specifications)
+        return rows / (perf_counter() - start)
+    track_rows_per_second.unit = 'rows/s'
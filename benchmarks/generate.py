@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+"""Deterministic synthetic Darwin Core occurrence datasets for benchmarking.
+
+The datasets have the columns of ``tests/data/example_dwc_occurrence_draft.tsv``
+and are generated to match (or, for a controlled fraction of the values,
+violate) the specifications of ``tests/data/example_dwc_occurrence.yaml``.
+
+Usage::
+
+    python -m benchmarks.generate occurrence.tsv --rows 1000000
+    python -m benchmarks.generate occurrence.zip --rows 100000 --error-rate 0.1
+"""
+
+import os
+import csv
+import random
+import zipfile
+import argparse
+import tempfile
+
+import yaml
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "tests", "data")
+
+SPECIFICATIONS_FILE = os.path.join(DATA_DIR, "example_dwc_occurrence.yaml")
+TEMPLATE_FILE = os.path.join(DATA_DIR, "example_dwc_occurrence_draft.tsv")
+
+# consistent basisOfRecord - type combinations of the type if-specifications
+BASIS_OF_RECORD_TYPE = [('PreservedSpecimen', 'PhysicalObject'),
+                        ('Occurrence', 'Text')]
+
+
+def load_specifications():
+    """Whip specifications the datasets are generated for
+
+    Returns
+    -------
+    dict
+    """
+    with open(SPECIFICATIONS_FILE) as specs:
+        return yaml.safe_load(specs)
+
+
+def _template():
+    """Header and first data row of the example data set"""
+    with open(TEMPLATE_FILE) as template:
+        reader = csv.reader(template, delimiter='\t')
+        return next(reader), next(reader)
+
+
+def _date(index):
+    year = 1830 + index % 185
+    month = 1 + index // 185 % 12
+    day = 1 + index // 2220 % 28
+    return ['{:04d}-{:02d}-{:02d}', '{:04d}-{:02d}', '{:04d}'][
+        index % 3].format(year, month, day)
+
+
+def _coordinate(low, high, index, cardinality):
+    return '{:.5f}'.format(low + (high - low) * (index + .5) / cardinality)
+
+
+# field: (valid value, invalid value) for pool index `i` and pool size `n`
+VALUES = {
+    'license': (
+        lambda i, n: 'http://creativecommons.org/licenses/{}/4.0/'.format(i),
+        lambda i, n: 'CC-BY {}'.format(i)),
+    'datasetID': (
+        lambda i, n: 'http://doi.org/10.15468/njgbmh',
+        lambda i, n: 'doi:10.15468/{}'.format(i)),
+    'eventDate': (
+        lambda i, n: _date(i),
+        lambda i, n: ['{:02d}/07/{}'.format(1 + i % 28, 1900 + i % 100),
+                      '{}-01-01'.format(2015 + i % 100),
+                      '{}-12-31'.format(1729 - i % 100)][i % 3]),
+    'decimalLatitude': (
+        lambda i, n: _coordinate(50.68, 51.51, i, n),
+        lambda i, n: ['{:.5f}'.format(52. + i * 1e-5),
+                      '{:.2f}'.format(50.7 + i % 80 * .01)][i % 2]),
+    'decimalLongitude': (
+        lambda i, n: _coordinate(2.54, 5.92, i, n),
+        lambda i, n: ['{:.5f}'.format(6. + i * 1e-5),
+                      '{:.3f}'.format(2.6 + i % 300 * .01)][i % 2]),
+    'recordedBy': (
+        lambda i, n: 'observerID:{:06X}'.format(i),
+        lambda i, n: ['observer {}'.format(i),
+                      'observerID:{0:06X} | observerID:{0:06X}'.format(i)][
+                          i % 2]),
+    'individualCount': (
+        lambda i, n: str(1 + i % 200),
+        lambda i, n: ['{}.5'.format(i % 200), str(200 + i), 'many'][i % 3]),
+    'language': (
+        lambda i, n: ['en', 'nl', ''][i % 3],
+        lambda i, n: 'language {}'.format(i)),
+}
+
+
+def generate_rows(rows, error_rate=0.05, cardinality=1000, seed=42):
+    """Generate synthetic occurrence rows
+
+    Parameters
+    ----------
+    rows : int
+        Number of data rows.
+    error_rate : float
+        Probability of each specified field value to violate the
+        specifications, e.g. 0.05 results in about 5% failing values per
+        field.
+    cardinality : int
+        Number of distinct values per field, both for the valid and the
+        invalid values (fields with a limited set of allowed values have
+        less distinct valid values, identifiers are unique).
+    seed : int
+        Seed of the random generator, the same arguments always provide the
+        same dataset.
+
+    Yields
+    ------
+    list
+        The header first, the data rows afterwards.
+    """
+    header, template = _template()
+    columns = {field: index for index, field in enumerate(header)}
+    generator = random.Random(seed)
+    draw = generator.random
+    pick = generator.randrange
+
+    pools = {field: ([valid(i, cardinality) for i in range(cardinality)],
+                     [invalid(i, cardinality) for i in range(cardinality)])
+             for field, (valid, invalid) in VALUES.items()}
+
+    yield header
+    for row_id in range(rows):
+        row = list(template)
+        for field, (valid, invalid) in pools.items():
+            pool = invalid if draw() < error_rate else valid
+            row[columns[field]] = pool[pick(cardinality)]
+
+        basis, type_ = BASIS_OF_RECORD_TYPE[pick(2)]
+        if draw() < error_rate:
+            basis = ['HumanObservation', 'MachineObservation'][pick(2)]
+        if draw() < error_rate:
+            type_ = ['Event', 'StillImage'][pick(2)]
+        row[columns['basisOfRecord']] = basis
+        row[columns['type']] = type_
+
+        identifier = 'INBO:VLINDERS:{:08d}'.format(row_id)
+        row[columns['id']] = identifier
+        row[columns['occurrenceID']] = ('' if draw() < error_rate
+                                        else identifier)
+        yield row
+
+
+def write_csv(filename, rows, delimiter='\t', **kwargs):
+    """Write a synthetic dataset as delimited text file
+
+    Parameters
+    ----------
+    filename : str
+        Output file name.
+    rows : int
+        Number of data rows.
+    delimiter : str
+        A one-character string used to separate fields.
+    **kwargs
+        See :func:`generate_rows`.
+    """
+    with open(filename, 'w', newline='') as data:
+        csv.writer(data, delimiter=delimiter, lineterminator='\n').writerows(
+            generate_rows(rows, **kwargs))
+
+
+def write_dwca(filename, rows, **kwargs):
+    """Write a synthetic dataset as Darwin Core Archive with occurrence core
+
+    Parameters
+    ----------
+    filename : str
+        Output file name.
+    rows : int
+        Number of data rows.
+    **kwargs
+        See :func:`generate_rows`.
+    """
+    header, _ = _template()
+    fields = ''.join('<field index="{}" term="http://rs.tdwg.org/dwc/terms/'
+                     '{}"/>'.format(index, term) for index, term in
+                     enumerate(header))
+    meta = ('<archive xmlns="http://rs.tdwg.org/dwc/text/">'
+            '<core encoding="UTF-8" fieldsTerminatedBy="\\t" '
+            'linesTerminatedBy="\\n" fieldsEnclosedBy="" '
+            'ignoreHeaderLines="1" '
+            'rowType="http://rs.tdwg.org/dwc/terms/Occurrence">'
+            '<files><location>occurrence.txt</location></files>'
+            '<id index="0"/>{}</core></archive>'.format(fields))
+
+    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as dwca:
+        dwca.writestr('meta.xml', meta)
+        with dwca.open('occurrence.txt', 'w', force_zip64=True) as core:
+            for row in generate_rows(rows, **kwargs):
+                core.write(('\t'.join(row) + '\n').encode('utf-8'))
+
+
+def dataset(kind, rows, error_rate=0.05, cardinality=1000, seed=42):
+    """Cached synthetic dataset, generated on first use
+
+    Datasets are stored in the directory defined by the
+    ``PYWHIP_BENCHMARK_DATA`` environment variable, or in a ``pywhip``
+    directory in the temporary directory of the system.
+
+    Parameters
+    ----------
+    kind : str
+        Either ``'csv'`` (tab delimited) or ``'dwca'``.
+    rows, error_rate, cardinality, seed
+        See :func:`generate_rows`.
+
+    Returns
+    -------
+    str
+        File name of the dataset.
+    """
+    directory = os.environ.get('PYWHIP_BENCHMARK_DATA',
+                               os.path.join(tempfile.gettempdir(), 'pywhip'))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    filename = os.path.join(directory, 'occurrence_{}_{}_{}_{}.{}'.format(
+        rows, error_rate, cardinality, seed,
+        'zip' if kind == 'dwca' else 'tsv'))
+    if not os.path.exists(filename):
+        write = write_dwca if kind == 'dwca' else write_csv
+        write(filename + '.tmp', rows, error_rate=error_rate,
+              cardinality=cardinality, seed=seed)
+        os.replace(filename + '.tmp', filename)
+    return filename
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('filename', help='output file, a .zip extension '
+                                         'creates a Darwin Core Archive')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--cardinality', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(args)
+
+    write = write_dwca if args.filename.endswith('.zip') else write_csv
+    write(args.filename, args.rows, error_rate=args.error_rate,
+          cardinality=args.cardinality, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
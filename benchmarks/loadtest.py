@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+"""Load test of the pywhip validation service.
+
+Uploads a synthetic dataset a number of times from concurrent clients and
+reports the throughput and latency percentiles of the validation requests.
+The specifications are registered before each upload, as done by clients
+not keeping the fingerprint, which measures the cache of compiled
+specifications as well. Without ``--url``, a service is started in this
+process.
+
+Usage::
+
+    python -m benchmarks.loadtest --rows 10000 --requests 50 --concurrency 8
+    python -m benchmarks.loadtest --kind dwca --workers 4
+    python -m benchmarks.loadtest --url http://127.0.0.1:8080
+"""
+
+import json
+import asyncio
+import argparse
+import threading
+from time import perf_counter
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+from .generate import dataset, SPECIFICATIONS_FILE
+
+
+def start_service(workers=None, batch_size=None):
+    """Start a validation service in a background thread
+
+    Returns
+    -------
+    str
+        URL of the service.
+    """
+    from pywhip.server import WhipServer
+
+    server = WhipServer(workers, batch_size=batch_size)
+    loop = asyncio.new_event_loop()
+    listener = loop.run_until_complete(server.start('127.0.0.1', 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return 'http://{}:{}'.format(*listener.sockets[0].getsockname()[:2])
+
+
+def _request(connection, method, path, body=None):
+    """Status, json content and duration of a request"""
+    start = perf_counter()
+    connection.request(method, path, body=body)
+    response = connection.getresponse()
+    content = json.loads(response.read().decode('utf-8'))
+    return response.status, content, perf_counter() - start
+
+
+def upload(url, specifications, data, kind, delimiter):
+    """Register the specifications and validate the data once
+
+    Returns
+    -------
+    status : int
+        Status of the validation request.
+    seconds : float
+        Duration of the registration and validation requests.
+    """
+    address = urlsplit(url)
+    connection = HTTPConnection(address.hostname, address.port)
+    try:
+        _, content, register_seconds = _request(
+            connection, 'POST', '/specifications', specifications)
+        path = '/validate/{}?specification={}'.format(
+            kind, content['specification'])
+        if kind == 'csv':
+            path += '&delimiter=%09' if delimiter == '\t' else \
+                '&delimiter={}'.format(delimiter)
+        status, _, validate_seconds = _request(connection, 'POST', path,
+                                               data)
+    finally:
+        connection.close()
+    return status, register_seconds + validate_seconds
+
+
+def percentile(values, fraction):
+    """Value below which the ``fraction`` of the sorted values are"""
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def run(url, rows, requests, concurrency, kind='csv', error_rate=0.05):
+    """Upload a synthetic dataset ``requests`` times
+
+    Returns
+    -------
+    dict
+        Number of requests and failed requests, requests/s, rows/s and the
+        latency percentiles in seconds.
+    """
+    with open(SPECIFICATIONS_FILE, 'rb') as specifications_file:
+        specifications = specifications_file.read()
+    with open(dataset(kind, rows, error_rate), 'rb') as data_file:
+        data = data_file.read()
+
+    # a first upload compiles the specifications
+    upload(url, specifications, data, kind, '\t')
+
+    start = perf_counter()
+    with ThreadPoolExecutor(concurrency) as clients:
+        results = list(clients.map(
+            lambda _: upload(url, specifications, data, kind, '\t'),
+            range(requests)))
+    seconds = perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    return {'requests': requests,
+            'failed_requests': sum(1 for status, _ in results
+                                   if status != 200),
+            'requests_per_second': requests / seconds,
+            'rows_per_second': requests * rows / seconds,
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99)}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='URL of a running service')
+    parser.add_argument('--kind', choices=['csv', 'dwca'], default='csv')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--workers', type=int,
+                        help='worker processes of a service started here')
+    parser.add_argument('--batch-size', type=int,
+                        help='batch size of a service started here')
+    args = parser.parse_args(args)
+
+    url = args.url or start_service(args.workers, args.batch_size)
+    result = run(url, args.rows, args.requests, args.concurrency, args.kind,
+                 args.error_rate)
+    print("{requests} requests ({failed_requests} failed): "
+          "{requests_per_second:.1f} requests/s, "
+          "{rows_per_second:.0f} rows/s".format(**result))
+    print("latency p50 {p50:.3f} s, p95 {p95:.3f} s, "
+          "p99 {p99:.3f} s".format(**result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""Memory regression check of the pywhip validation stages.
+
+Validates a synthetic dataset with memory tracing enabled and compares the
+peak memory per million rows of each stage (header inspection, validation,
+report and html) with the stored baselines. Exits with a non-zero status
+when a stage exceeds its baseline by more than the threshold.
+
+Usage::
+
+    python -m benchmarks.memory
+    python -m benchmarks.memory --rows 10000 --threshold 0.1
+    python -m benchmarks.memory --update
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+
+from pywhip import whip_csv
+
+from .generate import dataset, load_specifications
+
+BASELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "memory_baselines.json")
+
+
+def measure(rows, error_rate=0.05):
+    """Memory usage per stage of the validation of a synthetic dataset
+
+    Parameters
+    ----------
+    rows : int
+        Number of data rows.
+    error_rate : float
+        Fraction of failing values, see
+        :func:`~benchmarks.generate.generate_rows`.
+
+    Returns
+    -------
+    dict
+        See :meth:`~pywhip.profiling.MemoryProfile.build_memory_report`.
+    """
+    # modules imported and templates compiled on first use are not traced
+    whip_csv(dataset('csv', 10, error_rate), load_specifications(),
+             '\t').get_report('html')
+
+    whip_it = whip_csv(dataset('csv', rows, error_rate),
+                       load_specifications(), '\t', memory_profile=True)
+    whip_it.get_report('html')
+    whip_it._memory_profile.stop()
+    return whip_it._memory_profile.build_memory_report()
+
+
+def compare(memory, baselines, threshold):
+    """Stages exceeding the baseline peak memory per million rows
+
+    Returns
+    -------
+    list
+        `(stage, peak_per_million_rows, baseline)` of the failing stages.
+    """
+    regressions = []
+    for stage, baseline in baselines.items():
+        current = memory[stage]['peak_per_million_rows']
+        if current > baseline * (1. + threshold):
+            regressions.append((stage, current, baseline))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed relative increase of the peak memory')
+    parser.add_argument('--update', action='store_true',
+                        help='store the current memory usage as baseline')
+    args = parser.parse_args(args)
+
+    key = '{}_{}'.format(args.rows, args.error_rate)
+    memory = measure(args.rows, args.error_rate)
+    for stage, usage in memory.items():
+        print('{:<12} {:>14,.0f} bytes peak per million rows'.format(
+            stage, usage['peak_per_million_rows']))
+
+    baselines = {}
+    if os.path.exists(BASELINES_FILE):
+        with open(BASELINES_FILE) as baselines_file:
+            baselines = json.load(baselines_file)
+    python = list(platform.python_version_tuple()[:2])
+    if baselines.get('python', python) != python:
+        print('Baselines are created with Python {}, results can differ'
+              .format('.'.join(baselines['python'])))
+
+    if args.update:
+        baselines['python'] = python
+        baselines.setdefault('datasets', {})[key] = {
+            stage: usage['peak_per_million_rows'] for stage, usage in
+            memory.items()}
+        with open(BASELINES_FILE, 'w') as baselines_file:
+            json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+        return 0
+
+    if key not in baselines.get('datasets', {}):
+        print('No baseline for {} rows with error rate {}, use --update'
+              .format(args.rows, args.error_rate))
+        return 1
+    regressions = compare(memory, baselines['datasets'][key], args.threshold)
+    for stage, current, baseline in regressions:
+        print('Memory regression in stage {}: {:,.0f} bytes per million '
+              'rows, baseline {:,.0f}'.format(stage, current, baseline))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
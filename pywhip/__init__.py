@@ -6,6 +6,9 @@ __author__ = """Stijn Van Hoey"""
 __email__ = 'stijn.vanhoey@gmail.com'
 __version__ = '0.3.4'
 
-from .pywhip import Whip, whip_dwca, whip_csv
+from .pywhip import (Whip, whip_dwca, whip_csv, whip_dataframe,
+                     whip_dataframe_chunks, whip_arrow, whip_parquet)
+from .parallel import WhipPool
 
-__all__ = ['Whip', 'whip_dwca', 'whip_csv']
+__all__ = ['Whip', 'whip_dwca', 'whip_csv', 'whip_dataframe',
+           'whip_dataframe_chunks', 'whip_arrow', 'whip_parquet', 'WhipPool']
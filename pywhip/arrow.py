@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""Validation of Arrow tables and Parquet files
+
+The columns of :class:`pyarrow.RecordBatch` objects are validated as
+dictionary-encoded columns (see :class:`~pywhip.batches.BatchValidator`).
+Columns which are already dictionary-encoded, e.g. Parquet columns read with
+``read_dictionary``, are used as such, other columns are encoded with
+:func:`pyarrow.compute.dictionary_encode`. Only the distinct values of a
+column are converted to Python strings. As for DataFrames, missing values are
+validated as empty strings and other values are converted to strings.
+
+Parquet files are read per row group, limited to the columns required by the
+specifications.
+"""
+
+from .batches import ColumnBatch, condition_fields, _MISSING, _as_text
+
+
+class ArrowBatch(ColumnBatch):
+    """Batch of rows provided by an Arrow record batch
+
+    Parameters
+    ----------
+    record_batch : pyarrow.RecordBatch
+        The rows of the batch, the column names are the field names.
+    """
+
+    def __init__(self, record_batch):
+        self.record_batch = record_batch
+
+    def __len__(self):
+        return self.record_batch.num_rows
+
+    def _encode_field(self, field):
+        """Distinct values and codes of a single field"""
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if field not in self.record_batch.schema.names:
+            return [_MISSING], np.zeros(len(self), dtype=np.int64)
+        column = self.record_batch.column(field)
+        if not pa.types.is_dictionary(column.type):
+            column = pc.dictionary_encode(column)
+        uniques = [_as_text(value) for value in column.dictionary.to_pylist()]
+        indices = column.indices
+        if indices.null_count:
+            indices = indices.fill_null(len(uniques))
+            uniques.append('')
+        codes = indices.to_numpy(zero_copy_only=False)
+        return uniques, codes.astype(np.int64, copy=False)
+
+    def rows(self):
+        """The rows of the batch as `field : value` dictionaries"""
+        return [{field: _as_text(value) for field, value in row.items()}
+                for row in self.record_batch.to_pylist()]
+
+
+def required_columns(schema, column_names):
+    """Columns of a data set required to validate the specifications
+
+    Parameters
+    ----------
+    schema : dict
+        Whip specifications, as `field : rules` combinations.
+    column_names : list
+        The columns of the data set.
+
+    Returns
+    -------
+    list
+        The columns of the specified fields and the fields of their if
+        conditions, in the order of ``column_names``. All columns, when a
+        field depends on the entire row.
+    """
+    required = set()
+    for field, rules in schema.items():
+        fields = condition_fields(rules)
+        if fields is None:
+            return list(column_names)
+        required.add(field)
+        required.update(fields)
+    return [name for name in column_names if name in required]
+
+
+def iter_arrow_batches(record_batches, batch_size, maxentries=None):
+    """Split Arrow record batches in batches of at most ``batch_size`` rows
+
+    Parameters
+    ----------
+    record_batches : iterable
+        The :class:`pyarrow.RecordBatch` objects.
+    batch_size : int
+        Maximum number of rows of a batch.
+    maxentries : int
+        Maximum number of rows to provide in total.
+
+    Yields
+    ------
+    pywhip.arrow.ArrowBatch
+    """
+    remaining = maxentries
+    for record_batch in record_batches:
+        if remaining is not None:
+            record_batch = record_batch.slice(0, remaining)
+            remaining -= record_batch.num_rows
+        for start in range(0, record_batch.num_rows, batch_size):
+            yield ArrowBatch(record_batch.slice(start, batch_size))
+        if remaining is not None and remaining <= 0:
+            return
@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+
+"""Columnar validation of batches of rows
+
+Darwin Core data sets have a low number of distinct values per column. A
+batch of rows is dictionary-encoded column by column into the distinct
+values and an integer code for each row. The specifications of a field are
+validated once for each distinct value in the batch and the errors are
+linked back to the rows by the codes. For fields with ``if``
+specifications, the values of the condition fields are part of the
+distinct value. Fields with specifications depending on the entire row are
+validated row by row.
+
+The same columns are used to validate single records (see
+:class:`RecordChecker`), keeping the errors of each distinct value of a
+column between the records.
+"""
+
+from array import array
+from functools import partial
+from itertools import islice
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+# specifications for which the outcome depends on other fields of the row,
+# the fields of ``if`` conditions are known (see :func:`condition_fields`)
+ROW_RULES = frozenset(['dependencies', 'excludes', 'default_setter'])
+
+# specifications changing the document when normalized by Cerberus, next to
+# the normalization rules of the validator
+NORMALIZING_RULES = frozenset(['readonly', 'schema', 'items', 'keysrules',
+                               'valuesrules'])
+
+# value of a field missing in a row
+_MISSING = object()
+
+# combined codes of multiple fields are computed as integers below this limit
+_MAX_COMBINED_CODE = 2 ** 62
+
+
+def condition_fields(rules):
+    """Fields the specifications of a field depend on
+
+    Parameters
+    ----------
+    rules : dict
+        Specifications of a single field, e.g. ``{'allowed': ['male']}``.
+
+    Returns
+    -------
+    list | None
+        Names of the fields used in the ``if`` conditions, an empty list for
+        context free specifications, None when the specifications depend on
+        the entire row.
+    """
+    fields = []
+    for rule, constraint in rules.items():
+        if rule in ROW_RULES:
+            return None
+        if rule == 'if':
+            ifsets = [constraint] if isinstance(constraint, Mapping) \
+                else constraint
+            for ifset in ifsets:
+                fields.extend(key for key, value in ifset.items() if
+                              isinstance(value, dict) and key not in fields)
+        elif rule == 'delimitedvalues' and isinstance(constraint, Mapping):
+            nested_fields = condition_fields(constraint)
+            if nested_fields is None:
+                return None
+            fields.extend(key for key in nested_fields if key not in fields)
+    return fields
+
+
+def iter_batches(rows, batch_size):
+    """Group the rows in lists of ``batch_size`` rows
+
+    Parameters
+    ----------
+    rows : iterator
+        An iterator, yielding `field : value` combinations of the document
+        on each iteration.
+    batch_size : int
+        Number of rows in a batch, the last batch can be smaller.
+
+    Yields
+    ------
+    list
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def encode_column(batch, fields):
+    """Dictionary-encode the values of one or more fields in a batch of rows
+
+    Parameters
+    ----------
+    batch : list
+        List of `field : value` rows.
+    fields : tuple
+        Field names of the column, the values of multiple fields are
+        combined in a tuple.
+
+    Returns
+    -------
+    uniques : list
+        The distinct values of the column, in order of appearance. Rows
+        without the field have a placeholder value.
+    codes : array.array
+        The position in ``uniques`` of the value of each row.
+    """
+    uniques = {}
+    if len(fields) == 1:
+        field = fields[0]
+        values = [row.get(field, _MISSING) for row in batch]
+    else:
+        values = [tuple([row.get(field, _MISSING) for field in fields])
+                  for row in batch]
+    codes = array('l', [uniques.setdefault(value, len(uniques))
+                        for value in values])
+    return list(uniques), codes
+
+
+def _as_text(value):
+    """Text value of a column value, missing values are empty strings"""
+    if isinstance(value, str):
+        return value
+    if value is None or value != value:  # None or NaN
+        return ''
+    return str(value)
+
+
+def combine_columns(encoded):
+    """Combine the dictionary-encoded columns of multiple fields
+
+    Parameters
+    ----------
+    encoded : list
+        For each field, the `(uniques, codes)` of the column, with the codes
+        as NumPy array, see :func:`encode_column`.
+
+    Returns
+    -------
+    uniques : list
+        The distinct combinations of values, as tuples, in order of
+        appearance.
+    codes : numpy.ndarray
+        The position in ``uniques`` of the combination of each row.
+    """
+    import numpy as np
+
+    size = 1
+    combined = np.zeros(len(encoded[0][1]), dtype=np.int64)
+    for field_uniques, field_codes in encoded:
+        size *= len(field_uniques)
+        if size >= _MAX_COMBINED_CODE:
+            keys = list(zip(*[[field_uniques[code] for code in field_codes]
+                              for field_uniques, field_codes in encoded]))
+            uniques = {}
+            codes = [uniques.setdefault(key, len(uniques)) for key in keys]
+            return list(uniques), np.array(codes, dtype=np.int64)
+        combined = combined * len(field_uniques) + field_codes
+
+    keys, first, codes = np.unique(combined, return_index=True,
+                                   return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    uniques = []
+    for key in keys[order].tolist():
+        values = []
+        for field_uniques, _ in reversed(encoded):
+            key, code = divmod(key, len(field_uniques))
+            values.append(field_uniques[code])
+        uniques.append(tuple(reversed(values)))
+    return uniques, rank[codes.ravel()]
+
+
+class ColumnBatch(object):
+    """Batch of rows stored column by column
+
+    Base class of the batches of :mod:`pywhip.frames` and
+    :mod:`pywhip.arrow`, subclasses provide the dictionary-encoded column of
+    a single field with ``_encode_field(field)`` and the rows with
+    :meth:`rows`. The batches are validated by
+    :meth:`BatchValidator.validate`.
+    """
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def _encode_field(self, field):
+        """`(uniques, codes)` of a single field, see :func:`encode_column`,
+        with the codes as NumPy array"""
+        raise NotImplementedError
+
+    def encode(self, fields):
+        """Dictionary-encode the values of one or more fields
+
+        See :func:`~pywhip.batches.encode_column`, the codes are provided as
+        NumPy array.
+        """
+        if len(fields) == 1:
+            return self._encode_field(fields[0])
+        return combine_columns([self._encode_field(field) for field in
+                                fields])
+
+    def rows(self):
+        """The rows of the batch as `field : value` dictionaries"""
+        raise NotImplementedError
+
+
+class BatchValidator(object):
+    """Validate batches of rows column by column
+
+    Each field gets a validator of its own. The column of a field combines
+    the field with the fields of its ``if`` conditions (see
+    :func:`condition_fields`) and each distinct value of the column in a
+    batch is validated once. The fields with specifications depending on
+    the entire row are validated together for each row of the batch.
+
+    Parameters
+    ----------
+    validator : pywhip.validators.DwcaValidator
+        The row validator of the :class:`~pywhip.pywhip.Whip`, its class and
+        error handler are used to setup the validators of the fields and its
+        error handler formats the error messages.
+    schema : dict
+        Whip specification schema, consisting of `field : constraint`
+        combinations.
+
+    Attributes
+    ----------
+    columns : dict
+        The validator of each column, with the tuple of field names of the
+        column as key.
+    vectorized : dict
+        For columns of a single field with ``min``, ``max`` or
+        ``numberformat`` specifications, a
+        :class:`~pywhip.vectorized.VectorizedRules` evaluating these
+        specifications and a validator of the other specifications (None
+        when only ``empty`` remains). Requires NumPy.
+    row_validator : pywhip.validators.DwcaValidator | None
+        Validator of the fields depending on the entire row.
+    """
+
+    def __init__(self, validator, schema):
+        from .vectorized import VECTORIZED_RULES, vectorized_rules
+
+        self._format_record = validator.error_handler.format_record
+        self._records = []
+
+        self.columns = {}
+        self.vectorized = {}
+        row_fields = []
+        for field, rules in schema.items():
+            fields = condition_fields(rules)
+            if fields is None:
+                row_fields.append(field)
+            else:
+                column = tuple([field] + [key for key in fields
+                                          if key != field])
+                self.columns[column] = self._validator(validator,
+                                                       {field: rules})
+                evaluator = vectorized_rules(field, rules) \
+                    if len(column) == 1 else None
+                if evaluator is not None:
+                    other_rules = {rule: constraint for rule, constraint in
+                                   rules.items() if
+                                   rule not in VECTORIZED_RULES}
+                    self.vectorized[column] = (evaluator, self._validator(
+                        validator, {field: other_rules})
+                        if set(other_rules) - {'empty'} else None)
+        self.row_validator = None
+        if row_fields:
+            self.row_validator = self._validator(
+                validator, {field: schema[field] for field in row_fields})
+
+    def _validator(self, validator, schema):
+        """Validator of a part of the schema, recording its errors"""
+        field_validator = type(validator)(
+            schema, error_handler=type(validator.error_handler))
+        field_validator.record_errors(self._records)
+        return field_validator
+
+    def _errors(self, validator, document, normalize=True):
+        """List of `(field, rule, value, message)` errors of a document"""
+        records = self._records
+        del records[:]
+        validator.validate(document, normalize=normalize)
+
+        format_record = self._format_record
+        return [(record[0], record[1], record[4], format_record(record))
+                for record in records]
+
+    def _column_errors(self, column, validator, values):
+        """Errors of each of the distinct values of a column"""
+        if column in self.vectorized:
+            return self._vectorized_errors(column, validator, values)
+        if len(column) == 1:
+            field = column[0]
+            documents = [{} if value is _MISSING else {field: value}
+                         for value in values]
+        else:
+            documents = [{field: value for field, value in zip(column, key)
+                          if value is not _MISSING} for key in values]
+        return [self._errors(validator, document) for document in documents]
+
+    def _vectorized_errors(self, column, validator, values):
+        """Errors of each of the distinct values of a column, with the
+        numeric specifications evaluated vectorised"""
+        field = column[0]
+        evaluator, other_validator = self.vectorized[column]
+        positions = [position for position, value in enumerate(values)
+                     if isinstance(value, str) and value]
+        decided, value_errors = evaluator.evaluate(
+            [values[position] for position in positions])
+
+        format_record = self._format_record
+        errors = [None] * len(values)
+        for index, position in enumerate(positions):
+            if not decided[index]:
+                continue
+            errors[position] = self._errors(other_validator, {
+                field: values[position]}) if other_validator else []
+            errors[position].extend(
+                (record[0], record[1], record[4], format_record(record))
+                for record in value_errors.get(index, []))
+
+        return [self._errors(validator, {} if value is _MISSING
+                             else {field: value})
+                if value_errors is None else value_errors
+                for value, value_errors in zip(values, errors)]
+
+    def validate(self, batch):
+        """Validate a batch of rows
+
+        Parameters
+        ----------
+        batch : list | pywhip.batches.ColumnBatch
+            List of `field : value` rows, or a batch of columns.
+
+        Returns
+        -------
+        list
+            For each row, the list of `(field, rule, value, message)` errors,
+            see :meth:`~pywhip.pywhip.Whip._row_errors`.
+        """
+        if isinstance(batch, list):
+            rows = batch
+            encode = partial(encode_column, batch)
+        else:
+            rows = None
+            encode = batch.encode
+
+        batch_errors = [[] for _ in range(len(batch))]
+        for column, validator in self.columns.items():
+            uniques, codes = encode(column)
+            verdicts = self._column_errors(column, validator, uniques)
+            failing = [code for code, verdict in enumerate(verdicts)
+                       if verdict]
+            for position, code in _failing_rows(codes, failing):
+                batch_errors[position].extend(verdicts[code])
+
+        if self.row_validator is not None:
+            rows = batch.rows() if rows is None else rows
+            for row, row_errors in zip(rows, batch_errors):
+                row_errors.extend(self._errors(self.row_validator, row))
+        return batch_errors
+
+
+class RecordChecker(BatchValidator):
+    """Validate single records with a cache of the errors of each column
+
+    The columns of the :class:`BatchValidator` are validated for each
+    record, but the errors of a column value are kept in a cache of the
+    column, so a value validated before (e.g. a ``basisOfRecord``) is not
+    validated again. The cache of a column is cleared when it contains
+    :attr:`cache_size` values. The values are cached by type and value, as
+    equal values of other types (e.g. ``1``, ``1.0`` and ``True``) are
+    reported as provided. Fields with specifications depending on the
+    entire record are validated for each record.
+
+    Without normalization rules (e.g. ``coerce`` or ``default``) in the
+    specifications of a column, Cerberus does not normalize the documents,
+    the normalization having no effect on the errors.
+
+    The records are validated one at a time, a checker can not be shared by
+    threads.
+
+    Parameters
+    ----------
+    validator : pywhip.validators.DwcaValidator
+        The row validator of the :class:`~pywhip.pywhip.Whip`, see
+        :class:`BatchValidator`.
+    schema : dict
+        Whip specification schema, consisting of `field : constraint`
+        combinations.
+    """
+
+    cache_size = 10000
+
+    def __init__(self, validator, schema):
+        super(RecordChecker, self).__init__(validator, schema)
+
+        normalizing = NORMALIZING_RULES.union(validator.normalization_rules)
+        self._normalize = {column: not normalizing.isdisjoint(
+            schema[column[0]]) for column in self.columns}
+        self._row_normalize = self.row_validator is not None and \
+            not normalizing.isdisjoint(
+                rule for rules in self.row_validator.schema.values()
+                for rule in rules)
+        self._caches = {column: {} for column in self.columns}
+
+    def _value_errors(self, column, validator, value):
+        """Errors of a single value of a column"""
+        if len(column) == 1:
+            document = {} if value is _MISSING else {column[0]: value}
+        else:
+            document = {field: field_value for field, field_value in
+                        zip(column, value) if field_value is not _MISSING}
+        return self._errors(validator, document, self._normalize[column])
+
+    def check(self, record):
+        """Validate a single record
+
+        Parameters
+        ----------
+        record : dict
+            `field : value` combinations of the record.
+
+        Returns
+        -------
+        list
+            The `(field, rule, value, message)` errors of the record, see
+            :meth:`~pywhip.pywhip.Whip._row_errors`.
+        """
+        errors = []
+        caches = self._caches
+        for column, validator in self.columns.items():
+            if len(column) == 1:
+                value = record.get(column[0], _MISSING)
+                key = (type(value), value)
+            else:
+                value = tuple([record.get(field, _MISSING)
+                               for field in column])
+                key = (tuple([type(field_value) for field_value in value]),
+                       value)
+            cache = caches[column]
+            try:
+                errors.extend(cache[key])
+                continue
+            except KeyError:
+                pass
+            except TypeError:  # unhashable value
+                errors.extend(self._value_errors(column, validator, value))
+                continue
+
+            value_errors = self._value_errors(column, validator, value)
+            if len(cache) >= self.cache_size:
+                cache.clear()
+            cache[key] = value_errors
+            errors.extend(value_errors)
+
+        if self.row_validator is not None:
+            errors.extend(self._errors(self.row_validator, record,
+                                       self._row_normalize))
+        return errors
+
+
+def _failing_rows(codes, failing):
+    """`(position, code)` of the rows with a code in ``failing``"""
+    if not failing:
+        return []
+    try:
+        import numpy as np
+    except ImportError:
+        failing = set(failing)
+        return [(position, code) for position, code in enumerate(codes)
+                if code in failing]
+    codes = np.asarray(codes)
+    positions = np.flatnonzero(np.isin(codes, failing))
+    return zip(positions.tolist(), codes[positions].tolist())
@@ -2,61 +2,230 @@
 
 """Console script for pywhip."""
 
+import os
 import re
 
 import yaml
 import click
 
 from pywhip import whip_csv
+from pywhip.state import Checkpoint
+from pywhip.progress import Progress, InterimReport
+from pywhip.datasets import (REPORT_FORMATS, is_collection, find_data_files,
+                             write_report, whip_csv_files)
 
 
 def _get_output_format(filename):
     """Extract data type format from provided filepath"""
     regex_extension = r"(?<=\.)[a-zA-Z]+$"
     extension = re.findall(regex_extension, filename)[0]
-    if extension not in ["json", "html"]:
+    if extension not in ["json", "ndjson", "html"]:
         raise Exception("Not a valid output file extension for whip reporting,"
-                        "use json or html")
+                        "use json, ndjson or html")
     return extension
 
 
 @click.command()
-@click.argument('data_file', type=click.Path(exists=True))
+@click.argument('data_file', type=click.Path())
 @click.argument('specifications_file', type=click.Path(exists=True))
 @click.argument('output_file', type=click.Path(), required=False)
 @click.option('--delimiter', help='Delimiter of the data file',
+              default=',', show_default=True)
+@click.option('--manifest', type=click.Path(),
+              help='Sidecar manifest file to only revalidate new or changed '
+                   'rows of a previous run', required=False)
+@click.option('--tail', type=click.Path(),
+              help='State file to only validate the rows appended to the '
+                   'data file since the previous run', required=False)
+@click.option('--checkpoint', type=click.Path(),
+              help='Checkpoint file to periodically store the validation '
+                   'state', required=False)
+@click.option('--checkpoint-rows', type=int, default=100000,
+              help='Number of rows between two checkpoints')
+@click.option('--checkpoint-seconds', type=int, default=300,
+              help='Number of seconds between two checkpoints')
+@click.option('--resume', is_flag=True,
+              help='Resume the validation from the checkpoint file')
+@click.option('--progress', is_flag=True,
+              help='Report progress, throughput and memory usage')
+@click.option('--interim-report', type=click.Path(),
+              help='Output file (json, ndjson or html) to write the report '
+                   'of the rows validated so far', required=False)
+@click.option('--interim-rows', type=int, default=100000,
+              help='Number of rows between two interim reports')
+@click.option('--profile', is_flag=True,
+              help='Add the timing of each specification to the report')
+@click.option('--sharded', is_flag=True,
+              help='Write the html report as an index page with the details '
+                   'of each field in a separate file, loaded on demand')
+@click.option('--memory-profile', is_flag=True,
+              help='Trace and print the memory usage of each validation '
+                   'stage')
+@click.option('--batch-size', type=int,
+              help='Validate the rows in batches of this number of rows, '
+                   'validating each distinct value of a batch once',
               required=False)
-def main(data_file, specifications_file, output_file="index.html",
-         delimiter=","):
+@click.option('--pipeline', is_flag=True,
+              help='Read and parse the data file in separate threads, '
+                   'overlapping the reading with the validation')
+@click.option('--workers', type=int,
+              help='Validate the rows with this number of worker processes',
+              required=False)
+@click.option('--file-list', is_flag=True,
+              help='DATA_FILE is a text file listing the data files to '
+                   'validate, one on each line')
+@click.option('--report-format', type=click.Choice(REPORT_FORMATS),
+              default='html', show_default=True,
+              help='Format of the report of each data file, when validating '
+                   'multiple data files')
+def main(data_file, specifications_file, output_file=None,
+         delimiter=",", manifest=None, tail=None, checkpoint=None,
+         checkpoint_rows=100000, checkpoint_seconds=300, resume=False,
+         progress=False, interim_report=None, interim_rows=100000,
+         profile=False, sharded=False, memory_profile=False,
+         batch_size=None, pipeline=False, workers=None, file_list=False,
+         report_format='html'):
     """Validate a CSV data set using whip specifications.
 
     \b
-    DATA_FILE :  Input CSV data file to whip.
+    DATA_FILE :  Input CSV data file to whip, or a directory or (quoted) glob
+    pattern of data files.
     SPECIFICATIONS_FILE : Whip specifications to validate data set.
-    OUTPUT_FILE : Output file to write report, either with a json or html
-    file extension
+    OUTPUT_FILE : Output file to write report, either with a json, ndjson
+    (one json record for each field-rule combination) or html file
+    extension. When validating multiple data files, the output directory of
+    the reports and the summary index.
     """
+    if is_collection(data_file, file_list):
+        return _main_collection(data_file, specifications_file, output_file,
+                                delimiter, file_list, report_format,
+                                manifest or tail or checkpoint or resume or
+                                interim_report or pipeline or profile or
+                                memory_profile, sharded, batch_size, workers,
+                                progress)
+    if not os.path.exists(data_file):
+        raise click.BadParameter("Path '{}' does not exist.".format(
+            data_file), param_hint="'DATA_FILE'")
+    output_file = output_file or "index.html"
+
+    if resume and not checkpoint:
+        raise click.UsageError("Provide the --checkpoint file to resume "
+                               "from")
+    if checkpoint:
+        checkpoint = Checkpoint(checkpoint, rows=checkpoint_rows,
+                                seconds=checkpoint_seconds)
+
+    hooks = []
+    if progress:
+        hooks.append(Progress(echo=lambda message: click.echo(message,
+                                                              err=True)))
+    if interim_report:
+        try:
+            hooks.append(InterimReport(interim_report, every=interim_rows))
+        except ValueError as error:
+            raise click.BadParameter(str(error),
+                                     param_hint="'--interim-report'")
 
     click.echo("Validate data against whip specifications")
     click.echo("")
 
     with open(specifications_file) as schema_file:
-        specifications = yaml.load(schema_file)
+        specifications = yaml.safe_load(schema_file)
 
-    whip_it = whip_csv(data_file, specifications, delimiter)
+    whip_it = whip_csv(data_file, specifications, delimiter,
+                       manifest=manifest, tail=tail, checkpoint=checkpoint,
+                       resume=resume, hooks=hooks, profile=profile,
+                       memory_profile=memory_profile, batch_size=batch_size,
+                       pipeline=pipeline, workers=workers)
 
     output_format = _get_output_format(output_file)
-    if output_format == "html":
-        with open(output_file, "w") as index_page:
-            index_page.write(whip_it.get_report('html'))
-    elif output_format == "json":
-        with open(output_file, "w") as json_report:
-            json_report.write(whip_it.get_report('json'))
-    else:
-        NotImplementedError
+    write_report(whip_it, output_file, output_format, sharded)
+
+    if memory_profile:
+        whip_it._memory_profile.stop()
+        click.echo(whip_it._memory_profile.summary(), err=True)
 
     click.echo("Check your pywhip report by at {}".format(output_file))
 
 
+def _main_collection(source, specifications_file, output_directory,
+                     delimiter, file_list, report_format, unsupported,
+                     sharded, batch_size, workers, progress):
+    """Validate multiple data files, writing a report for each file and a
+    summary index"""
+    if unsupported:
+        raise click.UsageError("Multiple data files can not be combined with "
+                               "a manifest, tail, checkpoint, interim report, "
+                               "pipeline or (memory) profile")
+    try:
+        data_files = find_data_files(source, file_list)
+    except ValueError as error:
+        raise click.UsageError(str(error))
+    output_directory = output_directory or "reports"
+
+    click.echo("Validate {} data files against whip specifications".format(
+        len(data_files)))
+    click.echo("")
+
+    with open(specifications_file) as schema_file:
+        specifications = yaml.safe_load(schema_file)
+
+    validated = []
+
+    def echo_progress(data_file, whip_it):
+        validated.append(data_file)
+        if isinstance(whip_it, Exception):
+            outcome = "{}: {}".format(type(whip_it).__name__, whip_it)
+        else:
+            outcome = "{} failed rows".format(
+                whip_it.get_report()['results']['failed_rows'])
+        click.echo("[{}/{}] {}: {}".format(len(validated), len(data_files),
+                                           data_file, outcome), err=True)
+
+    callback = echo_progress if progress else None
+    summary = whip_csv_files(data_files, specifications, delimiter,
+                             output_directory, report_format,
+                             batch_size=batch_size, workers=workers,
+                             sharded=sharded, callback=callback)
+    click.echo("Validated {} files in {:.1f} seconds ({:.1f} files/s)".format(
+        len(summary.files), summary.seconds, summary.files_per_second),
+        err=True)
+    click.echo("Check your pywhip reports at {}".format(
+        os.path.join(output_directory, "index.html")))
+
+
+@click.command()
+@click.option('--host', default='127.0.0.1', show_default=True,
+              help='Host name or address to listen on')
+@click.option('--port', type=int, default=8080, show_default=True,
+              help='Port to listen on')
+@click.option('--workers', type=int,
+              help='Number of worker processes, by default the number of '
+                   'CPUs', required=False)
+@click.option('--cache-size', type=int, default=32, show_default=True,
+              help='Number of compiled specifications to keep')
+@click.option('--batch-size', type=int,
+              help='Validate the rows in batches of this number of rows, '
+                   'validating each distinct value of a batch once',
+              required=False)
+def serve(host='127.0.0.1', port=8080, workers=None, cache_size=32,
+          batch_size=None):
+    """Run a local HTTP service validating data sets using whip
+    specifications.
+
+    Register specifications with a POST of the YAML specifications to
+    /specifications and validate data with a POST of a CSV file to
+    /validate/csv or a Darwin Core Archive to /validate/dwca, referring to
+    the returned specification fingerprint, e.g.
+    /validate/csv?specification=<fingerprint>&delimiter=%09
+    """
+    from pywhip.server import serve as run_server
+
+    run_server(host, port, workers, cache_size, batch_size,
+               ready=lambda host, port: click.echo(
+                   "Serving pywhip validation on http://{}:{}".format(
+                       host, port)))
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+
+"""Validation of collections of data files
+
+A collection of data files, provided as a directory, a glob pattern or a
+text file listing the files, is validated by a single
+:class:`~pywhip.parallel.WhipPool`, compiling the specifications once. A
+report is written for each file, together with a summary index of all files.
+"""
+
+import os
+import glob
+import json
+import time
+
+from .writers import write_json, write_ndjson
+
+# characters marking a data source as glob pattern
+GLOB_CHARACTERS = frozenset('*?[')
+
+REPORT_FORMATS = ('html', 'json', 'ndjson')
+
+
+def is_collection(source, file_list=False):
+    """Check if a data source refers to multiple data files
+
+    An existing file is a single data file, even when its name contains glob
+    characters (e.g. ``data[1].csv``).
+
+    Parameters
+    ----------
+    source : str
+        A data file, directory or glob pattern.
+    file_list : boolean
+        If True, the source is a text file listing the data files.
+
+    Returns
+    -------
+    boolean
+    """
+    if file_list:
+        return True
+    if os.path.isfile(source):
+        return False
+    return (os.path.isdir(source) or
+            bool(GLOB_CHARACTERS.intersection(source)))
+
+
+def find_data_files(source, file_list=False):
+    """Data files of a data source
+
+    Parameters
+    ----------
+    source : str
+        A data file, a directory (the files of the directory, hidden files
+        excluded), a glob pattern (``**`` matches subdirectories as well)
+        or, with ``file_list``, a text file with a data file on each line.
+    file_list : boolean
+        If True, the source is a text file listing the data files.
+
+    Returns
+    -------
+    list
+        Filenames of the data files, sorted unless listed in a file.
+
+    Raises
+    ------
+    ValueError
+        When the data source does not provide any data file.
+    """
+    if not is_collection(source, file_list):
+        return [source]
+    if file_list:
+        with open(source) as listing:
+            data_files = [line.strip() for line in listing if line.strip()]
+    elif os.path.isdir(source):
+        data_files = sorted(os.path.join(source, name) for name in
+                            os.listdir(source) if not name.startswith('.')
+                            and os.path.isfile(os.path.join(source, name)))
+    else:
+        data_files = sorted(filename for filename in
+                            glob.glob(source, recursive=True)
+                            if os.path.isfile(filename))
+    if not data_files:
+        raise ValueError("No data files found for '{}'".format(source))
+    return data_files
+
+
+def report_filename(data_file, root, report_format):
+    """Relative filename of the report of a data file
+
+    The reports are written to the ``files`` subdirectory of the output
+    directory, keeping the directory structure of the data files below
+    ``root``, with the report format added as file extension (e.g.
+    ``files/a.csv.json``), so data files only differing in their extension
+    get a report of their own.
+
+    Parameters
+    ----------
+    data_file : str
+        Filename of the data file.
+    root : str
+        Common directory of the data files.
+    report_format : str
+        One of :data:`REPORT_FORMATS`.
+
+    Returns
+    -------
+    str
+    """
+    relative = os.path.relpath(os.path.abspath(data_file), root)
+    return "files/{}.{}".format(relative.replace(os.sep, "/"),
+                                report_format)
+
+
+def write_report(whip_it, output_file, report_format, sharded=False):
+    """Write the report of a validation
+
+    Parameters
+    ----------
+    whip_it : pywhip.pywhip.Whip
+        The validation.
+    output_file : str
+        Filename of the report.
+    report_format : str
+        One of :data:`REPORT_FORMATS`.
+    sharded : boolean
+        If True, write a html report with the details of each field in a
+        separate file, see :meth:`~pywhip.pywhip.Whip.create_html_shards`.
+    """
+    if report_format == "html" and sharded:
+        whip_it.create_html_shards(output_file)
+    elif report_format == "html":
+        with open(output_file, "w") as index_page:
+            index_page.write(whip_it.get_report('html'))
+    elif report_format == "json":
+        with open(output_file, "w") as json_report:
+            write_json(whip_it.get_report('json'), json_report)
+    elif report_format == "ndjson":
+        with open(output_file, "w") as ndjson_report:
+            write_ndjson(whip_it.get_report('json'), ndjson_report)
+    else:
+        raise ValueError("Not a valid report format: {}".format(
+            report_format))
+
+
+class DatasetSummary(object):
+    """Summary of the validation of a collection of data files
+
+    Parameters
+    ----------
+    output_directory : str
+        Directory of the reports.
+
+    Attributes
+    ----------
+    files : list
+        For each data file, a dictionary with the ``data_file``, the
+        ``report`` filename relative to the output directory, the
+        ``total_rows``, ``passed_rows``, ``failed_rows``, the
+        ``unknown_fields`` and the ``error`` when the file could not be
+        validated.
+    """
+
+    def __init__(self, output_directory):
+        self.output_directory = output_directory
+        self.files = []
+        self._start_time = time.time()
+        self._seconds = None
+
+    def add(self, data_file, report=None, whip_it=None, error=None):
+        """Add the outcome of the validation of a data file
+
+        Parameters
+        ----------
+        data_file : str
+            Filename of the data file.
+        report : str
+            Filename of the report, relative to the output directory.
+        whip_it : pywhip.pywhip.Whip
+            The validation of the data file.
+        error : Exception
+            The error raised when the data file could not be validated.
+        """
+        item = {'data_file': data_file, 'report': report,
+                'total_rows': None, 'passed_rows': None, 'failed_rows': None,
+                'unknown_fields': [], 'error': None}
+        if whip_it is not None:
+            results = whip_it.get_report()['results']
+            item.update({key: results[key] for key in
+                         ('total_rows', 'passed_rows', 'failed_rows')})
+            item['unknown_fields'] = sorted(results['unknown_fields'])
+        if error is not None:
+            item['error'] = "{}: {}".format(type(error).__name__, error)
+        self.files.append(item)
+
+    @property
+    def seconds(self):
+        """Duration of the validation in seconds"""
+        if self._seconds is not None:
+            return self._seconds
+        return time.time() - self._start_time
+
+    @property
+    def files_per_second(self):
+        """Throughput of the validation"""
+        return len(self.files) / self.seconds if self.seconds else 0.
+
+    def stop(self):
+        """Stop the clock of the validation"""
+        self._seconds = time.time() - self._start_time
+
+    def to_dict(self):
+        """The summary as plain data types
+
+        Returns
+        -------
+        dict
+        """
+        return {'executed_at': time.strftime("%Y-%m-%d %H:%M"),
+                'seconds': self.seconds,
+                'files_per_second': self.files_per_second,
+                'total_files': len(self.files),
+                'failed_files': sum(1 for item in self.files
+                                    if item['error'] or item['failed_rows']),
+                'total_rows': sum(item['total_rows'] or 0
+                                  for item in self.files),
+                'failed_rows': sum(item['failed_rows'] or 0
+                                   for item in self.files),
+                'files': self.files}
+
+    def write(self):
+        """Write the summary index as ``summary.json`` and ``index.html``
+        in the output directory
+
+        Returns
+        -------
+        str
+            Filename of the html index page.
+        """
+        from .templates import get_template
+
+        summary = self.to_dict()
+        with open(os.path.join(self.output_directory, "summary.json"),
+                  "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+        index_page = os.path.join(self.output_directory, "index.html")
+        with open(index_page, "w") as index_file:
+            index_file.write(get_template("summary.html").render(
+                summary=summary))
+        return index_page
+
+
+def whip_csv_files(csv_files, specifications, delimiter, output_directory,
+                   report_format='html', maxentries=None, batch_size=None,
+                   workers=None, sharded=False, callback=None):
+    """Whip a collection of CSV-like files with a single worker pool
+
+    The specifications are compiled once and the files are validated at the
+    same time by the worker processes of a
+    :class:`~pywhip.parallel.WhipPool`, each file by a single worker. The
+    report of each file is written to the output directory, as well as a
+    summary index of all files (see :class:`DatasetSummary`). Files which
+    can not be read are listed in the summary with their error.
+
+    Parameters
+    ----------
+    csv_files : list
+        Filenames of the CSV files to whip validate, see
+        :func:`find_data_files`.
+    specifications : dict
+        Valid specifications whip dictionary schema.
+    delimiter : str
+        A one-character string used to separate fields, e.g. ``','``.
+    output_directory : str
+        Directory to write the reports and summary index to.
+    report_format : str
+        Format of the report of each file, one of :data:`REPORT_FORMATS`.
+    maxentries : int
+        Define the limit of records to validate of each file.
+    batch_size : int
+        If provided, validate the rows in batches of ``batch_size`` rows, see
+        :class:`~pywhip.pywhip.Whip`.
+    workers : int
+        Number of worker processes, by default the number of CPUs.
+    sharded : boolean
+        If True, write sharded html reports, see
+        :meth:`~pywhip.pywhip.Whip.create_html_shards`.
+    callback : callable
+        Called as ``callback(csv_file, whip_it)`` after the validation of
+        each file, with the exception instead of the Whip instance when the
+        file could not be validated.
+
+    Returns
+    -------
+    summary : pywhip.datasets.DatasetSummary
+    """
+    from .parallel import WhipPool
+
+    if report_format not in REPORT_FORMATS:
+        raise ValueError("Not a valid report format: {}".format(
+            report_format))
+    csv_files = list(csv_files)
+    if not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(csv_file))
+                               for csv_file in csv_files]) \
+        if csv_files else os.getcwd()
+    summary = DatasetSummary(output_directory)
+    with WhipPool(specifications, workers, batch_size=batch_size) as pool:
+        for csv_file, whip_it in pool.map_csv(csv_files, delimiter,
+                                              maxentries,
+                                              return_errors=True):
+            if isinstance(whip_it, Exception):
+                summary.add(csv_file, error=whip_it)
+            else:
+                report = report_filename(csv_file, root, report_format)
+                output_file = os.path.join(output_directory, report)
+                if not os.path.isdir(os.path.dirname(output_file)):
+                    os.makedirs(os.path.dirname(output_file))
+                write_report(whip_it, output_file, report_format, sharded)
+                summary.add(csv_file, report, whip_it)
+            if callback is not None:
+                callback(csv_file, whip_it)
+    summary.stop()
+    summary.write()
+    return summary
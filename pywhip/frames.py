@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""Validation of pandas DataFrames
+
+The columns of a :class:`pandas.DataFrame` are dictionary-encoded with
+:func:`pandas.factorize`, without converting the rows to dictionaries (see
+:class:`~pywhip.batches.BatchValidator`). As whip specifications validate
+text values, missing values (``NaN``, ``None``) are validated as empty
+strings, i.e. according to the ``empty`` specification, and other values
+are converted to strings.
+"""
+
+from .batches import ColumnBatch, _MISSING, _as_text
+
+
+class FrameBatch(ColumnBatch):
+    """Batch of rows provided by a DataFrame
+
+    Parameters
+    ----------
+    frame : pandas.DataFrame
+        The rows of the batch, the column names are the field names.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _encode_field(self, field):
+        """Distinct values and codes of a single field"""
+        import numpy as np
+        import pandas as pd
+
+        if field not in self.frame.columns:
+            return [_MISSING], np.zeros(len(self.frame), dtype=np.int64)
+        codes, uniques = pd.factorize(self.frame[field], sort=False,
+                                      use_na_sentinel=True)
+        uniques = [_as_text(value) for value in uniques]
+        missing = codes == -1
+        if missing.any():
+            codes[missing] = len(uniques)
+            uniques.append('')
+        return uniques, codes.astype(np.int64, copy=False)
+
+    def rows(self):
+        """The rows of the batch as `field : value` dictionaries"""
+        return [{field: _as_text(value) for field, value in row.items()}
+                for row in self.frame.to_dict('records')]
+
+
+def iter_frame_batches(frames, batch_size, maxentries=None):
+    """Split DataFrames in batches of at most ``batch_size`` rows
+
+    Parameters
+    ----------
+    frames : iterable
+        The DataFrames, e.g. the chunks of :func:`pandas.read_csv` with a
+        ``chunksize``.
+    batch_size : int
+        Maximum number of rows of a batch.
+    maxentries : int
+        Maximum number of rows to provide in total.
+
+    Yields
+    ------
+    pywhip.frames.FrameBatch
+    """
+    remaining = maxentries
+    for frame in frames:
+        if remaining is not None:
+            frame = frame.iloc[:remaining]
+            remaining -= len(frame)
+        for start in range(0, len(frame), batch_size):
+            yield FrameBatch(frame.iloc[start:start + batch_size])
+        if remaining is not None and remaining <= 0:
+            return
@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+
+"""Multi-process validation of CSV files
+
+The main process reads the file and splits it in blocks of consecutive
+records, without converting the records to dictionaries. The raw text of a
+block is written to a slot of a shared memory segment (see
+:mod:`multiprocessing.shared_memory`) and the worker processes only receive
+the position and length of the block in the segment. A worker decodes and
+parses the block in place, validates the rows and returns the error
+containers of the block (see
+:meth:`~pywhip.pywhip.Whip._dump_state`), which are merged by the main
+process in the order of the blocks.
+
+The number of blocks in progress is limited to the number of slots, the
+main process waits for the oldest block when all slots are in use.
+
+The worker processes are managed by a :class:`WhipPool`, which compiles the
+specifications once and can validate many files one after the other.
+"""
+
+import io
+import csv
+import importlib
+from itertools import islice
+from collections import deque
+
+# number of bytes of a slot in the shared memory segment
+SLOT_SIZE = 2 ** 23
+
+# state of the worker process, see `_init_worker`
+_worker = {}
+
+# compiled specifications of the pools, inherited by forked workers
+_templates = {}
+
+
+class SharedSlots(object):
+    """Fixed size slots in a shared memory segment
+
+    Parameters
+    ----------
+    slots : int
+        Number of slots.
+    slot_size : int
+        Number of bytes of a slot.
+
+    Attributes
+    ----------
+    memory : multiprocessing.shared_memory.SharedMemory
+        The shared memory segment, slot ``i`` starts at byte
+        ``i * slot_size``.
+    """
+
+    def __init__(self, slots, slot_size=SLOT_SIZE):
+        from multiprocessing.shared_memory import SharedMemory
+
+        self.slot_size = slot_size
+        self.memory = SharedMemory(create=True, size=slots * slot_size)
+        self._free = deque(range(slots))
+
+    @property
+    def available(self):
+        """Number of free slots"""
+        return len(self._free)
+
+    def write(self, data):
+        """Write data to a free slot
+
+        Parameters
+        ----------
+        data : bytes
+            Data of at most ``slot_size`` bytes.
+
+        Returns
+        -------
+        int
+            The slot containing the data.
+        """
+        slot = self._free.popleft()
+        start = slot * self.slot_size
+        self.memory.buf[start:start + len(data)] = data
+        return slot
+
+    def release(self, slot):
+        """Make a slot available again"""
+        self._free.append(slot)
+
+    def close(self):
+        """Close and remove the shared memory segment"""
+        self.memory.close()
+        self.memory.unlink()
+
+
+def iter_blocks(handle, delimiter, block_rows, block_size, maxentries=None,
+                header=True):
+    """Split the records of a CSV file in blocks
+
+    The records are parsed to find their boundaries (e.g. line endings
+    inside quoted values) and to count the rows, as
+    :class:`CSV <python3:csv.DictReader>` skipping empty lines. The header
+    is skipped, unless already read from the file.
+
+    Parameters
+    ----------
+    handle : file object
+        The CSV file, opened in text mode.
+    delimiter : str
+        A one-character string used to separate fields, e.g. ``','``.
+    block_rows : int
+        Maximum number of rows of a block.
+    block_size : int
+        Number of characters after which a block is completed.
+    maxentries : int
+        Maximum number of rows to provide in total.
+    header : boolean
+        If False, the file starts with the first record after the header.
+
+    Yields
+    ------
+    text : str
+        The raw text of the records of the block.
+    rows : int
+        Number of rows of the block.
+    """
+    lines = []
+    size = 0
+
+    def read_lines():
+        nonlocal size
+        for line in handle:
+            lines.append(line)
+            size += len(line)
+            yield line
+
+    reader = csv.reader(read_lines(), delimiter=delimiter)
+    if header:
+        next(reader, None)
+        del lines[:]
+    size, rows, remaining = 0, 0, maxentries
+    for record in reader:
+        if record:
+            rows += 1
+            if remaining is not None:
+                remaining -= 1
+        if rows == block_rows or size >= block_size or remaining == 0:
+            yield ''.join(lines), rows
+            del lines[:]
+            size, rows = 0, 0
+            if remaining == 0:
+                return
+    if lines:
+        yield ''.join(lines), rows
+
+
+def _init_worker(key, specifications, sample_size, batch_size,
+                 memory_name, slot_size):
+    """Prepare the state of a worker process
+
+    Forked workers inherit the compiled specifications of the pool, other
+    workers compile the specifications themselves.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+    from .pywhip import Whip
+
+    whip_it = _templates.get(key)
+    if whip_it is None:
+        whip_it = Whip(specifications, sample_size, batch_size=batch_size)
+    _worker.update(whip_it=whip_it, slot_size=slot_size,
+                   memory=SharedMemory(memory_name))
+
+
+def _validate_block(row_id, field_names, delimiter, slot, length, data=None):
+    """Validate a block of records in a worker process
+
+    Parameters
+    ----------
+    row_id : int
+        Row identifier of the row preceding the block.
+    field_names : list
+        Field names of the data, as defined by the header.
+    delimiter : str
+        A one-character string used to separate fields, e.g. ``','``.
+    slot : int
+        Slot of the shared memory segment containing the block.
+    length : int
+        Number of bytes of the block.
+    data : bytes
+        The block itself, when not provided by the shared memory.
+
+    Returns
+    -------
+    dict
+        The error containers of the block, see
+        :meth:`~pywhip.pywhip.Whip._dump_state`.
+    """
+    if data is None:
+        start = slot * _worker['slot_size']
+        text = str(_worker['memory'].buf[start:start + length], 'utf-8')
+    else:
+        text = data.decode('utf-8')
+    rows = csv.DictReader(io.StringIO(text), fieldnames=field_names,
+                          delimiter=delimiter)
+    return _worker['whip_it']._whip_part(rows, row_id)
+
+
+def _validate_file(csv_file, delimiter, maxentries):
+    """Validate an entire CSV file in a worker process
+
+    Returns
+    -------
+    field_names : list
+        Field names of the data, as defined by the header.
+    state : dict
+        The error containers of the file, see
+        :meth:`~pywhip.pywhip.Whip._dump_state`.
+    """
+    with open(csv_file, "r") as dwc:
+        reader = csv.DictReader(dwc, delimiter=delimiter)
+        field_names = reader.fieldnames
+        rows = islice(reader, maxentries) if maxentries else reader
+        return field_names, _worker['whip_it']._whip_part(rows, 0)
+
+
+class WhipPool(object):
+    """Pool of worker processes validating with compiled specifications
+
+    The specifications are compiled once, i.e. validated by Cerberus and
+    prepared for the batch validation, before the worker processes are
+    started. Where available, the workers are forked and share the compiled
+    specifications (and the modules imported by the validation rules) with
+    the main process. The pool validates any number of files, one after the
+    other::
+
+        with WhipPool(specifications, workers=4) as pool:
+            for csv_file, whip_it in pool.map_csv(csv_files, "\\t"):
+                print(csv_file, whip_it.get_report()['results']['failed_rows'])
+
+    Parameters
+    ----------
+    specifications : dict
+        Valid specifications whip dictionary schema.
+    workers : int
+        Number of worker processes, by default the number of CPUs.
+    sample_size : int
+        Number of value-examples to use in reporting, see
+        :class:`~pywhip.pywhip.Whip`.
+    batch_size : int
+        If provided, the workers validate the rows in batches of
+        ``batch_size`` rows, see :class:`~pywhip.pywhip.Whip`.
+    block_rows : int
+        Maximum number of rows of a block, see
+        :meth:`~pywhip.parallel.WhipPool.whip_csv`.
+    slot_size : int
+        Number of bytes of a shared memory slot, limiting the size of a
+        block.
+
+    Attributes
+    ----------
+    whip_it : pywhip.pywhip.Whip
+        Whip instance with the compiled specifications, copied for each
+        validated file (see :meth:`~pywhip.pywhip.Whip._copy`).
+    """
+
+    def __init__(self, specifications, workers=None, sample_size=10,
+                 batch_size=None, block_rows=20000, slot_size=SLOT_SIZE):
+        import multiprocessing
+        from .pywhip import Whip
+
+        self.whip_it = Whip(specifications, sample_size,
+                            batch_size=batch_size)
+        self.whip_it._prepare_batches()
+        _preload_rules()
+
+        workers = workers or multiprocessing.cpu_count()
+        self.block_rows = block_rows
+        self.slots = SharedSlots(2 * workers, slot_size)
+        self._key = id(self)
+        _templates[self._key] = self.whip_it
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError:
+            context = multiprocessing.get_context()
+        self.pool = context.Pool(
+            workers, initializer=_init_worker,
+            initargs=(self._key, specifications, sample_size, batch_size,
+                      self.slots.memory.name, slot_size))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes and remove the shared memory"""
+        self.pool.terminate()
+        self.pool.join()
+        self.slots.close()
+        _templates.pop(self._key, None)
+
+    def whip_csv(self, csv_file, delimiter, maxentries=None, hooks=None,
+                 memory_profile=False):
+        """Whip a CSV-like file, split in blocks validated by the workers
+
+        The main process reads the file in blocks of consecutive records
+        (see :func:`iter_blocks`), passed to the workers by shared memory,
+        and merges the error containers of the blocks in order.
+
+        Parameters
+        ----------
+        csv_file : str
+            Filename of the CSV file to whip validate.
+        delimiter : str
+            A one-character string used to separate fields, e.g. ``','``.
+        maxentries : int
+            Define the limit of records to validate.
+        hooks : list
+            Additional callables called periodically during validation, see
+            :meth:`~pywhip.pywhip.Whip._whip`.
+        memory_profile : boolean
+            If True, trace the memory usage of the main process, see
+            :class:`~pywhip.pywhip.Whip`.
+
+        Returns
+        -------
+        whip_it : pywhip.pywhip.Whip
+            Whip validator class instance, containing the errors and
+            reporting capabilities.
+        """
+        whip_it = self.whip_it._copy(memory_profile)
+
+        # Extract data header
+        with whip_it._memory_stage('header'), open(csv_file, "r") as dwc:
+            reader = csv.DictReader(dwc, delimiter=delimiter)
+            field_names = reader.fieldnames
+
+        whip_it._whip(self._block_states(csv_file, field_names, delimiter,
+                                         maxentries or None),
+                      field_names, hooks=hooks, states=True)
+        return whip_it
+
+    def map_csv(self, csv_files, delimiter, maxentries=None,
+                return_errors=False):
+        """Whip CSV-like files, each file validated by a single worker
+
+        Suited for many small files, validated at the same time by the
+        workers.
+
+        Parameters
+        ----------
+        csv_files : iterable
+            Filenames of the CSV files to whip validate.
+        delimiter : str
+            A one-character string used to separate fields, e.g. ``','``.
+        maxentries : int
+            Define the limit of records to validate of each file.
+        return_errors : boolean
+            If True, the exception raised when reading a file (e.g. a
+            missing file or an encoding error) is provided instead of the
+            Whip instance of the file, and the other files are validated.
+
+        Yields
+        ------
+        csv_file : str
+            Filename of the CSV file.
+        whip_it : pywhip.pywhip.Whip | Exception
+            Whip validator class instance of the file, in the order of
+            ``csv_files``.
+        """
+        csv_files = list(csv_files)
+        results = self.pool.imap(_validate_file_args, [
+            (csv_file, delimiter, maxentries) for csv_file in csv_files])
+        for csv_file in csv_files:
+            try:
+                field_names, state = next(results)
+            except Exception as exc:
+                if not return_errors:
+                    raise
+                yield csv_file, exc
+                continue
+            # merged without printing the outcome of each file
+            whip_it = self.whip_it._copy()
+            whip_it._prepare(field_names or [])
+            whip_it._load_state(state)
+            whip_it._finalize_report()
+            yield csv_file, whip_it
+
+    def _block_states(self, csv_file, field_names, delimiter, maxentries):
+        """Error containers of the consecutive blocks of a CSV file"""
+        pending = deque()
+        row_id = 0
+        # a character takes at most 4 bytes in utf-8
+        block_size = self.slots.slot_size // 4
+        with open(csv_file, "r") as dwc:
+            for text, rows in iter_blocks(dwc, delimiter, self.block_rows,
+                                          block_size, maxentries):
+                if not self.slots.available:
+                    slot, result = pending.popleft()
+                    yield result.get()
+                    self.slots.release(slot)
+                data = text.encode('utf-8')
+                if len(data) <= self.slots.slot_size:
+                    slot = self.slots.write(data)
+                    args = (row_id, field_names, delimiter, slot, len(data))
+                else:
+                    # a single record exceeding the slot size
+                    slot = self.slots.write(b'')
+                    args = (row_id, field_names, delimiter, slot, 0, data)
+                pending.append((slot, self.pool.apply_async(_validate_block,
+                                                            args)))
+                row_id += rows
+        while pending:
+            slot, result = pending.popleft()
+            yield result.get()
+            self.slots.release(slot)
+
+
+def _validate_file_args(args):
+    """:func:`_validate_file` with the arguments as a single tuple"""
+    return _validate_file(*args)
+
+
+def _preload_rules():
+    """Import the modules imported by the validation rules when used, to
+    share them with forked workers"""
+    for module in ('dateutil.parser', 'rfc3987'):
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
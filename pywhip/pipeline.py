@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+"""Pipelined reading of the input data
+
+Reading the raw data, parsing the records and validating them are executed
+as separate stages, connected by bounded queues. A reader thread reads raw
+blocks of the data file, a parser thread decodes the blocks and splits them
+in rows, provided in chunks of rows, and the validation consumes the rows in
+the calling thread. A full queue blocks the stage feeding it, which limits
+the memory usage to ``queue_size`` blocks or chunks for each stage.
+
+Python threads share the global interpreter lock, the stages overlap the
+waits for disk or network I/O (and zlib decompression, which releases the
+lock) with the parsing and validation, not the parsing with the validation.
+"""
+
+import io
+import csv
+import queue
+import threading
+from itertools import islice
+
+# kind of the items passed between the stages
+_ITEM, _ERROR, _DONE = range(3)
+
+
+class Stage(object):
+    """Iterate over an iterable in a separate thread
+
+    The items are passed to the consumer by a bounded queue: the thread
+    waits when the queue is full and the consumer waits when it is empty.
+    Exceptions raised by the iterable are raised by the consumer. When the
+    consumer stops iterating, the thread stops as well.
+
+    Parameters
+    ----------
+    iterable : iterable
+        The items to provide, an iterator is closed when the stage stops.
+    queue_size : int
+        Maximum number of items waiting to be consumed.
+    name : str
+        Name of the thread.
+    """
+
+    def __init__(self, iterable, queue_size=8, name=None):
+        self._iterable = iterable
+        self._queue = queue.Queue(queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name,
+                                        daemon=True)
+
+    def _put(self, kind, item):
+        """Add an item to the queue, False when the stage is stopped"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put((kind, item), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            for item in self._iterable:
+                if not self._put(_ITEM, item):
+                    return
+        except BaseException as exc:
+            self._put(_ERROR, exc)
+        else:
+            self._put(_DONE, None)
+        finally:
+            if hasattr(self._iterable, 'close'):
+                self._iterable.close()
+
+    def __iter__(self):
+        self._thread.start()
+        try:
+            while True:
+                kind, item = self._queue.get()
+                if kind == _DONE:
+                    return
+                if kind == _ERROR:
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop the thread and wait for it to finish"""
+        self._stop.set()
+        if self._thread.ident is not None:
+            self._thread.join()
+
+
+class QueueReader(io.RawIOBase):
+    """Readable binary stream of the blocks provided by an iterator
+
+    Parameters
+    ----------
+    blocks : iterator
+        The consecutive blocks of bytes of the data, e.g. a :class:`Stage`.
+
+    Attributes
+    ----------
+    position : int
+        Number of bytes read from the stream.
+    """
+
+    def __init__(self, blocks):
+        self._blocks = iter(blocks)
+        self._block = memoryview(b'')
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not len(self._block):
+            block = next(self._blocks, None)
+            if block is None:
+                return 0
+            self._block = memoryview(block)
+        size = min(len(buffer), len(self._block))
+        buffer[:size] = self._block[:size]
+        self._block = self._block[size:]
+        self.position += size
+        return size
+
+    def close(self):
+        if hasattr(self._blocks, 'close'):
+            self._blocks.close()
+        super(QueueReader, self).close()
+
+
+def read_blocks(filename, block_size=2 ** 20):
+    """Read a file as consecutive blocks of bytes
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the file to read.
+    block_size : int
+        Number of bytes of a block.
+
+    Yields
+    ------
+    bytes
+    """
+    with open(filename, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            yield block
+
+
+def iter_chunks(rows, chunk_size):
+    """Group the rows in lists of at most ``chunk_size`` rows"""
+    rows = iter(rows)
+    try:
+        for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+            yield chunk
+    finally:
+        if hasattr(rows, 'close'):
+            rows.close()
+
+
+def threaded_rows(rows, chunk_size=1024, queue_size=8):
+    """Provide rows read by a separate thread
+
+    Parameters
+    ----------
+    rows : iterable
+        The rows, e.g. :meth:`~pywhip.pywhip.Whip.generate_dwca`.
+    chunk_size : int
+        Number of rows passed between the threads at once.
+    queue_size : int
+        Maximum number of chunks waiting to be validated.
+
+    Yields
+    ------
+    document : dict
+        The `field : value` combinations of a row.
+    """
+    for chunk in Stage(iter_chunks(rows, chunk_size), queue_size,
+                       'pywhip-parser'):
+        for row in chunk:
+            yield row
+
+
+class CSVPipeline(object):
+    """Rows of a CSV file, read and parsed by separate threads
+
+    Provides the rows as :meth:`~pywhip.pywhip.Whip.generate_csv`, i.e. as
+    :class:`CSV <python3:csv.DictReader>` rows of the file opened in text
+    mode, but the raw blocks of the file are read by a reader thread and
+    parsed by a parser thread.
+
+    Parameters
+    ----------
+    csv_file : str
+        Filename of the CSV file.
+    delimiter : str
+        A one-character string used to separate fields, e.g. ``','``.
+    chunk_size : int
+        Number of rows passed to the validation at once.
+    block_size : int
+        Number of bytes read from the file at once.
+    queue_size : int
+        Maximum number of blocks or chunks waiting in each queue.
+
+    Attributes
+    ----------
+    position : int
+        Number of bytes of the file parsed so far.
+    """
+
+    def __init__(self, csv_file, delimiter, chunk_size=1024,
+                 block_size=2 ** 20, queue_size=8):
+        self.csv_file = csv_file
+        self.delimiter = delimiter
+        self.chunk_size = chunk_size
+        self.block_size = block_size
+        self.queue_size = queue_size
+        self._raw = None
+
+    @property
+    def position(self):
+        return self._raw.position if self._raw is not None else 0
+
+    def _rows(self):
+        """Rows parsed from the blocks of the reader thread"""
+        blocks = Stage(read_blocks(self.csv_file, self.block_size),
+                       self.queue_size, 'pywhip-reader')
+        self._raw = QueueReader(iter(blocks))
+        with io.TextIOWrapper(io.BufferedReader(self._raw)) as dwc:
+            reader = csv.DictReader(dwc, delimiter=self.delimiter)
+            for document in reader:
+                yield document
+
+    def __iter__(self):
+        return threaded_rows(self._rows(), self.chunk_size, self.queue_size)
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+import tracemalloc
+from time import perf_counter
+from functools import wraps
+from contextlib import contextmanager
+from collections import defaultdict, OrderedDict
+
+
+def _reset_peak():
+    """Reset the peak of the traced memory, if supported (Python >= 3.9)"""
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+
+class Profile(object):
+    """Timing instrumentation of a whip validation
+
+    Collects the cumulative time and number of calls for each field-rule
+    combination (named as in the report, including the ``_if_N`` and
+    ``_delimitedvalue`` rules) and for the stages of the validation
+    (reading the data, validation, logging of the errors and building the
+    report).
+
+    Attributes
+    ----------
+    rules : defaultdict
+        `(field, rule)` keys with a `[calls, seconds]` list as value.
+    stages : defaultdict
+        Stage names with a `[calls, seconds]` list as value.
+
+    Notes
+    -----
+    The time of the ``if`` and ``delimitedvalues`` rules includes the time of
+    the rules inside these scopes, which are reported separately as well.
+    """
+
+    def __init__(self):
+        self.rules = defaultdict(lambda: [0, 0.])
+        self.stages = defaultdict(lambda: [0, 0.])
+
+    @staticmethod
+    def _rule_key(validator, rule, field):
+        """Field-rule combination as used in the report"""
+        if not validator.document_path:
+            return field, rule
+        root_field = validator.document_path[0]
+        if 'delimitedvalues' in validator.schema_path:
+            return root_field, '{}_delimitedvalue'.format(rule)
+        scope = str(validator.document_path[-1])
+        number = int(scope.split('_')[-1]) + 1 if '_' in scope else 1
+        return root_field, '{}_if_{}'.format(rule, number)
+
+    def _timed_rule(self, method, rule):
+        """Wrap a ``_validate_<rule>`` method to record its timing"""
+        profile = self
+        active = set()
+
+        @wraps(method)
+        def timed_rule(validator, constraint, field, value):
+            # rules not in the specification (e.g. nullable) and recursive
+            # calls (e.g. date ranges) are not timed separately
+            if rule not in validator.schema.get(field, ()):
+                return method(validator, constraint, field, value)
+            key = profile._rule_key(validator, rule, field)
+            if key in active:
+                return method(validator, constraint, field, value)
+
+            active.add(key)
+            start = perf_counter()
+            try:
+                return method(validator, constraint, field, value)
+            finally:
+                timing = profile.rules[key]
+                timing[0] += 1
+                timing[1] += perf_counter() - start
+                active.discard(key)
+        return timed_rule
+
+    def validator(self, validator_class):
+        """Validator class recording the timing of each rule
+
+        Parameters
+        ----------
+        validator_class : type
+            A :class:`~pywhip.validators.DwcaValidator` (sub)class.
+
+        Returns
+        -------
+        type
+            Subclass of the validator class with timed validation rules, as
+            child validators use the same class, the rules inside ``if`` and
+            ``delimitedvalues`` scopes are timed as well.
+        """
+        methods = {}
+        for name in dir(validator_class):
+            if (name.startswith('_validate_') and
+                    not name.startswith('_validate_type_')):
+                methods[name] = self._timed_rule(
+                    getattr(validator_class, name), name[len('_validate_'):])
+        return type('Profiled' + validator_class.__name__,
+                    (validator_class,), methods)
+
+    @contextmanager
+    def stage(self, name):
+        """Record the time spent inside the context as stage ``name``"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            timing = self.stages[name]
+            timing[0] += 1
+            timing[1] += perf_counter() - start
+
+    def timed(self, name, function):
+        """Wrap a function to record its timing as stage ``name``"""
+        stages = self.stages
+
+        @wraps(function)
+        def timed_function(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timing = stages[name]
+                timing[0] += 1
+                timing[1] += perf_counter() - start
+        return timed_function
+
+    def timed_iterator(self, name, iterator):
+        """Iterate while recording the time to get each item as stage
+        ``name``"""
+        timing = self.stages[name]
+        iterator = iter(iterator)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                timing[0] += 1
+                timing[1] += perf_counter() - start
+            yield item
+
+    def build_profile_report(self):
+        """Convert the timings for json reporting
+
+        Returns
+        -------
+        dict
+            Dictionary with the `stages` timings and the `specified_fields`
+            timings per field and rule, each timing having the number of
+            `calls` and the cumulative `seconds`.
+        """
+        fields = {}
+        for (field, rule), (calls, seconds) in self.rules.items():
+            fields.setdefault(field, {})[rule] = {'calls': calls,
+                                                  'seconds': seconds}
+        return {'stages': {name: {'calls': calls, 'seconds': seconds}
+                           for name, (calls, seconds) in self.stages.items()},
+                'specified_fields': fields}
+
+
+class MemoryProfile(object):
+    """Memory instrumentation of a whip validation
+
+    Uses :mod:`tracemalloc` to record, for each stage of the validation
+    (header inspection, validation loop, building the report and html
+    rendering), the peak memory allocated during the stage and the memory
+    retained after the stage, both relative to the memory allocated at the
+    start of the stage. For stages run more than once (e.g. an interim
+    report), the memory retained by the previous runs is added.
+
+    Tracing the memory allocations slows down the validation considerably,
+    use it to diagnose the memory usage of a specific dataset.
+
+    Before Python 3.9, the peak of the traced memory can not be reset and the
+    peak of a stage is the highest traced memory since the start of the
+    tracing, an upper bound of the actual peak.
+
+    Attributes
+    ----------
+    stages : OrderedDict
+        Stage names with a `[peak, retained]` list (in bytes) as value.
+    rows : int
+        Number of rows validated, used to express the memory usage per
+        million rows.
+    """
+
+    def __init__(self):
+        self.stages = OrderedDict()
+        self.rows = 0
+        self._active = []
+
+    @contextmanager
+    def stage(self, name):
+        """Record the memory allocated inside the context as stage ``name``"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._active:
+            # keep the peak of the enclosing stage before resetting it
+            self._active[-1][1] = max(self._active[-1][1], peak)
+        _reset_peak()
+        self._active.append([current, current])
+        try:
+            yield
+        finally:
+            start, peak = self._active.pop()
+            current, traced_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, traced_peak)
+            if self._active:
+                self._active[-1][1] = max(self._active[-1][1], peak)
+            _reset_peak()
+            memory = self.stages.setdefault(name, [0, 0])
+            memory[0] = max(memory[0], memory[1] + peak - start)
+            memory[1] += current - start
+
+    def stop(self):
+        """Stop tracing the memory allocations"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def build_memory_report(self):
+        """Convert the memory usage per stage to plain data types
+
+        Returns
+        -------
+        dict
+            Dictionary with the `peak` and `retained` memory (in bytes) of
+            each stage and the peak memory per million rows validated
+            (`peak_per_million_rows`).
+        """
+        report = OrderedDict()
+        for name, (peak, retained) in self.stages.items():
+            report[name] = {'peak': peak, 'retained': retained,
+                            'peak_per_million_rows': (
+                                1e6 * peak / self.rows if self.rows
+                                else None)}
+        return report
+
+    def summary(self):
+        """Human readable table of the memory usage per stage
+
+        Returns
+        -------
+        str
+        """
+        from .progress import _format_size
+        lines = ['{:<12}{:>12}{:>12}{:>20}'.format(
+            'stage', 'peak', 'retained', 'peak/million rows')]
+        for name, memory in self.build_memory_report().items():
+            per_million = memory['peak_per_million_rows']
+            lines.append('{:<12}{:>12}{:>12}{:>20}'.format(
+                name, _format_size(memory['peak']),
+                _format_size(memory['retained']),
+                '-' if per_million is None else _format_size(per_million)))
+        return '\n'.join(lines)
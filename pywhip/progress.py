@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+from datetime import timedelta
+
+from .writers import write_json, write_ndjson
+
+
+def peak_rss():
+    """Peak resident set size (memory) of the current process
+
+    Returns
+    -------
+    int | None
+        Peak resident set size in bytes, None when not available on the
+        current platform.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _format_size(size):
+    """Human readable representation of a number of bytes"""
+    for unit in ['B', 'kB', 'MB', 'GB']:
+        if size < 1024:
+            break
+        size /= 1024.
+    return '{:.1f} {}'.format(size, unit)
+
+
+class Progress(object):
+    """Progress reporting during validation
+
+    The progress hook reports the number of rows validated, the throughput
+    (rows/s), the current peak memory usage and, when the position in the
+    data file is known, the percentage done and the estimated time to finish.
+
+    Attributes
+    ----------
+    every : int
+        Number of rows between two calls of the hook by the validation.
+    seconds : float
+        Minimal number of seconds between two progress messages.
+    echo : callable
+        Function to output the progress message with.
+    """
+
+    def __init__(self, every=1000, seconds=2., echo=print):
+        self.every = every
+        self.seconds = seconds
+        self.echo = echo
+
+        self._position = None
+        self._size = None
+        self._start_position = 0
+        self._start_row = 0
+        self._last_row = None
+        self._start_time = time.time()
+        self._last_time = self._start_time
+
+    def follow(self, position, size):
+        """Follow the position of the reader in the data file
+
+        Parameters
+        ----------
+        position : callable
+            Function returning the number of bytes read.
+        size : int
+            Total size of the data file in bytes.
+        """
+        self._position = position
+        self._size = size
+
+    def begin(self, whip_it, row_id):
+        self._start_row = row_id
+        self._start_position = self._position() if self._position else 0
+        self._start_time = self._last_time = time.time()
+
+    def status(self, row_id):
+        """Progress message of the validation
+
+        Parameters
+        ----------
+        row_id : int
+            Row identifier of the last validated row.
+
+        Returns
+        -------
+        str
+        """
+        elapsed = max(time.time() - self._start_time, 1e-9)
+        message = ['{:,} rows'.format(row_id),
+                   '{:,.0f} rows/s'.format((row_id - self._start_row) /
+                                           elapsed)]
+        if self._position and self._size:
+            position = self._position()
+            done = position - self._start_position
+            message.insert(1, '{:.1f}% ({} / {})'.format(
+                100. * position / self._size, _format_size(position),
+                _format_size(self._size)))
+            if done > 0:
+                remaining = elapsed * (self._size - position) / done
+                message.append('ETA {}'.format(
+                    timedelta(seconds=round(remaining))))
+        memory = peak_rss()
+        if memory is not None:
+            message.append('peak RSS {}'.format(_format_size(memory)))
+        return ' | '.join(message)
+
+    def end(self, whip_it, row_id):
+        if row_id != self._last_row:
+            self.echo(self.status(row_id))
+
+    def __call__(self, whip_it, row_id):
+        now = time.time()
+        if now - self._last_time >= self.seconds:
+            self._last_time = now
+            self._last_row = row_id
+            self.echo(self.status(row_id))
+
+
+class InterimReport(object):
+    """Periodically write the report of the rows validated so far
+
+    Attributes
+    ----------
+    filename : str
+        Output file to write the report to, either with a json, ndjson or
+        html file extension.
+    every : int
+        Number of rows between two interim reports.
+    """
+
+    def __init__(self, filename, every=100000):
+        if not filename.endswith(('.json', '.ndjson', '.html')):
+            raise ValueError("Not a valid output file extension for whip "
+                             "reporting, use json, ndjson or html")
+        self.filename = filename
+        self.every = every
+        self._next_row = every
+
+    def begin(self, whip_it, row_id):
+        self._next_row = row_id + self.every
+
+    def write(self, whip_it):
+        """Write the report of the current validation state"""
+        whip_it._finalize_report()
+        with open(self.filename, 'w') as report:
+            if self.filename.endswith('.html'):
+                report.write(whip_it.get_report('html'))
+            elif self.filename.endswith('.ndjson'):
+                write_ndjson(whip_it.get_report('json'), report)
+            else:
+                write_json(whip_it.get_report('json'), report)
+
+    def __call__(self, whip_it, row_id):
+        if row_id >= self._next_row:
+            self._next_row = row_id + self.every
+            self.write(whip_it)
@@ -2,23 +2,30 @@
 
 import os
 import csv
+import copy
+import json
 from datetime import datetime
+from itertools import islice, chain
+from contextlib import nullcontext
 try:
     from collections.abc import Mapping, Sequence
 except:
     from collections import Mapping, Sequence
     
-from pkg_resources import resource_filename
-
-from dwca.read import DwCAReader
-from cerberus import SchemaError
-from jinja2 import FileSystemLoader, Environment
-
-from .validators import DwcaValidator, WhipErrorHandler
-from .reporters import SpecificationErrorHandler
-
-
-def whip_dwca(dwca_zip, specifications, maxentries=None):
+# dwca-reader (pandas), cerberus and jinja2 are imported where used, keeping
+# `import pywhip` and the command line interface startup fast
+from .reporters import SpecificationErrorHandler, MessageCodes
+from .templates import get_template
+from .readers import CSVReader
+from .profiling import Profile, MemoryProfile
+from .batches import BatchValidator, RecordChecker, iter_batches
+from .state import (RowManifest, Checkpoint, specification_hash,
+                    save_state, load_state, compress_row_ids, expand_row_ids)
+
+
+def whip_dwca(dwca_zip, specifications, maxentries=None, manifest=None,
+              checkpoint=None, resume=False, hooks=None, profile=False,
+              memory_profile=False, batch_size=None, pipeline=False):
     """Whip a Darwin Core Archive
 
     Validate the core file of a `Darwin Core Archive`_ zipped data set,
@@ -35,6 +42,34 @@ def whip_dwca(dwca_zip, specifications, maxentries=None):
     maxentries : int
         Define the limit of records to validate from the Archive, useful to
         have a quick set on the frst subset of data.
+    manifest : str
+        Filename of a sidecar manifest with the row hashes and errors of a
+        previous run. Only new or changed rows are validated and the manifest
+        is updated afterwards, see :class:`~pywhip.state.RowManifest`.
+    checkpoint : str | pywhip.state.Checkpoint
+        Filename of the checkpoint file (or a
+        :class:`~pywhip.state.Checkpoint` to define the checkpoint
+        frequency) to periodically store the validation state. The
+        checkpoint file is removed when the validation finishes.
+    resume : boolean
+        If True, continue the validation from the last stored checkpoint.
+    hooks : list
+        Additional callables called periodically during validation, e.g. a
+        :class:`~pywhip.progress.Progress` or
+        :class:`~pywhip.progress.InterimReport`, see
+        :meth:`~pywhip.pywhip.Whip._whip`.
+    profile : boolean
+        If True, add the timing of each field-rule combination and of the
+        validation stages to the report, see :class:`~pywhip.pywhip.Whip`.
+    memory_profile : boolean
+        If True, trace the memory usage of each validation stage, see
+        :class:`~pywhip.pywhip.Whip`.
+    batch_size : int
+        If provided, validate the rows in batches of ``batch_size`` rows, see
+        :class:`~pywhip.pywhip.Whip`.
+    pipeline : boolean
+        If True, read the rows of the archive in a separate thread, see
+        :func:`~pywhip.pipeline.threaded_rows`.
 
     Returns
     -------
@@ -42,19 +77,49 @@ def whip_dwca(dwca_zip, specifications, maxentries=None):
         Whip validator clasc instance, containing the errors and reporting
         capabilities.
     """
+    from dwca.read import DwCAReader
+
+    checkpoint = _prepare_checkpoint(checkpoint, manifest, resume)
+    whip_it = Whip(specifications, profile=profile,
+                   memory_profile=memory_profile, batch_size=batch_size)
+
     # Extract data header - only core support
-    with DwCAReader(dwca_zip) as dwca:
+    with whip_it._memory_stage('header'), DwCAReader(dwca_zip) as dwca:
         field_names = [field['term'].split('/')[-1] for field in
                        dwca.core_file.file_descriptor.fields]
 
     # Apply whip
-    whip_it = Whip(specifications)
-    whip_it._whip(whip_it.generate_dwca(dwca_zip),
-                  field_names, maxentries)
+    documents = whip_it.generate_dwca(dwca_zip)
+    if pipeline:
+        from .pipeline import threaded_rows
+        documents = threaded_rows(documents)
+    state = None
+    hooks = list(hooks or [])
+    if checkpoint:
+        if resume:
+            state = checkpoint.load(whip_it, field_names)
+        if state is not None:
+            documents = islice(documents, state['position']['rows'], None)
+            state = state['whip']
+        checkpoint.start(field_names,
+                         lambda: {'rows': whip_it._total_row_count},
+                         state['total_rows'] if state else 0)
+        hooks.append(checkpoint)
+    if manifest:
+        manifest = RowManifest(manifest)
+
+    whip_it._whip(documents, field_names, maxentries, manifest, state, hooks)
+    if manifest:
+        manifest.save()
+    if checkpoint:
+        checkpoint.remove()
     return whip_it
 
 
-def whip_csv(csv_file, specifications, delimiter, maxentries=None):
+def whip_csv(csv_file, specifications, delimiter, maxentries=None,
+             manifest=None, tail=None, checkpoint=None, resume=False,
+             hooks=None, profile=False, memory_profile=False,
+             batch_size=None, pipeline=False, workers=None):
     """Whip a CSV-like file
 
     Validate a CSV file, using the :class:`CSV <python3:csv.DictReader>`
@@ -71,6 +136,47 @@ def whip_csv(csv_file, specifications, delimiter, maxentries=None):
     maxentries : int
         Define the limit of records to validate from the Archive, useful to
         have a quick set on the frst subset of data.
+    manifest : str
+        Filename of a sidecar manifest with the row hashes and errors of a
+        previous run. Only new or changed rows are validated and the manifest
+        is updated afterwards, see :class:`~pywhip.state.RowManifest`.
+    tail : str
+        Filename of a tail state file, for append-only data files. The state
+        file keeps the position in the data file and the collected errors at
+        the end of the run. When the state file exists, only the rows
+        appended since the previous run are validated and the report is
+        updated with these rows.
+    checkpoint : str | pywhip.state.Checkpoint
+        Filename of the checkpoint file (or a
+        :class:`~pywhip.state.Checkpoint` to define the checkpoint
+        frequency) to periodically store the validation state. The
+        checkpoint file is removed when the validation finishes.
+    resume : boolean
+        If True, continue the validation from the last stored checkpoint.
+    hooks : list
+        Additional callables called periodically during validation, e.g. a
+        :class:`~pywhip.progress.Progress` or
+        :class:`~pywhip.progress.InterimReport`, see
+        :meth:`~pywhip.pywhip.Whip._whip`.
+    profile : boolean
+        If True, add the timing of each field-rule combination and of the
+        validation stages to the report, see :class:`~pywhip.pywhip.Whip`.
+    memory_profile : boolean
+        If True, trace the memory usage of each validation stage, see
+        :class:`~pywhip.pywhip.Whip`.
+    batch_size : int
+        If provided, validate the rows in batches of ``batch_size`` rows, see
+        :class:`~pywhip.pywhip.Whip`.
+    pipeline : boolean
+        If True, read and parse the file in separate threads, overlapping
+        the reading of the file with the validation, see
+        :class:`~pywhip.pipeline.CSVPipeline`. Can not be combined with a
+        tail state file or checkpoint.
+    workers : int
+        If provided, validate the rows with this number of worker processes,
+        passing blocks of records by shared memory, see
+        :mod:`pywhip.parallel`. Can not be combined with a manifest, tail
+        state file, checkpoint, pipeline or profile.
 
     Returns
     -------
@@ -78,16 +184,355 @@ def whip_csv(csv_file, specifications, delimiter, maxentries=None):
         Whip validator class instance, containing the errors and reporting
         capabilities.
     """
+    if tail and (manifest or checkpoint):
+        raise ValueError("A tail state file can not be combined with a "
+                         "manifest or checkpoint")
+    if pipeline and (tail or checkpoint):
+        raise ValueError("A pipeline can not be combined with a tail state "
+                         "file or checkpoint")
+    if workers and (manifest or tail or checkpoint or pipeline or profile):
+        raise ValueError("Worker processes can not be combined with a "
+                         "manifest, tail state file, checkpoint, pipeline "
+                         "or profile")
+    if workers:
+        return _whip_csv_parallel(csv_file, specifications, delimiter,
+                                  maxentries, hooks, memory_profile,
+                                  batch_size, workers)
+    checkpoint = _prepare_checkpoint(checkpoint, manifest, resume)
+    if tail or checkpoint or (hooks and not pipeline):
+        return _whip_csv_stateful(csv_file, specifications, delimiter,
+                                  maxentries, manifest, tail, checkpoint,
+                                  resume, hooks, profile, memory_profile,
+                                  batch_size)
+    whip_it = Whip(specifications, profile=profile,
+                   memory_profile=memory_profile, batch_size=batch_size)
 
     # Extract data header
-    with open(csv_file, "r") as dwc:
+    with whip_it._memory_stage('header'), open(csv_file, "r") as dwc:
         reader = csv.DictReader(dwc, delimiter=delimiter)
         field_names = reader.fieldnames
 
     # Apply whip
-    whip_it = Whip(specifications)
-    whip_it._whip(whip_it.generate_csv(csv_file, delimiter),
-                  field_names, maxentries)
+    documents = whip_it.generate_csv(csv_file, delimiter)
+    if pipeline:
+        from .pipeline import CSVPipeline
+        documents = CSVPipeline(csv_file, delimiter)
+        for hook in hooks or []:
+            if hasattr(hook, 'follow'):
+                hook.follow(lambda: documents.position,
+                            os.path.getsize(csv_file))
+    if manifest:
+        manifest = RowManifest(manifest)
+    whip_it._whip(documents, field_names, maxentries, manifest, hooks=hooks)
+    if manifest:
+        manifest.save()
+    return whip_it
+
+
+def whip_dataframe(dataframe, specifications, maxentries=None,
+                   batch_size=65536, hooks=None, profile=False,
+                   memory_profile=False):
+    """Whip a pandas DataFrame
+
+    Validate the rows of a :class:`pandas.DataFrame` column-wise, without
+    converting the rows to dictionaries (see :mod:`pywhip.frames`). Missing
+    values (``NaN``, ``None``) are validated as empty strings and other
+    values are converted to strings. The row identifiers are the positions
+    of the rows in the DataFrame, starting at 1.
+
+    Parameters
+    ----------
+    dataframe : pandas.DataFrame
+        The data, with the field names as column names.
+    specifications : dict
+        Valid specifications whip dictionary schema.
+    maxentries : int
+        Define the limit of records to validate from the DataFrame.
+    batch_size : int
+        Number of rows validated at once (a positive integer), see
+        :class:`~pywhip.pywhip.Whip`.
+    hooks : list
+        Additional callables called periodically during validation, see
+        :meth:`~pywhip.pywhip.Whip._whip`.
+    profile : boolean
+        If True, add the timing of each field-rule combination and of the
+        validation stages to the report, see :class:`~pywhip.pywhip.Whip`.
+    memory_profile : boolean
+        If True, trace the memory usage of each validation stage, see
+        :class:`~pywhip.pywhip.Whip`.
+
+    Returns
+    -------
+    whip_it : pywhip.pywhip.Whip
+        Whip validator class instance, containing the errors and reporting
+        capabilities.
+    """
+    return whip_dataframe_chunks([dataframe], specifications, maxentries,
+                                 batch_size, hooks, profile, memory_profile)
+
+
+def whip_dataframe_chunks(chunks, specifications, maxentries=None,
+                          batch_size=65536, hooks=None, profile=False,
+                          memory_profile=False):
+    """Whip a data set provided as consecutive pandas DataFrames
+
+    See :func:`~pywhip.pywhip.whip_dataframe`, the chunks are validated one
+    after the other, e.g. to validate a large CSV file with
+    :func:`pandas.read_csv` without keeping all rows in memory::
+
+        chunks = pd.read_csv("occurrence.tsv", sep="\\t", dtype=str,
+                             keep_default_na=False, chunksize=100000)
+        whip_it = whip_dataframe_chunks(chunks, specifications)
+
+    Parameters
+    ----------
+    chunks : iterable
+        The DataFrames, all with the same columns.
+    specifications : dict
+        Valid specifications whip dictionary schema.
+    maxentries, batch_size, hooks, profile, memory_profile
+        See :func:`~pywhip.pywhip.whip_dataframe`.
+
+    Returns
+    -------
+    whip_it : pywhip.pywhip.Whip
+        Whip validator class instance, containing the errors and reporting
+        capabilities.
+    """
+    from .frames import iter_frame_batches
+
+    _check_batch_size(batch_size)
+    whip_it = Whip(specifications, profile=profile,
+                   memory_profile=memory_profile, batch_size=batch_size)
+
+    # Extract data header from the first chunk
+    chunks = iter(chunks)
+    with whip_it._memory_stage('header'):
+        first_chunk = next(chunks, None)
+    if first_chunk is None:
+        field_names, chunks = [], []
+    else:
+        field_names = [str(field) for field in first_chunk.columns]
+        chunks = chain([first_chunk], chunks)
+
+    whip_it._whip(iter_frame_batches(chunks, batch_size, maxentries),
+                  field_names, hooks=hooks, batches=True)
+    return whip_it
+
+
+def whip_arrow(data, specifications, maxentries=None, batch_size=65536,
+               hooks=None, profile=False, memory_profile=False):
+    """Whip Arrow data
+
+    Validate the rows of a :class:`pyarrow.Table` or a stream of
+    :class:`pyarrow.RecordBatch` objects column-wise (see
+    :mod:`pywhip.arrow`). Dictionary-encoded columns are validated with their
+    dictionary, missing values are validated as empty strings and other
+    values are converted to strings. The row identifiers are the positions
+    of the rows in the data, starting at 1.
+
+    Parameters
+    ----------
+    data : pyarrow.Table | pyarrow.RecordBatch | pyarrow.RecordBatchReader
+        The data, with the field names as column names. An iterable of
+        record batches with the same schema is accepted as well.
+    specifications : dict
+        Valid specifications whip dictionary schema.
+    maxentries : int
+        Define the limit of records to validate from the data.
+    batch_size : int
+        Number of rows validated at once (a positive integer), see
+        :class:`~pywhip.pywhip.Whip`.
+    hooks : list
+        Additional callables called periodically during validation, see
+        :meth:`~pywhip.pywhip.Whip._whip`.
+    profile : boolean
+        If True, add the timing of each field-rule combination and of the
+        validation stages to the report, see :class:`~pywhip.pywhip.Whip`.
+    memory_profile : boolean
+        If True, trace the memory usage of each validation stage, see
+        :class:`~pywhip.pywhip.Whip`.
+
+    Returns
+    -------
+    whip_it : pywhip.pywhip.Whip
+        Whip validator class instance, containing the errors and reporting
+        capabilities.
+    """
+    import pyarrow as pa
+    from .arrow import iter_arrow_batches
+
+    _check_batch_size(batch_size)
+    whip_it = Whip(specifications, profile=profile,
+                   memory_profile=memory_profile, batch_size=batch_size)
+
+    # Extract data header from the schema or the first record batch
+    with whip_it._memory_stage('header'):
+        if isinstance(data, pa.RecordBatch):
+            data = [data]
+        elif isinstance(data, pa.Table):
+            data = data.to_batches(max_chunksize=batch_size)
+        if isinstance(data, pa.RecordBatchReader):
+            field_names = list(data.schema.names)
+        else:
+            data = iter(data)
+            first_batch = next(data, None)
+            if first_batch is None:
+                field_names, data = [], []
+            else:
+                field_names = list(first_batch.schema.names)
+                data = chain([first_batch], data)
+
+    whip_it._whip(iter_arrow_batches(data, batch_size, maxentries),
+                  field_names, hooks=hooks, batches=True)
+    return whip_it
+
+
+def whip_parquet(parquet_file, specifications, maxentries=None,
+                 batch_size=65536, hooks=None, profile=False,
+                 memory_profile=False):
+    """Whip a Parquet file
+
+    The file is read row group by row group, limited to the columns required
+    by the specifications, i.e. the specified fields and the fields of their
+    ``if`` conditions (all columns when a field depends on the entire row).
+    String columns are read dictionary-encoded, see
+    :func:`~pywhip.pywhip.whip_arrow`.
+
+    Parameters
+    ----------
+    parquet_file : str | pyarrow.parquet.ParquetFile
+        Filename of the Parquet file, or an opened Parquet file.
+    specifications : dict
+        Valid specifications whip dictionary schema.
+    maxentries, batch_size, hooks, profile, memory_profile
+        See :func:`~pywhip.pywhip.whip_arrow`.
+
+    Returns
+    -------
+    whip_it : pywhip.pywhip.Whip
+        Whip validator class instance, containing the errors and reporting
+        capabilities.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from .arrow import iter_arrow_batches, required_columns
+
+    _check_batch_size(batch_size)
+    whip_it = Whip(specifications, profile=profile,
+                   memory_profile=memory_profile, batch_size=batch_size)
+
+    with whip_it._memory_stage('header'):
+        if not isinstance(parquet_file, pq.ParquetFile):
+            schema = pq.read_schema(parquet_file)
+            text_columns = [field.name for field in schema if
+                            pa.types.is_string(field.type) or
+                            pa.types.is_large_string(field.type)]
+            parquet_file = pq.ParquetFile(parquet_file,
+                                          read_dictionary=text_columns)
+        field_names = list(parquet_file.schema_arrow.names)
+        columns = required_columns(whip_it.schema, field_names)
+
+    record_batches = parquet_file.iter_batches(batch_size=batch_size,
+                                               columns=columns)
+    whip_it._whip(iter_arrow_batches(record_batches, batch_size, maxentries),
+                  field_names, hooks=hooks, batches=True)
+    return whip_it
+
+
+def _whip_csv_parallel(csv_file, specifications, delimiter, maxentries,
+                       hooks, memory_profile, batch_size, workers):
+    """Whip a CSV-like file with worker processes
+
+    See :func:`~pywhip.pywhip.whip_csv` and
+    :meth:`~pywhip.parallel.WhipPool.whip_csv`, the error containers of the
+    workers are merged in the order of the data.
+    """
+    from .parallel import WhipPool
+
+    with WhipPool(specifications, workers, batch_size=batch_size) as pool:
+        return pool.whip_csv(csv_file, delimiter, maxentries, hooks,
+                             memory_profile)
+
+
+def _check_batch_size(batch_size):
+    """Check the batch size of the column-wise ``whip_`` functions"""
+    if batch_size is None or batch_size < 1:
+        raise ValueError("The batch size needs to be a positive integer, "
+                         "got {!r}".format(batch_size))
+
+
+def _prepare_checkpoint(checkpoint, manifest, resume):
+    """Check and convert the checkpoint arguments of the ``whip_`` functions
+
+    Returns
+    -------
+    pywhip.state.Checkpoint | None
+    """
+    if resume and not checkpoint:
+        raise ValueError("Provide the checkpoint file to resume from")
+    if checkpoint and manifest:
+        raise ValueError("A checkpoint can not be combined with a manifest")
+    if checkpoint and not isinstance(checkpoint, Checkpoint):
+        checkpoint = Checkpoint(checkpoint)
+    return checkpoint
+
+
+def _csv_position(reader):
+    """Position of a :class:`~pywhip.readers.CSVReader` to store in a state"""
+    return {'offset': reader.offset, 'tail': reader.tail().hex()}
+
+
+def _whip_csv_stateful(csv_file, specifications, delimiter, maxentries,
+                       manifest, tail, checkpoint, resume, hooks, profile,
+                       memory_profile, batch_size=None):
+    """Whip a CSV-like file, keeping track of the position in the file
+
+    See :func:`~pywhip.pywhip.whip_csv`, the ``tail`` state file is used to
+    continue from the position and collected errors of the previous run,
+    the ``checkpoint`` to periodically store the validation state of the
+    current run. Hooks with a ``follow(position, size)`` method can follow
+    the number of bytes read.
+    """
+    whip_it = Whip(specifications, profile=profile,
+                   memory_profile=memory_profile, batch_size=batch_size)
+    reader = CSVReader(csv_file, delimiter, complete_lines=bool(tail))
+    with whip_it._memory_stage('header'):
+        field_names = reader.read_header()
+
+    state = None
+    if tail:
+        state = load_state(tail, whip_it, field_names)
+    elif resume:
+        state = checkpoint.load(whip_it, field_names)
+    if state is not None:
+        position = state['position']
+        reader.offset = position['offset']
+        # the data file is replaced or truncated, start all over again
+        if (position['offset'] > reader.size or
+                reader.tail() != bytes.fromhex(position['tail'])):
+            reader.read_header()
+            state = None
+    state = state['whip'] if state else None
+
+    hooks = list(hooks or [])
+    for hook in hooks:
+        if hasattr(hook, 'follow'):
+            hook.follow(lambda: reader.offset, reader.size)
+    if checkpoint:
+        checkpoint.start(field_names, lambda: _csv_position(reader),
+                         state['total_rows'] if state else 0)
+        hooks.append(checkpoint)
+    if manifest:
+        manifest = RowManifest(manifest)
+
+    whip_it._whip(reader, field_names, maxentries, manifest, state, hooks)
+    if manifest:
+        manifest.save()
+    if tail:
+        save_state(tail, whip_it, field_names, _csv_position(reader))
+    if checkpoint:
+        checkpoint.remove()
     return whip_it
 
 
@@ -108,13 +553,24 @@ class Whip(object):
     validation : pywhip.validators.DwcaValidator
         A :class:`~pywhip.validators.DwcaValidator` class instance.
     _report : dict
-        Base report container to collect document errors. Errors are
-        collected in the ['results']['specified_fields'] values, having
-        a :class:`~pywhip.reporters.SpecificationErrorHandler` for each
+        Base report container to collect document errors, filled in at the
+        end of the validation.
+    _specified_fields : dict
+        Error containers, having a
+        :class:`~pywhip.reporters.SpecificationErrorHandler` for each
         field-specification combination.
+    _messages : pywhip.reporters.MessageCodes
+        Integer codes of the error messages, shared by the error containers.
+    _passed_row_ids : list
+        Row identifiers of the rows without errors.
+    _passed_ranges : list
+        Row identifiers of the rows without errors loaded from a stored
+        state, preceding the ``_passed_row_ids``, compressed by
+        :func:`~pywhip.state.compress_row_ids`.
     """
 
-    def __init__(self, schema, sample_size=10):
+    def __init__(self, schema, sample_size=10, profile=False,
+                 memory_profile=False, batch_size=None):
         """
 
         Parameters
@@ -125,33 +581,98 @@ class Whip(object):
         sample_size : int
             For each of the field-rules combinations, the (top) number of data
             value samples/examples to include in the report.
+        profile : boolean
+            If True, record the timing of each field-rule combination and of
+            the validation stages, reported in the `profile` section of the
+            report (see :class:`~pywhip.profiling.Profile`).
+        memory_profile : boolean
+            If True, trace the peak and retained memory of the header
+            inspection, validation, report and html stages (see
+            :class:`~pywhip.profiling.MemoryProfile`).
+        batch_size : int
+            If provided, validate the rows in batches of ``batch_size`` rows,
+            validating the fields with context free specifications once for
+            each distinct value of a batch (see
+            :class:`~pywhip.batches.BatchValidator`). Rows are validated one
+            by one when a manifest is used.
         """
+        from cerberus import SchemaError
+        from .validators import DwcaValidator, WhipErrorHandler
 
         if not isinstance(schema, dict):
             raise SchemaError("Input schema need to be dictionary")
         self._schema = schema
+        self._schema_hash = specification_hash(schema)
         self._sample_size = sample_size
+        self._profile = Profile() if profile else None
+        self._memory_profile = MemoryProfile() if memory_profile else None
+        self._batch_size = batch_size
+        self._batch_validator = None
+        self._record_checker = None
 
         # setup a DwcaValidator instance
-        self.validation = DwcaValidator(self.schema,
-                                        error_handler=WhipErrorHandler)
-
-        self._report = {'executed_at': None,
-                        'errors': [],
-                        'results': {
-                            'total_rows': 0,
-                            'passed_rows': 0,
-                            'failed_rows': 0,
-                            'passed_row_ids': [],
-                            'warnings': [],
-                            'unspecified_fields': None,
-                            'unknown_fields': None,
-                            'specified_fields': {}
-                            }
-                        }
-
+        validator = DwcaValidator
+        if self._profile is not None:
+            validator = self._profile.validator(DwcaValidator)
+        self.validation = validator(self.schema,
+                                    error_handler=WhipErrorHandler)
+        # errors are recorded as tuples, no Cerberus ValidationErrors
+        self._error_records = []
+        self.validation.record_errors(self._error_records)
+
+        self._report = self._empty_report()
+
+        self._specified_fields = {}
+        self._messages = MessageCodes()
+        self._passed_row_ids = []
+        self._passed_ranges = []
         self._total_row_count = 0
 
+    @staticmethod
+    def _empty_report():
+        """Base report container, without validated rows"""
+        return {'executed_at': None,
+                'errors': [],
+                'results': {
+                    'total_rows': 0,
+                    'passed_rows': 0,
+                    'failed_rows': 0,
+                    'passed_row_ids': [],
+                    'warnings': [],
+                    'unspecified_fields': None,
+                    'unknown_fields': None,
+                    'specified_fields': {}
+                    }
+                }
+
+    def _copy(self, memory_profile=False):
+        """New Whip instance with the same compiled specifications
+
+        The validators (including the batch validator) are shared with the
+        original instance, avoiding to validate the specifications again,
+        the error containers and report are new. The instances can be used
+        one after the other, not at the same time.
+
+        Parameters
+        ----------
+        memory_profile : boolean
+            If True, trace the memory usage of the validation stages of the
+            new instance.
+
+        Returns
+        -------
+        pywhip.pywhip.Whip
+        """
+        whip_it = copy.copy(self)
+        whip_it._memory_profile = MemoryProfile() if memory_profile else None
+        whip_it._report = self._empty_report()
+        whip_it._specified_fields = {}
+        whip_it._messages = MessageCodes()
+        whip_it._passed_row_ids = []
+        whip_it._passed_ranges = []
+        whip_it._total_row_count = 0
+        return whip_it
+
     @property
     def schema(self):
         return self._schema
@@ -160,6 +681,35 @@ class Whip(object):
     def sample_size(self):
         return self._sample_size
 
+    def check(self, record):
+        """Validate a single record against the whip specifications
+
+        Intended for records validated one at a time, e.g. when submitted to
+        a service. The errors are returned instead of logged: the report, the
+        error containers and the counts of the instance are not changed and
+        nothing is printed. The errors of each field value are kept between
+        the calls (see :class:`~pywhip.batches.RecordChecker`), so values
+        validated before are not validated again.
+
+        Fields of the record without specifications are ignored, specified
+        fields missing in the record are validated as missing.
+
+        Parameters
+        ----------
+        record : dict
+            `field : value` combinations of a single record, e.g.
+            ``{'basisOfRecord': 'HumanObservation', 'sex': 'male'}``.
+
+        Returns
+        -------
+        list
+            List of `(field, rule, value, message)` tuples, empty when the
+            record complies with the specifications.
+        """
+        if self._record_checker is None:
+            self._record_checker = RecordChecker(self.validation, self.schema)
+        return self._record_checker.check(record)
+
     def get_report(self, format='json'):
         """Collect errors into reporting format (json/html)
 
@@ -232,6 +782,7 @@ class Whip(object):
         schema : dict
             Whip specification schema.
         """
+        messages = self._messages
         schema_layout = {}
         for field, rules in schema.items():
             schema_layout[field] = {}
@@ -246,18 +797,20 @@ class Whip(object):
                                 schema_layout[field][self.format_if_rule(
                                     subrule, j+1)] = \
                                     SpecificationErrorHandler(
-                                        self.clean_constraint(constraint))
+                                        self.clean_constraint(constraint),
+                                        messages)
                 elif rule == 'delimitedvalues':
-                    schema_layout[field][rule] = SpecificationErrorHandler("")
+                    schema_layout[field][rule] = SpecificationErrorHandler(
+                        "", messages)
                     for subrule, constraint in conditions.items():
                         if subrule != 'delimiter':
                             schema_layout[field][self.format_delimited_rule(
                                 subrule)] = SpecificationErrorHandler(
-                                self.clean_constraint(constraint))
+                                self.clean_constraint(constraint), messages)
                 else:
                     schema_layout[field][rule] = \
                         SpecificationErrorHandler(
-                            self.clean_constraint(conditions))
+                            self.clean_constraint(conditions), messages)
         return schema_layout
 
     def _conditional_fields(self, file_fields):
@@ -272,6 +825,8 @@ class Whip(object):
         file_fields : list | set
             List of the field names present in the input data file.
         """
+        from cerberus import SchemaError
+
         conditional_fields = []
         for _, specs in self.schema.items():
             if 'if' in specs.keys():
@@ -315,96 +870,334 @@ class Whip(object):
         self._report['results']['unknown_fields'] = list(set(
             self.schema.keys()).difference(file_fields))
 
-    def _whip(self, input_generator, field_names, maxentries=None):
-        """Validate whip specifications on the input
+    def _memory_stage(self, name):
+        """Context of a validation stage, traced when memory profiling"""
+        if self._memory_profile is None:
+            return nullcontext()
+        return self._memory_profile.stage(name)
 
-         For each entry of the input generator (which can be limited using the
-         ``maxentries`` parameter, the validation is recording the errors. At
-         the end, the :attr:`~pywhip.pywhip.Whip._report` attribute is updated
-         with the error logs and other relevant metadata.
+    def _prepare(self, field_names):
+        """Preliminar checks and setup of the error containers
 
         Parameters
         ----------
-        input_generator : iterator
-            An iterator, yielding `field : value` combinations of the document
-            on each iteration.
         field_names : list | set
             List of the field names present in the input data file.
-        maxentries : int
-            Define the limit of records to validate from the Archive, useful to
-            have a quick set on the frst subset of data.
         """
-
-        # preliminar checks
         self._compare_fields(field_names)
         self._conditional_fields(field_names)
 
+        self._prepare_batches()
+
         # prepare object to save errors
-        specified_fields = self._extract_schema_blueprint(self.schema)
-        passed_row_ids = []
+        self._specified_fields = self._extract_schema_blueprint(self.schema)
+        self._passed_row_ids = []
+        self._passed_ranges = []
+        self._total_row_count = 0
 
-        # validate each row and log the errors for each row
-        for j, row in enumerate(input_generator):
-            row_id = j + 1
-            self.validation.validate(row)  # apply specification rules
-
-            if len(self.validation.errors) > 0:
-                for error in self.validation._errors:
-                    field = error.field
-
-                    if error.is_group_error:  # if/delimitedvalues
-                        if error.rule == 'if':
-                            for child_error in error.child_errors:
-                                number = str(int(child_error.field.split(
-                                    '_')[-1]) + 1)
-                                rule = self.format_if_rule(
-                                    child_error.rule, number)
-
-                                message = self.validation.schema.validator.\
-                                    error_handler._format_message(field,
-                                                                  child_error)
-                                specified_fields[field][rule][(
-                                    child_error.value, message)].add(row_id)
-
-                        elif error.rule == 'delimitedvalues':
-                            for child_error in error.child_errors:
-                                rule = self.format_delimited_rule(child_error.rule)
-
-                                message = self.validation.schema.validator.\
-                                    error_handler._format_message(field,
-                                                                  child_error)
-                                specified_fields[field][rule][(
-                                    child_error.value, message)].add(row_id)
-
-                        else:
-                            NotImplementedError
-                    else:
-                        message = self.validation.schema.validator.\
-                            error_handler._format_message(field, error)
+    def _prepare_batches(self):
+        """Create the batch validator, when validating in batches"""
+        if self._batch_size and self._batch_validator is None:
+            self._batch_validator = BatchValidator(self.validation,
+                                                   self.schema)
 
-                        specified_fields[field][error.rule][(error.value,
-                                                             message)].add(row_id)
-            else:
-                passed_row_ids.append(row_id)
-            if maxentries:
-                if j >= maxentries-1:
-                    break
+    def _row_errors(self, row):
+        """Validate a single row against the whip specifications
 
-        # fill report TODO: exclude his from in-function adapts to attributes
-        self._total_row_count = j + 1
+        Parameters
+        ----------
+        row : dict
+            Single line document values (as dict values) and field names
+            (as dict keys).
+
+        Returns
+        -------
+        list
+            List of `(field, rule, value, message)` tuples, with the rule
+            named as in the report (e.g. ``allowed_if_1``).
+        """
+        records = self._error_records
+        del records[:]
+        self.validation.validate(row)  # apply specification rules
+
+        format_record = self.validation.error_handler.format_record
+        return [(record[0], record[1], record[4], format_record(record))
+                for record in records]
+
+    def _log_row(self, row_id, row_errors):
+        """Add the errors of a single row to the error containers
+
+        Parameters
+        ----------
+        row_id : int
+            Row identifier (position) of the row in the data, starting at 1.
+        row_errors : list
+            List of `(field, rule, value, message)` tuples, see
+            :meth:`~pywhip.pywhip.Whip._row_errors`.
+        """
+        if row_errors:
+            specified_fields = self._specified_fields
+            for field, rule, value, message in row_errors:
+                specified_fields[field][rule].add(value, message, row_id)
+        else:
+            self._passed_row_ids.append(row_id)
+        self._total_row_count = row_id
+
+    def _finalize_report(self):
+        """Fill the report with the content of the error containers"""
+        with self._memory_stage('report'):
+            if self._profile is None:
+                self._fill_report()
+            else:
+                with self._profile.stage('report'):
+                    self._fill_report()
+                self._report['profile'] = \
+                    self._profile.build_profile_report()
+
+    def _all_passed_row_ids(self):
+        """Row identifiers of the rows without errors, loaded ones included"""
+        if self._passed_ranges:
+            return expand_row_ids(self._passed_ranges) + self._passed_row_ids
+        return self._passed_row_ids
+
+    def _fill_report(self):
+        passed_row_ids = self._all_passed_row_ids()
         self._report['results']['total_rows'] = self._total_row_count
         self._report['results']['passed_row_ids'] = passed_row_ids
         self._report['results']['passed_rows'] = len(passed_row_ids)
-        self._report['results']['failed_rows'] = self._total_row_count - len(passed_row_ids)
+        self._report['results']['failed_rows'] = \
+            self._total_row_count - len(passed_row_ids)
         self._report['executed_at'] = datetime.now().strftime("%Y-%m-%d %H:%M")
         self._report['results']['specified_fields'] = \
-            self._report_specified_fields(specified_fields,
+            self._report_specified_fields(self._specified_fields,
                                           self._total_row_count,
                                           self.sample_size)
+
+    def _dump_state(self, summary=False):
+        """Export the error containers as plain data types
+
+        Parameters
+        ----------
+        summary : boolean
+            If True, export the errors as counts per value (see
+            :meth:`~pywhip.reporters.SpecificationErrorHandler.dump_summary`)
+            and the passed rows compressed, as stored to continue the
+            validation later on. The summary can only be loaded before
+            validating the following rows.
+
+        Returns
+        -------
+        dict
+        """
+        if summary:
+            return {'summary': True,
+                    'total_rows': self._total_row_count,
+                    'passed_row_ids': compress_row_ids(
+                        self._passed_row_ids, list(self._passed_ranges)),
+                    'specified_fields': {
+                        field: {rule: error_report.dump_summary() for
+                                rule, error_report in rules.items()}
+                        for field, rules in self._specified_fields.items()}}
+        return {'total_rows': self._total_row_count,
+                'passed_row_ids': list(self._all_passed_row_ids()),
+                'specified_fields': {
+                    field: {rule: error_report.dump_samples() for
+                            rule, error_report in rules.items()}
+                    for field, rules in self._specified_fields.items()}}
+
+    def _load_state(self, state):
+        """Merge error containers exported by
+        :meth:`~pywhip.pywhip.Whip._dump_state`
+
+        Parameters
+        ----------
+        state : dict
+            Exported error containers of a previous validation.
+        """
+        self._total_row_count = max(self._total_row_count,
+                                    state['total_rows'])
+        if state.get('summary'):
+            self._passed_ranges = self._passed_ranges + \
+                state['passed_row_ids']
+            for field, rules in state['specified_fields'].items():
+                for rule, summary in rules.items():
+                    self._specified_fields[field][rule].load_summary(summary)
+            return
+        self._passed_row_ids.extend(state['passed_row_ids'])
+        for field, rules in state['specified_fields'].items():
+            for rule, samples in rules.items():
+                self._specified_fields[field][rule].update_samples(samples)
+
+    def _whip(self, input_generator, field_names, maxentries=None,
+              manifest=None, state=None, hooks=None, batches=False,
+              states=False):
+        """Validate whip specifications on the input
+
+         For each entry of the input generator (which can be limited using the
+         ``maxentries`` parameter, the validation is recording the errors. At
+         the end, the :attr:`~pywhip.pywhip.Whip._report` attribute is updated
+         with the error logs and other relevant metadata.
+
+        Parameters
+        ----------
+        input_generator : iterator
+            An iterator, yielding `field : value` combinations of the document
+            on each iteration.
+        field_names : list | set
+            List of the field names present in the input data file.
+        maxentries : int
+            Define the limit of records to validate from the Archive, useful to
+            have a quick set on the frst subset of data.
+        manifest : pywhip.state.RowManifest
+            When provided, rows unchanged since the previous run reuse the
+            errors stored in the manifest instead of being validated.
+        state : dict
+            Error containers of a previous validation, see
+            :meth:`~pywhip.pywhip.Whip._dump_state`. The validation continues
+            from this state and the input generator provides the rows
+            following the ones already validated.
+        hooks : list
+            Callables called as ``hook(whip_it, row_id)`` during validation,
+            each hook defines the number of rows between two calls with an
+            ``every`` attribute, e.g. :class:`~pywhip.state.Checkpoint`.
+            Optional ``begin(whip_it, row_id)`` and ``end(whip_it, row_id)``
+            methods of a hook are called before and after the validation.
+        batches : boolean
+            If True, the input generator yields batches of rows, i.e. lists
+            of rows or :class:`~pywhip.frames.FrameBatch` instances, to
+            validate with the :class:`~pywhip.batches.BatchValidator`. The
+            ``maxentries`` and ``manifest`` are not supported for batches.
+        states : boolean
+            If True, the input generator yields the error containers of
+            consecutive parts of the data, validated by other processes (see
+            :meth:`~pywhip.pywhip.Whip._whip_part`), which are merged in
+            order. The ``maxentries`` and ``manifest`` are not supported.
+        """
+        with self._memory_stage('header'):
+            self._prepare(field_names)
+        if manifest is not None:
+            manifest.start(self._schema_hash, field_names)
+        if state is not None:
+            self._load_state(state)
+
+        row_id = self._total_row_count
+        if maxentries and not (batches or states):
+            input_generator = islice(input_generator,
+                                     max(maxentries - row_id, 0))
+        hooks = hooks or []
+        every = min([hook.every for hook in hooks]) if hooks else 0
+        for hook in hooks:
+            if hasattr(hook, 'begin'):
+                hook.begin(self, row_id)
+
+        validate_row, log_row = self._row_errors, self._log_row
+        if self._profile is not None:
+            input_generator = self._profile.timed_iterator('reading',
+                                                           input_generator)
+            validate_row = self._profile.timed('validation', validate_row)
+            log_row = self._profile.timed('logging', log_row)
+
+        # validate each row and log the errors for each row
+        with self._memory_stage('validation'):
+            if batches:
+                row_id = self._whip_batches(input_generator, row_id, hooks,
+                                            every)
+            elif states:
+                for part in input_generator:
+                    first_row_id = row_id
+                    self._load_state(part)
+                    row_id = self._total_row_count
+                    if every and row_id // every > first_row_id // every:
+                        for hook in hooks:
+                            hook(self, row_id)
+            elif self._batch_validator is not None and manifest is None:
+                row_id = self._whip_batches(
+                    iter_batches(input_generator, self._batch_size), row_id,
+                    hooks, every)
+            else:
+                for row in input_generator:
+                    row_id += 1
+                    if manifest is None:
+                        row_errors = validate_row(row)
+                    else:
+                        row_errors = manifest.row_errors(row, row_id,
+                                                         validate_row)
+                    log_row(row_id, row_errors)
+                    if every and not row_id % every:
+                        for hook in hooks:
+                            hook(self, row_id)
+        if self._memory_profile is not None:
+            self._memory_profile.rows = self._total_row_count
+
+        for hook in hooks:
+            if hasattr(hook, 'end'):
+                hook.end(self, row_id)
+        self._finalize_report()
         self._isitgreat()
 
         # TODO: add generator function and dict-searches to query errors
 
+    def _whip_batches(self, batches, row_id, hooks, every):
+        """Validate batches of rows and log the errors for each row
+
+        See :meth:`~pywhip.pywhip.Whip._whip`, the hooks are called after
+        the batch containing their row identifier.
+
+        Returns
+        -------
+        int
+            Row identifier of the last validated row.
+        """
+        validate_batch, log_row = self._batch_validator.validate, \
+            self._log_row
+        if self._profile is not None:
+            validate_batch = self._profile.timed('validation', validate_batch)
+            log_row = self._profile.timed('logging', log_row)
+
+        for batch in batches:
+            first_row_id = row_id
+            for row_errors in validate_batch(batch):
+                row_id += 1
+                log_row(row_id, row_errors)
+            if every and row_id // every > first_row_id // every:
+                for hook in hooks:
+                    hook(self, row_id)
+        return row_id
+
+    def _whip_part(self, rows, row_id):
+        """Validate a part of the data in new error containers
+
+        Used by the worker processes of :mod:`pywhip.parallel`, the
+        containers are returned to be merged by the main process with
+        :meth:`~pywhip.pywhip.Whip._load_state`.
+
+        Parameters
+        ----------
+        rows : iterator
+            An iterator, yielding `field : value` combinations of the
+            consecutive rows of the part.
+        row_id : int
+            Row identifier of the row preceding the part.
+
+        Returns
+        -------
+        dict
+            The error containers, see :meth:`~pywhip.pywhip.Whip._dump_state`.
+        """
+        self._prepare_batches()
+        self._specified_fields = self._extract_schema_blueprint(self.schema)
+        self._passed_row_ids = []
+        self._passed_ranges = []
+        self._total_row_count = row_id
+        if self._batch_validator is not None:
+            self._whip_batches(iter_batches(rows, self._batch_size), row_id,
+                               [], 0)
+        else:
+            for row in rows:
+                row_id += 1
+                self._log_row(row_id, self._row_errors(row))
+        return self._dump_state()
+
     def _isitgreat(self):
         """check if there are any errors recorded"""
         if self._report['results']['failed_rows'] == 0:
@@ -432,6 +1225,8 @@ class Whip(object):
             field names (as dict keys).
 
         """
+        from dwca.read import DwCAReader
+
         with DwCAReader(dwca_zip) as dwca:
             for row in dwca:
                 document = {k.split('/')[-1]: v for k, v in row.data.items()}
@@ -478,14 +1273,19 @@ class Whip(object):
         nsample : int
             Number of samples (ordered on the number of rows) to retain for
             reporting purposes
+
+        Returns
+        -------
+        dict
         """
 
+        report = {}
         for field, rules in specified_fields.items():
+            report[field] = {}
             for rule, error_report in rules.items():
-                specified_fields[field][rule] = \
-                    specified_fields[field][rule].build_error_report(nrows,
-                                                                     nsample)
-        return specified_fields
+                report[field][rule] = error_report.build_error_report(nrows,
+                                                                      nsample)
+        return report
 
     def create_html(self):
         """Build html using template
@@ -496,12 +1296,51 @@ class Whip(object):
 
         """
 
-        path = "./static/template.html"
-
-        html_template_path = resource_filename(__name__, path)
-        env = Environment(loader=FileSystemLoader(
-            os.path.dirname(html_template_path)))
-        template = env.get_template(os.path.basename(html_template_path))
-        html = template.render(report=self._report)
+        with self._memory_stage('html'):
+            template = get_template("template.html")
+            html = template.render(report=self._report)
 
         return str(html)
+
+    def create_html_shards(self, filename):
+        """Write the html report as an index page with per-field shards
+
+        The index page contains the summary of the report and of each field,
+        the details of the specifications of a field (constraints, passed
+        rows and samples) are written to a separate shard, loaded when the
+        field is expanded in the index page. The shards are written to the
+        ``<name>_fields`` directory next to the index page, as javascript
+        files to support viewing the report from the local file system.
+
+        Parameters
+        ----------
+        filename : str
+            Filename of the index page, e.g. ``report/index.html``.
+        """
+        directory, name = os.path.split(filename)
+        shard_directory = os.path.splitext(name)[0] + "_fields"
+        if not os.path.exists(os.path.join(directory, shard_directory)):
+            os.makedirs(os.path.join(directory, shard_directory))
+
+        with self._memory_stage('html'):
+            fields = {}
+            specified_fields = self._report['results']['specified_fields']
+            for shard_id, (field, rules) in enumerate(
+                    sorted(specified_fields.items())):
+                shard = "{}/{}.js".format(shard_directory, shard_id)
+                with open(os.path.join(directory, shard), "w") as shard_file:
+                    shard_file.write("whipShard({}, ".format(shard_id))
+                    json.dump(rules, shard_file, default=str)
+                    shard_file.write(");\n")
+                fields[field] = {
+                    'shard_id': shard_id,
+                    'shard': shard,
+                    'rules': len(rules),
+                    'failed_rules': sum(1 for info in rules.values()
+                                        if info['failed_rows'])}
+
+            template = get_template("sharded.html")
+            with open(filename, "w") as index_page:
+                for chunk in template.generate(report=self._report,
+                                               fields=fields):
+                    index_page.write(chunk)
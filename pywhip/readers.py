@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import os
+import csv
+import locale
+
+
+class CSVReader(object):
+    """CSV file reader keeping track of the position in the file
+
+    Works as the :class:`CSV <python3:csv.DictReader>` reader of the Python
+    standard library, but reads the file in binary mode to keep track of the
+    byte offset of the last row provided. Reading can start from a given
+    offset as well, which makes it possible to continue reading a file where
+    a previous run stopped.
+
+    Attributes
+    ----------
+    csv_file : str
+        Filename of the CSV file.
+    delimiter : str
+        A one-character string used to separate fields, e.g. ``','``.
+    offset : int
+        Byte offset in the file right after the last row provided (or the
+        header when no rows are read yet).
+    fieldnames : list
+        Field names of the data, as defined by the header.
+    complete_lines : boolean
+        If True, a last line without line ending is considered to be still
+        under construction (e.g. an append-only log file) and is not read.
+    """
+
+    def __init__(self, csv_file, delimiter, offset=None, fieldnames=None,
+                 complete_lines=False, encoding=None):
+        self.csv_file = csv_file
+        self.delimiter = delimiter
+        self.offset = offset or 0
+        self.fieldnames = fieldnames
+        self.complete_lines = complete_lines
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self._pending = 0
+
+    @property
+    def size(self):
+        """Current size of the file in bytes"""
+        return os.path.getsize(self.csv_file)
+
+    def _lines(self, handle):
+        """Decoded lines of the file, keeping track of the bytes read"""
+        for line in iter(handle.readline, b''):
+            if self.complete_lines and not line.endswith(b'\n'):
+                return
+            self._pending += len(line)
+            yield line.decode(self.encoding)
+
+    def _consume(self):
+        """Move the offset to the end of the lines read so far"""
+        self.offset += self._pending
+        self._pending = 0
+
+    def read_header(self):
+        """Read the field names from the header of the file
+
+        Returns
+        -------
+        list
+        """
+        self._pending = 0
+        with open(self.csv_file, 'rb') as handle:
+            reader = csv.reader(self._lines(handle), delimiter=self.delimiter)
+            self.fieldnames = next(reader, [])
+        self.offset = 0
+        self._consume()
+        return self.fieldnames
+
+    def tail(self, length=1024):
+        """The last bytes read, up to the current offset
+
+        Parameters
+        ----------
+        length : int
+            Maximum number of bytes to return.
+
+        Returns
+        -------
+        bytes
+        """
+        with open(self.csv_file, 'rb') as handle:
+            handle.seek(max(self.offset - length, 0))
+            return handle.read(min(self.offset, length))
+
+    def __iter__(self):
+        if self.fieldnames is None:
+            self.read_header()
+
+        with open(self.csv_file, 'rb') as handle:
+            handle.seek(self.offset)
+            self._pending = 0
+            reader = csv.DictReader(self._lines(handle),
+                                    fieldnames=self.fieldnames,
+                                    delimiter=self.delimiter)
+            for document in reader:
+                self._consume()
+                yield document
@@ -1,16 +1,85 @@
 # -*- coding: utf-8 -*-
 
+import sys
+import heapq
+from array import array
 try:
     from collections.abc import Mapping
 except:
     from collections import Mapping
-from collections import defaultdict
+
 
 class WhipReportException(Exception):
     """Raised when the reporting of the errors contains errors"""
     pass
 
 
+class MessageCodes(object):
+    """Integer codes of the error messages
+
+    The messages are stored once and referred to by their position, shared
+    by all :class:`~pywhip.reporters.SpecificationErrorHandler` instances of
+    a validation.
+    """
+
+    __slots__ = ('_codes', '_messages')
+
+    def __init__(self):
+        self._codes = {}
+        self._messages = []
+
+    def __getitem__(self, code):
+        return self._messages[code]
+
+    def __len__(self):
+        return len(self._messages)
+
+    def code(self, message):
+        """Integer code of a message, a new code is added when unknown"""
+        try:
+            return self._codes[message]
+        except KeyError:
+            code = self._codes[message] = len(self._messages)
+            self._messages.append(sys.intern(message))
+            return code
+
+
+class ValueErrors(object):
+    """Logged errors of a single data value
+
+    Attributes
+    ----------
+    message : int
+        Code of the error message, see
+        :class:`~pywhip.reporters.MessageCodes`.
+    row_ids : array.array
+        Row identifiers for which the value failed, in ascending order.
+    count : int
+        Number of failed rows preceding the ``row_ids``, only counted (see
+        :meth:`~pywhip.reporters.SpecificationErrorHandler.load_summary`).
+    first_row : int | None
+        First failed row of the counted rows.
+    """
+
+    __slots__ = ('message', 'row_ids', 'count', 'first_row')
+
+    def __init__(self, message):
+        self.message = message
+        self.row_ids = array('l')
+        self.count = 0
+        self.first_row = None
+
+    def failed_rows(self):
+        """Number of failed rows"""
+        return self.count + len(self.row_ids)
+
+    def first_failed_row(self):
+        """Row identifier of the first failed row"""
+        if self.count:
+            return self.first_row
+        return self.row_ids[0]
+
+
 class SpecificationErrorHandler(Mapping):
     """Class handler for field-rule entity reporting
 
@@ -19,38 +88,105 @@ class SpecificationErrorHandler(Mapping):
     constraint : str
         The constraint linked to the specification (field-rule combination),
         expressed as string
-    _samples : defaultdict(set)
-        Dictionary with wrong data values as keys and the corresponding row
-        identifiers as values.
+    messages : MessageCodes
+        Integer codes of the error messages.
+    _samples : dict
+        Dictionary with wrong data values as keys and the corresponding
+        :class:`~pywhip.reporters.ValueErrors` as values.
+    _conflicts : dict
+        Dictionary with `(value, message code)` keys for values logged with
+        more than a single message.
+    _failed_rows_count : int | None
+        Number of distinct failed rows, maintained while logging errors. None
+        when it needs to be counted again after merging overlapping errors.
+    _last_row_id : int
+        Highest logged row identifier.
+    _counted_rows : int
+        Number of distinct failed rows loaded as counts only, preceding the
+        logged row identifiers.
 
     Notes
     -----
     The :class:`~pywhip.reporters.SpecificationErrorHandler` class is basically
-    an enriched dictionary (using :term:`mapping`), directly building on top
-    of a :class:`~collections.defaultdict` with the (wrong) values as
-    keys and a :class:`set` as values to add (unique) rows for which
-    that value occurs.
+    an enriched dictionary (using :term:`mapping`), with the
+    `(value, message)` combinations as keys and the row identifiers for which
+    that value occurs as values. As each value is linked to a single message,
+    the errors are stored by (interned) value, with an integer message code
+    and an :class:`array.array` of row identifiers, i.e. a few bytes for each
+    logged error.
     """
 
-    # TODO: add control that keys are tuples only (__setitem__)
+    __slots__ = ('constraint', 'messages', '_samples', '_conflicts',
+                 '_failed_rows_count', '_last_row_id', '_counted_rows')
 
-    def __init__(self, constraint):
-        self._samples = defaultdict(set)
+    def __init__(self, constraint, messages=None):
         self.constraint = constraint
+        self.messages = MessageCodes() if messages is None else messages
+        self._samples = {}
+        self._conflicts = {}
+        self._failed_rows_count = 0
+        self._last_row_id = 0
+        self._counted_rows = 0
 
     def __getitem__(self, key):
-        return self._samples[key]
+        value, message = key
+        errors = self._samples.get(value)
+        if errors is None or self.messages[errors.message] != message:
+            code = self.messages.code(message)
+            errors = self._conflicts.get((value, code))
+            if errors is None:
+                raise KeyError(key)
+        return errors.row_ids
 
     def __iter__(self):
-        return iter(self._samples)
+        messages = self.messages
+        for value, errors in self._samples.items():
+            yield value, messages[errors.message]
+        for value, code in self._conflicts:
+            yield value, messages[code]
 
     def __len__(self):
-        return len(self._samples)
+        return len(self._samples) + len(self._conflicts)
+
+    def _value_errors(self, value, message):
+        """Errors container of a value-message combination"""
+        code = self.messages.code(message)
+        errors = self._samples.get(value)
+        if errors is None:
+            if isinstance(value, str):
+                value = sys.intern(value)
+            errors = self._samples[value] = ValueErrors(code)
+        elif errors.message != code:
+            errors = self._conflicts.get((value, code))
+            if errors is None:
+                errors = self._conflicts[(value, code)] = ValueErrors(code)
+        return errors
+
+    def add(self, value, message, row_id):
+        """Log the error of a data value
+
+        Parameters
+        ----------
+        value : str
+            Failing data value.
+        message : str
+            Error message.
+        row_id : int
+            Row identifier, errors are logged with ascending row identifiers.
+        """
+        row_ids = self._value_errors(value, message).row_ids
+        if not row_ids or row_ids[-1] != row_id:
+            row_ids.append(row_id)
+        if row_id > self._last_row_id:
+            self._last_row_id = row_id
+            if self._failed_rows_count is not None:
+                self._failed_rows_count += 1
+        elif row_id < self._last_row_id:
+            self._failed_rows_count = None
 
     def _unique_value_messages(self):
         """Check if all values are linked to a single message"""
-        return len(set([value[0] for value in self.keys()])) == len(
-            set(self.keys()))
+        return not self._conflicts
 
     def _failed_rows(self):
         """Overview of the failed row identifiers"""
@@ -59,8 +195,112 @@ class SpecificationErrorHandler(Mapping):
             row_ids.update(values)
         return row_ids
 
+    def failed_rows_count(self):
+        """Number of distinct rows with a logged error
+
+        The count is maintained while logging the errors, the row
+        identifiers are only collected again when merged errors overlap
+        with the logged ones.
+        """
+        if self._failed_rows_count is None:
+            self._failed_rows_count = self._counted_rows + \
+                len(self._failed_rows())
+        return self._failed_rows_count
+
+    def dump_samples(self):
+        """Export the logged errors as a list of plain data types
+
+        Returns
+        -------
+        list
+            List of `[value, message, row_ids]` items, with the row
+            identifiers sorted.
+        """
+        return [[value, message, row_ids.tolist()] for (value, message),
+                row_ids in self.items()]
+
+    def update_samples(self, samples):
+        """Merge logged errors exported by
+        :meth:`~pywhip.reporters.SpecificationErrorHandler.dump_samples`
+
+        Parameters
+        ----------
+        samples : list
+            List of `[value, message, row_ids]` items.
+        """
+        merged_row_ids = set()
+        for value, message, row_ids in samples:
+            errors = self._value_errors(value, message)
+            if not errors.row_ids or (row_ids and
+                                      min(row_ids) > errors.row_ids[-1]):
+                # errors of the rows following the logged rows
+                errors.row_ids.extend(sorted(row_ids))
+            else:
+                errors.row_ids = array('l', sorted(set(
+                    errors.row_ids).union(row_ids)))
+            merged_row_ids.update(row_ids)
+
+        if not merged_row_ids:
+            return
+        if self._failed_rows_count is not None and \
+                min(merged_row_ids) > self._last_row_id:
+            self._failed_rows_count += len(merged_row_ids)
+        else:
+            self._failed_rows_count = None
+        self._last_row_id = max(self._last_row_id, max(merged_row_ids))
+
+    def _all_value_errors(self):
+        """`(value, errors)` of all logged values, conflicts included"""
+        for value, errors in self._samples.items():
+            yield value, errors
+        for (value, _), errors in self._conflicts.items():
+            yield value, errors
+
+    def dump_summary(self):
+        """Export the logged errors as counts, without row identifiers
+
+        The size of the summary only depends on the number of distinct
+        failed values, not on the number of rows.
+
+        Returns
+        -------
+        dict
+            The number of distinct ``failed_rows``, the ``last_row`` with
+            an error and the ``samples``, a list of
+            `[value, message, failed_rows, first_row]` items.
+        """
+        messages = self.messages
+        return {'failed_rows': self.failed_rows_count(),
+                'last_row': self._last_row_id,
+                'samples': [[value, messages[errors.message],
+                             errors.failed_rows(), errors.first_failed_row()]
+                            for value, errors in self._all_value_errors()]}
+
+    def load_summary(self, summary):
+        """Load logged errors exported by
+        :meth:`~pywhip.reporters.SpecificationErrorHandler.dump_summary`
+
+        The errors are loaded as counts, preceding the errors logged
+        afterwards, i.e. the rows logged next have higher row identifiers
+        than the ``last_row`` of the summary.
+
+        Parameters
+        ----------
+        summary : dict
+            Exported summary of the errors of the preceding rows.
+        """
+        for value, message, failed_rows, first_row in summary['samples']:
+            errors = self._value_errors(value, message)
+            if errors.first_row is None or first_row < errors.first_row:
+                errors.first_row = first_row
+            errors.count += failed_rows
+        self._counted_rows += summary['failed_rows']
+        if self._failed_rows_count is not None:
+            self._failed_rows_count += summary['failed_rows']
+        self._last_row_id = max(self._last_row_id, summary['last_row'])
+
     def build_error_report(self, total_rows_count, top_n):
-        """Convert defaultdict to regular dict for json reporting
+        """Convert the logged errors to a regular dict for json reporting
 
 
         Parameters
@@ -70,15 +310,14 @@ class SpecificationErrorHandler(Mapping):
             passed rows as well
         top_n : int
             Number of samples (ordered on the number of rows) to retain for
-            reporting purposes
+            reporting purposes. The samples are selected with a heap, without
+            sorting all logged values.
 
         Notes
         -----
 
         :meth:`~pywhip.reporters.SpecificationErrorHandler.build_error_report`
-        combines the information contained by the
-        :attr:`~pywhip.reporters.SpecificationErrorHandler._samples`
-        attribute, for example::
+        combines the logged errors, for example::
 
             { ("07241981", "string format ...") : [2, 3, 5, 6],
               ("value", "message as provided by error") : [1, 2, 6,]
@@ -109,14 +348,14 @@ class SpecificationErrorHandler(Mapping):
                                       "combinations unique!")
 
         samples = {}
-        for (value, message) in sorted(self, key=lambda k: len(self[k]),
-                                       reverse=True)[:top_n]:
-            row_id_list = self[(value, message)]
-            samples[value] = {'message': message,
-                              'first_row': min(row_id_list),
-                              'failed_rows': len(row_id_list)}
-
-        failed_rows_count = len(self._failed_rows())
+        for value, errors in heapq.nlargest(
+                top_n, self._samples.items(),
+                key=lambda item: item[1].failed_rows()):
+            samples[value] = {'message': self.messages[errors.message],
+                              'first_row': errors.first_failed_row(),
+                              'failed_rows': errors.failed_rows()}
+
+        failed_rows_count = self.failed_rows_count()
         return {'constraint': self.constraint,
                 'passed_rows': total_rows_count - failed_rows_count,
                 'failed_rows': failed_rows_count,
@@ -0,0 +1,603 @@
+# -*- coding: utf-8 -*-
+
+"""Local HTTP validation service
+
+An :mod:`asyncio` HTTP/1.1 server validating data sets against whip
+specifications, without dependencies outside the standard library. The
+specifications are registered once and referred to by their fingerprint
+(see :func:`~pywhip.state.specification_hash`), the compiled
+:class:`~pywhip.pywhip.Whip` instances are kept in a least recently used
+cache (see :class:`SchemaCache`).
+
+The validation runs in a pool of worker processes, each keeping its own
+cache of compiled specifications. The body of a CSV upload is read from the
+connection while it is validated: a thread splits the body in blocks of
+records (see :func:`~pywhip.parallel.iter_blocks`), passed to the workers,
+and merges the error containers of the blocks in order. The body is only
+read as fast as the blocks are validated. A Darwin Core Archive can only be
+read once complete (the zip directory is at the end of the file) and is
+written to a temporary file first.
+
+Endpoints:
+
+``GET /health``
+    Status of the service and the fingerprints of the cached
+    specifications.
+``POST /specifications``
+    Register the whip specifications of the body (YAML or JSON), returns
+    the ``specification`` fingerprint.
+``POST /validate/csv?specification=<fingerprint>``
+    Validate the CSV body, returns the json report. Optional
+    ``delimiter`` (default ``,``) and ``maxentries`` query parameters.
+``POST /validate/dwca?specification=<fingerprint>``
+    Validate the zipped Darwin Core Archive of the body, returns the json
+    report. Optional ``maxentries`` query parameter.
+
+Usage::
+
+    whip_serve --port 8080 --workers 4
+
+    curl --data-binary @specifications.yaml localhost:8080/specifications
+    curl --data-binary @occurrence.csv \\
+        "localhost:8080/validate/csv?specification=<fingerprint>"
+"""
+
+import io
+import os
+import csv
+import json
+import asyncio
+import tempfile
+from itertools import islice
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit, parse_qsl
+
+from .state import specification_hash
+from .parallel import iter_blocks, _preload_rules
+from .pipeline import QueueReader
+from .writers import iter_json
+
+# number of bytes read from the connection at once
+READ_SIZE = 2 ** 16
+
+# number of characters after which a block of records is completed
+BLOCK_SIZE = 2 ** 20
+
+STATUS_REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request',
+                  404: 'Not Found', 405: 'Method Not Allowed',
+                  431: 'Request Header Fields Too Large',
+                  500: 'Internal Server Error'}
+
+# compiled specifications of the worker process, see `_init_worker`
+_worker = {'schemas': OrderedDict(), 'cache_size': 32, 'batch_size': None}
+
+
+class HTTPError(Exception):
+    """Raised to answer a request with an error status
+
+    Parameters
+    ----------
+    status : int
+        HTTP status code.
+    message : str
+        Description of the error, returned as ``error`` of the json body.
+    """
+
+    def __init__(self, status, message):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+
+
+class SchemaCache(object):
+    """Least recently used cache of compiled whip specifications
+
+    Parameters
+    ----------
+    cache_size : int
+        Maximum number of compiled specifications to keep.
+
+    Attributes
+    ----------
+    schemas : collections.OrderedDict
+        The compiled :class:`~pywhip.pywhip.Whip` instances by specification
+        fingerprint, the least recently used first.
+    """
+
+    def __init__(self, cache_size=32):
+        self.cache_size = cache_size
+        self.schemas = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.schemas
+
+    def __len__(self):
+        return len(self.schemas)
+
+    def get(self, key):
+        """The compiled specifications of a fingerprint
+
+        Raises
+        ------
+        KeyError
+            When the specifications are not (or no longer) cached.
+        """
+        whip_it = self.schemas[key]
+        self.schemas.move_to_end(key)
+        return whip_it
+
+    def add(self, key, whip_it):
+        """Add compiled specifications, removing the least recently used
+        ones when the cache is full"""
+        self.schemas[key] = whip_it
+        self.schemas.move_to_end(key)
+        while len(self.schemas) > self.cache_size:
+            self.schemas.popitem(last=False)
+
+
+def _init_worker(cache_size, batch_size):
+    """Prepare the state of a worker process"""
+    _worker.update(cache_size=cache_size, batch_size=batch_size)
+    _preload_rules()
+
+
+def _compiled(key, specifications):
+    """Compiled specifications of the worker process"""
+    from .pywhip import Whip
+
+    schemas = _worker['schemas']
+    whip_it = schemas.get(key)
+    if whip_it is None:
+        whip_it = Whip(specifications, batch_size=_worker['batch_size'])
+        schemas[key] = whip_it
+        while len(schemas) > _worker['cache_size']:
+            schemas.popitem(last=False)
+    schemas.move_to_end(key)
+    return whip_it
+
+
+def _validate_block(key, specifications, row_id, field_names, delimiter,
+                    text):
+    """Validate a block of CSV records in a worker process
+
+    Returns
+    -------
+    dict
+        The error containers of the block, see
+        :meth:`~pywhip.pywhip.Whip._dump_state`.
+    """
+    rows = csv.DictReader(io.StringIO(text), fieldnames=field_names,
+                          delimiter=delimiter)
+    return _compiled(key, specifications)._whip_part(rows, row_id)
+
+
+def _validate_dwca(key, specifications, dwca_zip, maxentries):
+    """Validate a Darwin Core Archive in a worker process
+
+    Returns
+    -------
+    field_names : list
+        Field names of the core file.
+    state : dict
+        The error containers of the archive, see
+        :meth:`~pywhip.pywhip.Whip._dump_state`.
+    """
+    from dwca.read import DwCAReader
+
+    whip_it = _compiled(key, specifications)
+    with DwCAReader(dwca_zip) as dwca:
+        field_names = [field['term'].split('/')[-1] for field in
+                       dwca.core_file.file_descriptor.fields]
+    rows = whip_it.generate_dwca(dwca_zip)
+    if maxentries:
+        rows = islice(rows, maxentries)
+    return field_names, whip_it._whip_part(rows, 0)
+
+
+class RequestBody(object):
+    """Body of a HTTP request, read from the connection on demand
+
+    Supports bodies with a ``Content-Length`` and chunked bodies.
+
+    Parameters
+    ----------
+    reader : asyncio.StreamReader
+        The connection.
+    length : int
+        Number of bytes of the body, ignored for chunked bodies.
+    chunked : boolean
+        If True, the body uses the chunked transfer coding.
+    """
+
+    def __init__(self, reader, length=0, chunked=False):
+        self._reader = reader
+        self._chunked = chunked
+        self._remaining = 0 if chunked else length
+        self._chunks = 0
+        self._done = False
+
+    async def _next_chunk(self):
+        """Start reading the next chunk of a chunked body"""
+        if self._chunks:
+            await self._reader.readexactly(2)  # end of the previous chunk
+        line = await self._reader.readline()
+        try:
+            self._remaining = int(line.split(b';')[0].strip(), 16)
+        except ValueError:
+            raise HTTPError(400, "Not a valid chunk size")
+        self._chunks += 1
+        if not self._remaining:
+            # skip the trailer
+            while (await self._reader.readline()).strip():
+                pass
+            self._done = True
+
+    async def read(self, size=READ_SIZE):
+        """Read the next part of the body
+
+        Returns
+        -------
+        bytes
+            At most ``size`` bytes, empty at the end of the body.
+        """
+        if self._chunked and not self._remaining and not self._done:
+            await self._next_chunk()
+        if not self._remaining:
+            return b''
+        data = await self._reader.read(min(size, self._remaining))
+        if not data:
+            raise ConnectionError("Incomplete request body")
+        self._remaining -= len(data)
+        return data
+
+    async def drain(self):
+        """Read the remaining part of the body"""
+        while await self.read():
+            pass
+
+
+class WhipServer(object):
+    """HTTP validation service with a cache of compiled specifications
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes, by default the number of CPUs.
+    cache_size : int
+        Maximum number of compiled specifications to keep, in the service
+        and in each worker process.
+    batch_size : int
+        If provided, the workers validate the rows in batches of
+        ``batch_size`` rows, see :class:`~pywhip.pywhip.Whip`.
+    block_rows : int
+        Maximum number of rows of a block of a CSV upload.
+    uploads : int
+        Maximum number of uploads validated at the same time, further
+        uploads wait. By default twice the number of workers.
+
+    Attributes
+    ----------
+    schemas : SchemaCache
+        The compiled specifications, used to check the specifications and
+        to create the reports.
+    """
+
+    def __init__(self, workers=None, cache_size=32, batch_size=None,
+                 block_rows=20000, uploads=None):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        self.workers = workers or multiprocessing.cpu_count()
+        self.block_rows = block_rows
+        self.schemas = SchemaCache(cache_size)
+        self.pool = ProcessPoolExecutor(
+            self.workers, initializer=_init_worker,
+            initargs=(cache_size, batch_size))
+        # start the workers before any thread of the service
+        for future in [self.pool.submit(_preload_rules)
+                       for _ in range(self.workers)]:
+            future.result()
+        self.threads = ThreadPoolExecutor(uploads or 2 * self.workers)
+
+    def close(self):
+        """Stop the worker processes and threads"""
+        self.threads.shutdown()
+        self.pool.shutdown()
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """Start listening for requests
+
+        Returns
+        -------
+        asyncio.Server
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader, writer):
+        """Answer the requests of a connection"""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, {
+                        'error': "Request header too large"}, False)
+                    break
+                method, target, headers = _parse_head(request_line)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    body = _request_body(reader, headers)
+                    if headers.get('expect', '').lower() == '100-continue':
+                        writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+                    status, payload = await self.dispatch(method, target,
+                                                          body)
+                    await body.drain()
+                except HTTPError as exc:
+                    # the remaining body is not read
+                    status, payload = exc.status, {'error': str(exc)}
+                    keep_alive = False
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as exc:
+                    status, payload = 500, {'error': "{}: {}".format(
+                        type(exc).__name__, exc)}
+                    keep_alive = False
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        """Write a json response"""
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode('utf-8')
+        writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n'
+                     'Content-Length: {}\r\nConnection: {}\r\n\r\n'.format(
+                         status, STATUS_REASONS[status], len(payload),
+                         'keep-alive' if keep_alive else 'close'
+                     ).encode('latin-1'))
+        writer.write(payload)
+        await writer.drain()
+
+    async def dispatch(self, method, target, body):
+        """Answer a request
+
+        Parameters
+        ----------
+        method : str
+            HTTP method of the request.
+        target : str
+            Path and query of the request.
+        body : RequestBody
+            Body of the request.
+
+        Returns
+        -------
+        status : int
+            HTTP status code.
+        payload : dict | bytes
+            Json response, or the encoded json report.
+        """
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        routes = {'/health': ('GET', self.health),
+                  '/specifications': ('POST', self.register),
+                  '/validate/csv': ('POST', self.validate_csv),
+                  '/validate/dwca': ('POST', self.validate_dwca)}
+        if url.path not in routes:
+            raise HTTPError(404, "Unknown path '{}'".format(url.path))
+        route_method, route = routes[url.path]
+        if method != route_method:
+            raise HTTPError(405, "Use {} for '{}'".format(route_method,
+                                                          url.path))
+        return await route(query, body)
+
+    async def health(self, query, body):
+        return 200, {'status': 'ok', 'workers': self.workers,
+                     'specifications': list(self.schemas.schemas)}
+
+    async def register(self, query, body):
+        """Compile and cache the specifications of the body"""
+        import yaml
+        from cerberus import SchemaError
+        from .pywhip import Whip
+
+        content = bytearray()
+        data = await body.read()
+        while data:
+            content.extend(data)
+            data = await body.read()
+        try:
+            specifications = yaml.safe_load(content.decode('utf-8'))
+        except (UnicodeDecodeError, yaml.YAMLError) as exc:
+            raise HTTPError(400, "Not valid YAML or JSON: {}".format(exc))
+
+        try:
+            key = specification_hash(specifications)
+        except (AttributeError, TypeError):
+            raise HTTPError(400, "Specifications need to be a mapping of "
+                                 "fields to rules")
+        if key not in self.schemas:
+            loop = asyncio.get_running_loop()
+            try:
+                whip_it = await loop.run_in_executor(self.threads, Whip,
+                                                     specifications)
+            except SchemaError as exc:
+                raise HTTPError(400, "Not valid whip specifications: "
+                                     "{}".format(exc))
+            self.schemas.add(key, whip_it)
+        else:
+            self.schemas.get(key)
+        return 201, {'specification': key}
+
+    def _schema(self, query):
+        """Fingerprint, specifications and compiled specifications of the
+        request"""
+        key = query.get('specification')
+        if key is None:
+            raise HTTPError(400, "Provide the specification fingerprint as "
+                                 "'specification' query parameter")
+        try:
+            whip_it = self.schemas.get(key)
+        except KeyError:
+            raise HTTPError(404, "Unknown specification '{}', register the "
+                                 "specifications first".format(key))
+        return key, whip_it.schema, whip_it
+
+    async def validate_csv(self, query, body):
+        """Validate a CSV body, streamed to the workers"""
+        key, specifications, whip_it = self._schema(query)
+        delimiter = query.get('delimiter', ',')
+        if len(delimiter) != 1:
+            raise HTTPError(400, "The delimiter is a single character")
+        maxentries = _maxentries(query)
+
+        loop = asyncio.get_running_loop()
+
+        def read_body():
+            while True:
+                data = asyncio.run_coroutine_threadsafe(body.read(),
+                                                        loop).result()
+                if not data:
+                    return
+                yield data
+
+        report = await loop.run_in_executor(
+            self.threads, self._whip_stream, whip_it._copy(), key,
+            specifications, read_body(), delimiter, maxentries)
+        return 200, report
+
+    def _whip_stream(self, whip_it, key, specifications, data, delimiter,
+                     maxentries):
+        """Validate the blocks of a CSV stream with the workers"""
+        handle = io.TextIOWrapper(io.BufferedReader(QueueReader(data)),
+                                  encoding='utf-8')
+        try:
+            field_names = next(csv.reader(handle, delimiter=delimiter), None)
+            if not field_names:
+                raise HTTPError(400, "No header in the data")
+            whip_it._prepare(field_names)
+
+            pending = deque()
+            row_id = 0
+            for text, rows in iter_blocks(handle, delimiter, self.block_rows,
+                                          BLOCK_SIZE, maxentries,
+                                          header=False):
+                if len(pending) >= 2 * self.workers:
+                    whip_it._load_state(pending.popleft().result())
+                pending.append(self.pool.submit(
+                    _validate_block, key, specifications, row_id,
+                    field_names, delimiter, text))
+                row_id += rows
+            while pending:
+                whip_it._load_state(pending.popleft().result())
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise HTTPError(400, "Data can not be read: {}".format(exc))
+        return _encode_report(whip_it)
+
+    async def validate_dwca(self, query, body):
+        """Validate a Darwin Core Archive body, written to a temporary file
+        first"""
+        key, specifications, whip_it = self._schema(query)
+        maxentries = _maxentries(query)
+
+        loop = asyncio.get_running_loop()
+        handle, dwca_zip = tempfile.mkstemp(suffix='.zip')
+        try:
+            with os.fdopen(handle, 'wb') as dwca:
+                data = await body.read()
+                while data:
+                    dwca.write(data)
+                    data = await body.read()
+            try:
+                field_names, state = await asyncio.wrap_future(
+                    self.pool.submit(_validate_dwca, key, specifications,
+                                     dwca_zip, maxentries))
+            except Exception as exc:
+                raise HTTPError(400, "Archive can not be read: {}".format(
+                    exc))
+        finally:
+            os.remove(dwca_zip)
+
+        whip_it = whip_it._copy()
+        whip_it._prepare(field_names)
+        whip_it._load_state(state)
+        report = await loop.run_in_executor(self.threads, _encode_report,
+                                            whip_it)
+        return 200, report
+
+
+def _parse_head(head):
+    """Method, target and headers (with lower case names) of a request"""
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise ConnectionError("Not a valid request line")
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+
+def _request_body(reader, headers):
+    """The body of a request, see :class:`RequestBody`"""
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        return RequestBody(reader, chunked=True)
+    try:
+        return RequestBody(reader, int(headers.get('content-length', 0)))
+    except ValueError:
+        raise HTTPError(400, "Not a valid Content-Length")
+
+
+def _maxentries(query):
+    """The ``maxentries`` query parameter"""
+    try:
+        return int(query['maxentries']) if 'maxentries' in query else None
+    except ValueError:
+        raise HTTPError(400, "The maxentries is an integer")
+
+
+def _encode_report(whip_it):
+    """Fill the report of merged error containers and encode it as json"""
+    whip_it._finalize_report()
+    return ''.join(iter_json(whip_it.get_report('json'))).encode('utf-8')
+
+
+def serve(host='127.0.0.1', port=8080, workers=None, cache_size=32,
+          batch_size=None, ready=None):
+    """Run the validation service until interrupted
+
+    Parameters
+    ----------
+    host : str
+        Host name or address to listen on, by default only local
+        connections are accepted.
+    port : int
+        Port to listen on.
+    workers, cache_size, batch_size
+        See :class:`WhipServer`.
+    ready : callable
+        Called as ``ready(host, port)`` once listening.
+    """
+    server = WhipServer(workers, cache_size, batch_size)
+
+    async def run():
+        listener = await server.start(host, port)
+        if ready is not None:
+            ready(*listener.sockets[0].getsockname()[:2])
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+
+import os
+import gzip
+import time
+import json
+import hashlib
+
+STATE_VERSION = 2
+
+
+def _with_empty_defaults(rules):
+    """Copy of a rules set with the default ``empty: False`` specification"""
+    rules = dict(rules)
+    rules.setdefault('empty', False)
+    if isinstance(rules.get('if'), dict):
+        rules['if'] = [rules['if']]
+    if 'if' in rules:
+        rules['if'] = [
+            _with_empty_defaults({key: (_with_empty_defaults(value) if
+                                        isinstance(value, dict) else value)
+                                  for key, value in condition.items()})
+            for condition in rules['if']]
+    return rules
+
+
+def specification_hash(schema):
+    """Fingerprint of a whip specification schema
+
+    Stored state (manifests, checkpoints,...) is only reused when the
+    specifications and the pywhip version used to create it are identical.
+    The ``empty: False`` defaults added by the validation are taken into
+    account, so the fingerprint does not change once a schema is used.
+
+    Parameters
+    ----------
+    schema : dict
+        Whip specification schema.
+
+    Returns
+    -------
+    str
+    """
+    from . import __version__
+    schema = {field: _with_empty_defaults(rules) for field, rules in
+              schema.items()}
+    content = json.dumps([__version__, schema], sort_keys=True, default=str)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def row_hash(row):
+    """Compact content hash of a single document row
+
+    Parameters
+    ----------
+    row : dict
+        Single line document values (as dict values) and field names
+        (as dict keys).
+
+    Returns
+    -------
+    str
+    """
+    content = '\x1f'.join([value if isinstance(value, str) else repr(value)
+                           for value in row.values()])
+    return hashlib.blake2b(content.encode('utf-8', 'surrogatepass'),
+                           digest_size=8).hexdigest()
+
+
+def compress_row_ids(row_ids, ranges=None):
+    """Compact representation of sorted row identifiers
+
+    Consecutive row identifiers are stored as a `start, length` pair.
+
+    Parameters
+    ----------
+    row_ids : list
+        Sorted list of row identifiers.
+    ranges : list
+        Compressed row identifiers preceding the ``row_ids``, extended in
+        place with the ``row_ids``.
+
+    Returns
+    -------
+    list
+        Flat list of alternating `start, length` values.
+    """
+    if ranges is None:
+        ranges = []
+    for row_id in row_ids:
+        if ranges and ranges[-2] + ranges[-1] == row_id:
+            ranges[-1] += 1
+        else:
+            ranges += [row_id, 1]
+    return ranges
+
+
+def expand_row_ids(ranges):
+    """Expand row identifiers compressed by
+    :func:`~pywhip.state.compress_row_ids`
+
+    Parameters
+    ----------
+    ranges : list
+        Flat list of alternating `start, length` values.
+
+    Returns
+    -------
+    list
+    """
+    row_ids = []
+    for start, length in zip(ranges[::2], ranges[1::2]):
+        row_ids.extend(range(start, start + length))
+    return row_ids
+
+
+def _read_json(filename):
+    """Read a (gzip compressed) json state file"""
+    with gzip.open(filename, 'rt', encoding='utf-8') as state_file:
+        return json.load(state_file)
+
+
+def _write_json(filename, content):
+    """Write a (gzip compressed) json state file
+
+    The file is written next to the target and moved in place afterwards,
+    an interrupted write never corrupts existing state.
+    """
+    temp_filename = filename + '.tmp'
+    with gzip.open(temp_filename, 'wt', encoding='utf-8') as state_file:
+        json.dump(content, state_file, separators=(',', ':'))
+    os.replace(temp_filename, filename)
+
+
+class RowManifest(object):
+    """Sidecar manifest to support incremental revalidation
+
+    The manifest stores a content hash for each row of the validated data,
+    together with the errors of that row. On a later run, rows with an
+    unchanged hash reuse the stored errors, only new or changed rows are
+    validated again. Rows which are not present anymore are dropped from the
+    manifest and, as the report is rebuilt from the rows of the current run,
+    from the report as well.
+
+    Attributes
+    ----------
+    filename : str
+        Filename of the (gzip compressed json) manifest.
+    key_field : str
+        Field used to identify rows between runs. When the field is missing
+        in the data, the value is empty or it occurs more than once, the row
+        position is used instead.
+    reused_rows : int
+        Number of rows of the current run for which stored errors are used.
+    validated_rows : int
+        Number of rows of the current run which are (re)validated.
+    """
+
+    version = 1
+
+    def __init__(self, filename, key_field='occurrenceID'):
+        self.filename = filename
+        self.key_field = key_field
+        self.reused_rows = 0
+        self.validated_rows = 0
+
+        self._keyed = False
+        self._previous = {}
+        self._rows = {}
+
+    @staticmethod
+    def _position_key(row_id):
+        return '\x00{}'.format(row_id)
+
+    def start(self, schema_hash, field_names):
+        """Load the stored manifest compatible with the current run
+
+        Parameters
+        ----------
+        schema_hash : str
+            Fingerprint of the specifications, see
+            :func:`~pywhip.state.specification_hash`.
+        field_names : list
+            List of the field names present in the input data file.
+        """
+        self._schema_hash = schema_hash
+        self._field_names = list(field_names)
+        self._keyed = self.key_field in self._field_names
+        self._previous = {}
+        self._rows = {}
+        self.reused_rows = 0
+        self.validated_rows = 0
+
+        if not os.path.exists(self.filename):
+            return
+        manifest = _read_json(self.filename)
+        if (manifest.get('version') != self.version or
+                manifest['specifications'] != schema_hash or
+                manifest['field_names'] != self._field_names):
+            return
+
+        rules = [tuple(rule) for rule in manifest['rules']]
+        messages = manifest['messages']
+        for key, (content_hash, errors) in manifest['rows'].items():
+            self._previous[key] = (content_hash, [
+                rules[rule_id] + (value, messages[message_id])
+                for rule_id, value, message_id in errors])
+
+    def row_errors(self, row, row_id, validate):
+        """Get the errors of a row, validating the row only when required
+
+        Parameters
+        ----------
+        row : dict
+            Single line document values (as dict values) and field names
+            (as dict keys).
+        row_id : int
+            Row identifier (position) of the row in the data.
+        validate : callable
+            Function returning the list of `(field, rule, value, message)`
+            errors of a row, used for new or changed rows.
+
+        Returns
+        -------
+        list
+        """
+        key = row.get(self.key_field) if self._keyed else None
+        if not key or key in self._rows:
+            key = self._position_key(row_id)
+
+        content_hash = row_hash(row)
+        previous = self._previous.get(key)
+        if previous is not None and previous[0] == content_hash:
+            errors = previous[1]
+            self.reused_rows += 1
+        else:
+            errors = validate(row)
+            self.validated_rows += 1
+        self._rows[key] = (content_hash, errors)
+        return errors
+
+    def save(self):
+        """Write the rows of the current run to the manifest file"""
+        rules, rule_ids = [], {}
+        messages, message_ids = [], {}
+        rows = {}
+        for key, (content_hash, errors) in self._rows.items():
+            compact_errors = []
+            for field, rule, value, message in errors:
+                if (field, rule) not in rule_ids:
+                    rule_ids[(field, rule)] = len(rules)
+                    rules.append((field, rule))
+                if message not in message_ids:
+                    message_ids[message] = len(messages)
+                    messages.append(message)
+                compact_errors.append((rule_ids[(field, rule)], value,
+                                       message_ids[message]))
+            rows[key] = (content_hash, compact_errors)
+
+        _write_json(self.filename, {'version': self.version,
+                                    'specifications': self._schema_hash,
+                                    'field_names': self._field_names,
+                                    'key_field': self.key_field,
+                                    'rules': rules,
+                                    'messages': messages,
+                                    'rows': rows})
+
+
+def save_state(filename, whip_it, field_names, position):
+    """Store the aggregated validation state of a whip run
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the (gzip compressed json) state file.
+    whip_it : pywhip.pywhip.Whip
+        Whip instance to store the collected errors from.
+    field_names : list
+        List of the field names present in the input data file.
+    position : dict
+        Reader position to continue from, e.g. the byte `offset` in a file.
+    """
+    state = whip_it._dump_state(summary=True)
+    _write_json(filename, {'version': STATE_VERSION,
+                           'specifications': whip_it._schema_hash,
+                           'field_names': list(field_names),
+                           'position': position,
+                           'whip': state})
+
+
+def load_state(filename, whip_it, field_names):
+    """Load a stored validation state compatible with the current run
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the (gzip compressed json) state file.
+    whip_it : pywhip.pywhip.Whip
+        Whip instance the state will be used for.
+    field_names : list
+        List of the field names present in the input data file.
+
+    Returns
+    -------
+    state : dict | None
+        Stored state with the `position` and the `whip` aggregated errors,
+        None when no state is available or when the state was created with
+        other specifications or for data with other fields.
+    """
+    if not os.path.exists(filename):
+        return None
+    state = _read_json(filename)
+    if (state.get('version') != STATE_VERSION or
+            state['specifications'] != whip_it._schema_hash or
+            state['field_names'] != list(field_names)):
+        return None
+    return state
+
+
+class Checkpoint(object):
+    """Periodic storage of the validation state of a long running validation
+
+    The checkpoint is called during validation and stores the position of
+    the reader and the errors collected so far to the checkpoint file, each
+    ``rows`` rows or ``seconds`` seconds. A validation interrupted for any
+    reason can be resumed from the last checkpoint.
+
+    Attributes
+    ----------
+    filename : str
+        Filename of the (gzip compressed json) checkpoint file.
+    rows : int
+        Number of rows between two checkpoints.
+    seconds : int
+        Number of seconds between two checkpoints, None to only use the
+        number of rows.
+    every : int
+        Number of rows between two calls of the checkpoint by the
+        validation.
+    """
+
+    def __init__(self, filename, rows=100000, seconds=300):
+        self.filename = filename
+        self.rows = rows
+        self.seconds = seconds
+        self.every = min(rows, 1000) if seconds else rows
+
+        self._field_names = None
+        self._position = None
+        self._last_row = 0
+        self._last_time = None
+
+    def start(self, field_names, position, row_id=0):
+        """Prepare the checkpoint for a validation run
+
+        Parameters
+        ----------
+        field_names : list
+            List of the field names present in the input data file.
+        position : callable
+            Function returning the current reader position as a dict, e.g.
+            the byte `offset` in a file.
+        row_id : int
+            Row identifier to start from, when resuming a validation.
+        """
+        self._field_names = field_names
+        self._position = position
+        self._last_row = row_id
+        self._last_time = time.time()
+
+    def load(self, whip_it, field_names):
+        """Load the last checkpoint compatible with the current run
+
+        See :func:`~pywhip.state.load_state`.
+        """
+        return load_state(self.filename, whip_it, field_names)
+
+    def save(self, whip_it):
+        """Store the current state of the validation"""
+        save_state(self.filename, whip_it, self._field_names,
+                   self._position())
+        self._last_row = whip_it._total_row_count
+        self._last_time = time.time()
+
+    def remove(self):
+        """Remove the checkpoint file, e.g. when validation is finished"""
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def __call__(self, whip_it, row_id):
+        if (row_id - self._last_row >= self.rows or (
+                self.seconds and
+                time.time() - self._last_time >= self.seconds)):
+            self.save(whip_it)
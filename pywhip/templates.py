@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from functools import lru_cache
+try:
+    from importlib.resources import files
+except ImportError:  # Python < 3.9
+    files = None
+
+
+def _template_source(name):
+    """Source of a template in the ``static`` folder of the package"""
+    if files is None:
+        import pkg_resources
+        return pkg_resources.resource_string(
+            __package__, 'static/{}'.format(name)).decode('utf-8')
+    return files(__package__).joinpath('static').joinpath(
+        name).read_text(encoding='utf-8')
+
+
+@lru_cache(maxsize=None)
+def template_environment():
+    """Jinja environment of the report templates
+
+    The environment is created once per process. Templates are located with
+    :mod:`importlib.resources` (:mod:`pkg_resources` before Python 3.9) and
+    compiled on first use only, as the templates are part of the package,
+    they are never reloaded.
+
+    Returns
+    -------
+    jinja2.Environment
+    """
+    from jinja2 import Environment, FunctionLoader
+
+    return Environment(loader=FunctionLoader(
+        lambda name: (_template_source(name), None, lambda: True)),
+        auto_reload=False)
+
+
+def get_template(name):
+    """Compiled report template
+
+    Parameters
+    ----------
+    name : str
+        File name of the template in the ``static`` folder of the package,
+        e.g. ``'template.html'``.
+
+    Returns
+    -------
+    jinja2.Template
+    """
+    return template_environment().get_template(name)
@@ -1,17 +1,15 @@
 # -*- coding: utf-8 -*-
 
 import re
+import sys
 from copy import copy
 from datetime import datetime, date
-from dateutil.parser import parse
 try:
     from collections.abc import Mapping, Sequence
 except:
     from collections import Mapping, Sequence
 
 import json
-# https://pypi.python.org/pypi/rfc3987 regex on URI's en IRI's
-from rfc3987 import match
 
 from cerberus import Validator
 from cerberus import errors
@@ -43,6 +41,28 @@ NUMBERFORMAT_VALUE = ErrorDefinition(0x104, 'numberformat')
 STRINGFORMAT_JSON = ErrorDefinition(0x105, 'stringformat')
 STRINGFORMAT_URL = ErrorDefinition(0x106, 'stringformat')
 
+# date parser and URI matcher, imported on first use
+_parse = None
+_match = None
+
+
+def _date_parser():
+    """The :func:`dateutil.parser.parse` function, imported once"""
+    global _parse
+    if _parse is None:
+        from dateutil.parser import parse
+        _parse = parse
+    return _parse
+
+
+def _uri_matcher():
+    """The :func:`rfc3987.match` function, imported once"""
+    global _match
+    if _match is None:
+        from rfc3987 import match
+        _match = match
+    return _match
+
 
 class WhipErrorHandler(BasicErrorHandler):
     """Class to store custom error message handling
@@ -62,6 +82,9 @@ class WhipErrorHandler(BasicErrorHandler):
     * constraint
         This refers to the constraint provided by the whip
         specification right hand side of the colon, use ``{constraint}``
+
+    Formatted messages are memoized by :meth:`format_message`, keeping at most
+    :attr:`message_cache_size` messages.
     """
 
     messages = BasicErrorHandler.messages.copy()
@@ -89,6 +112,74 @@ class WhipErrorHandler(BasicErrorHandler):
     messages[DELIMITER_SPACE.code] = "contains empty string inside " \
                                      "delimitedvalues"
 
+    message_cache_size = 100000
+
+    def __init__(self, tree=None):
+        super(WhipErrorHandler, self).__init__(tree)
+        self._message_cache = {}
+
+    def format_message(self, field, error):
+        """Formatted message of an error, memoized
+
+        The message only depends on the field, the error code, the constraint
+        (identified by the schema and document path) and the value of the
+        error. Messages are interned, so identical messages share storage.
+        When the cache is full, it is cleared and filled again.
+
+        Parameters
+        ----------
+        field : str
+            Field name of the error.
+        error : cerberus.errors.ValidationError
+
+        Returns
+        -------
+        str
+        """
+        key = (field, error.code, error.schema_path, error.document_path,
+               error.value, error.info)
+        return self._cached_message(key, self._format_message, field, error)
+
+    def format_record(self, record):
+        """Formatted message of an error record, memoized
+
+        See :meth:`format_message`, the rule name of the record identifies
+        the constraint.
+
+        Parameters
+        ----------
+        record : tuple
+            `(field, rule, code, constraint, value, info)` error record, see
+            :meth:`~pywhip.validators.DwcaValidator.record_errors`.
+
+        Returns
+        -------
+        str
+        """
+        field, rule, code, constraint, value, info = record
+        return self._cached_message((field, rule, code, value, info),
+                                    self._format_record, record)
+
+    def _format_record(self, record):
+        field, _, code, constraint, value, info = record
+        return self.messages[code].format(*info, constraint=constraint,
+                                          field=field, value=value)
+
+    def _cached_message(self, key, format_function, *args):
+        """Get the message of ``key`` from the cache or format it"""
+        try:
+            return self._message_cache[key]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable value
+            return format_function(*args)
+
+        message = sys.intern(format_function(*args))
+        if len(self._message_cache) >= self.message_cache_size:
+            self._message_cache.clear()
+        self._message_cache[key] = message
+        return message
+
     def __iter__(self):
         raise NotImplementedError
 
@@ -138,8 +229,14 @@ class DwcaValidator(Validator):
 
     To validate the schema input itself, cerberus validation rules can be added
     to the docstring TODO ADDLINK
+
+    Instead of Cerberus :class:`~cerberus.errors.ValidationError` objects,
+    the errors can be recorded as compact tuples, see :meth:`record_errors`.
     """
 
+    _error_records = None
+    _error_scope = None
+
     def __init__(self, *args, **kwargs):
         """Extends the handling of Cerberus :class:`~cerberus.Validator`
 
@@ -170,6 +267,77 @@ class DwcaValidator(Validator):
         # Extend schema with empty: False by default
         self.schema = self._schema_add_empty(self.schema)
 
+    def record_errors(self, records):
+        """Record errors as compact tuples instead of ValidationErrors
+
+        Cerberus creates a :class:`~cerberus.errors.ValidationError` for each
+        error and wraps the errors inside the ``if`` and ``delimitedvalues``
+        specifications in group errors with rewritten error paths. When
+        recording, each error is appended to ``records`` as a
+        `(field, rule, code, constraint, value, info)` tuple instead, with
+        the rule named as in the whip report (e.g. ``allowed_if_2`` or
+        ``regex_delimitedvalue``) and the field of the document. The
+        :attr:`errors` of the validator are not filled, use
+        :meth:`build_errors` to create the ValidationErrors when required.
+
+        Parameters
+        ----------
+        records : list | None
+            List to append the error records to, None to return to the
+            Cerberus ValidationErrors.
+        """
+        self._error_records = records
+
+    @staticmethod
+    def build_errors(records):
+        """Create the ValidationErrors of recorded errors
+
+        Parameters
+        ----------
+        records : list
+            Error records, see :meth:`record_errors`.
+
+        Returns
+        -------
+        list
+            A :class:`~cerberus.errors.ValidationError` for each record, the
+            errors inside ``if`` and ``delimitedvalues`` specifications are
+            not grouped.
+        """
+        validation_errors = []
+        for field, rule, code, constraint, value, info in records:
+            base_rule = re.sub(r'_if_\d+$|_delimitedvalue$', '', rule)
+            validation_errors.append(errors.ValidationError(
+                (field,), (field, base_rule), code, base_rule, constraint,
+                value, info))
+        return validation_errors
+
+    def _error(self, *args):
+        """Record the error when recording errors, see :meth:`record_errors`
+        """
+        records = self._error_records
+        if (records is None or len(args) < 2 or
+                not isinstance(args[1], ErrorDefinition) or
+                args[1].rule is None):
+            return super(DwcaValidator, self)._error(*args)
+
+        field, definition = args[0], args[1]
+        rule = definition.rule
+        constraint = self.schema[field].get(rule)
+        value = self.document.get(field)
+        if self._error_scope is not None:
+            field, suffix = self._error_scope
+            rule += suffix
+        records.append((field, rule, definition.code, constraint, value,
+                        args[2:]))
+
+    def _record_child_errors(self, validator, field, suffix):
+        """Let a child validator record its errors as errors of ``field``,
+        with ``suffix`` added to the rule names"""
+        if self._error_scope is None:
+            validator._error_records = self._error_records
+            validator._error_scope = (field, suffix)
+
     @staticmethod
     def _schema_add_empty(dict_schema):
         """Add `empty: False`` specification for all fields without
@@ -255,7 +423,7 @@ class DwcaValidator(Validator):
             :class:`~python3.datetime.dateime`
         """
         try:
-            event_date = parse(date_string)
+            event_date = _date_parser()(date_string)
             return event_date
         except ValueError:
             return None
@@ -460,6 +628,7 @@ class DwcaValidator(Validator):
                 validator = self._get_child_validator(
                     document_crumb=(field, 'if'), schema_crumb=(field, 'if'),
                     schema={field: rules}, allow_unknown=True)
+                self._record_child_errors(validator, field, '_if_1')
                 validator.validate(copy(self.document),
                                    normalize=False)
 
@@ -492,6 +661,8 @@ class DwcaValidator(Validator):
                         document_crumb=(field, ''.join(['if_', str(i)])),
                         schema_crumb=(field, 'if'),
                         schema={field: rules}, allow_unknown=True)
+                    self._record_child_errors(validator, field,
+                                              '_if_{}'.format(i + 1))
                     validator.validate(copy(self.document),
                                        normalize=False)
 
@@ -527,6 +698,7 @@ class DwcaValidator(Validator):
         validator = self._get_child_validator(
             document_crumb=field, schema_crumb=(field, 'delimitedvalues'),
             schema=schema, allow_unknown=True)
+        self._record_child_errors(validator, field, '_delimitedvalue')
 
         document = dict(((i, v) for i, v in enumerate(value)))
 
@@ -555,7 +727,8 @@ class DwcaValidator(Validator):
             except ValueError:
                 self._error(field, STRINGFORMAT_JSON)
         elif stringtype == 'url':
-            if match(value, rule='URI'):
+            # https://pypi.python.org/pypi/rfc3987 regex on URI's en IRI's
+            if _uri_matcher()(value, rule='URI'):
                 return True
             else:
                 self._error(field, STRINGFORMAT_URL)
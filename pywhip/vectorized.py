@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+
+"""NumPy evaluation of the numeric specifications of a column
+
+The ``min``, ``max`` and ``numberformat`` specifications of a field are
+evaluated for all distinct values of a column batch at once (see
+:class:`~pywhip.batches.BatchValidator`). The values are converted to an
+array of unicode code points, classified with vectorised comparisons and
+numeric values are converted to floats once. The outcome is identical to the
+``_validate_<specification>`` methods of the
+:class:`~pywhip.validators.DwcaValidator`, values for which this can not be
+guaranteed (e.g. exponents, whitespace or non-ascii digits) are marked as
+undecided, to be validated by the validator itself.
+
+NumPy is an optional dependency, without NumPy the specifications are
+validated value by value.
+"""
+
+import re
+
+from cerberus.errors import MIN_VALUE, MAX_VALUE
+
+from .validators import (MIN_NON_NUMERIC, MAX_NON_NUMERIC,
+                         NUMBERFORMAT_NON_NUM, NUMBERFORMAT_NON_INT,
+                         NUMBERFORMAT_NON_FLOAT, NUMBERFORMAT_VALUE)
+
+VECTORIZED_RULES = ('min', 'max', 'numberformat')
+
+# specifications that can stop the validation of the other specifications
+# of a field, fields with these specifications are validated value by value
+STOPPING_RULES = frozenset(['type', 'nullable', 'readonly', 'if',
+                            'delimitedvalues'])
+
+# longer values are validated value by value, limiting the array size
+MAX_LENGTH = 64
+
+# ascii characters which can be part of a value accepted by `float`
+FLOAT_CHARACTERS = frozenset('0123456789+-._eEinfityaINFITYA \t\n\r\x0b\x0c')
+
+
+def _numpy():
+    """The numpy module, None when not installed"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def vectorized_rules(field, rules):
+    """Vectorised evaluation of the numeric specifications of a field
+
+    Parameters
+    ----------
+    field : str
+        Field name.
+    rules : dict
+        Specifications of the field.
+
+    Returns
+    -------
+    pywhip.vectorized.VectorizedRules | None
+        None when NumPy is not installed or the specifications can not be
+        evaluated vectorised.
+    """
+    if _numpy() is None or STOPPING_RULES.intersection(rules):
+        return None
+    constraints = {rule: rules[rule] for rule in VECTORIZED_RULES
+                   if rule in rules}
+    if not constraints:
+        return None
+    for rule in ('min', 'max'):
+        if rule in constraints:
+            try:
+                float(constraints[rule])
+            except (TypeError, ValueError):
+                return None
+    if ('numberformat' in constraints and
+            _numberformat_kind(constraints['numberformat']) is None):
+        return None
+    return VectorizedRules(field, constraints)
+
+
+def _numberformat_kind(formatter):
+    """Branch of the numberformat validation used for a constraint, see
+    :meth:`~pywhip.validators.DwcaValidator._validate_numberformat`"""
+    if not isinstance(formatter, str):
+        return None
+    if re.match(r'^x$', formatter):
+        return 'integer'
+    expected = [length for length in formatter.split(".") if length]
+    for kind, pattern, parts in [
+            ('both', r'[1-9]\.[1-9]', 2), ('decimals', r'\.[1-9]', 1),
+            ('digits', r'[1-9]\.', 1), ('length', r'[1-9]', 1),
+            ('float', r'^\.$', 0)]:
+        if re.match(pattern, formatter):
+            if len(expected) != parts or not all(
+                    length.isdigit() for length in expected):
+                return None
+            return kind
+    return None
+
+
+class VectorizedRules(object):
+    """Evaluate the ``min``, ``max`` and ``numberformat`` specifications of
+    a field for an array of values
+
+    Parameters
+    ----------
+    field : str
+        Field name.
+    constraints : dict
+        The `rule : constraint` combinations to evaluate, for the
+        specifications in :data:`VECTORIZED_RULES`.
+    """
+
+    def __init__(self, field, constraints):
+        self.field = field
+        self.constraints = constraints
+
+    @staticmethod
+    def _code_points(values):
+        """Unicode array of the values, their code points as (values x
+        characters) array, their lengths and the values which can be
+        classified"""
+        np = _numpy()
+        lengths = np.fromiter(map(len, values), dtype=np.int64,
+                              count=len(values))
+        short = lengths <= MAX_LENGTH
+        strings = np.array([value if fits else '' for value, fits in
+                            zip(values, short)], dtype='U')
+        width = max(strings.dtype.itemsize // 4, 1)
+        codes = strings.view(np.uint32).reshape(len(values), width) \
+            if strings.dtype.itemsize else np.zeros((len(values), 1),
+                                                    dtype=np.uint32)
+        # trailing or embedded NUL characters are not represented
+        decided = short & ((codes != 0).sum(axis=1) == lengths)
+        return strings, codes, lengths, decided
+
+    @staticmethod
+    def _float_values(strings, codes, lengths, decided):
+        """Classify values as float numbers, not numeric or undecided"""
+        np = _numpy()
+        digit = (codes >= 48) & (codes <= 57)
+        dot = codes == 46
+        sign = ((codes[:, :1] == 43) | (codes[:, :1] == 45)) & \
+            (lengths[:, None] > 0)
+        padding = codes == 0
+        plain = digit | dot | padding
+        plain[:, :1] |= sign
+        # [+-]digits[.digits], with at least a single digit
+        numeric = plain.all(axis=1) & (dot.sum(axis=1) <= 1) & \
+            digit.any(axis=1) & decided
+
+        ascii = codes < 128
+        accepted = np.zeros(128, dtype=bool)
+        accepted[[ord(character) for character in FLOAT_CHARACTERS]] = True
+        rejected = ascii & ~padding & ~accepted[np.where(ascii, codes, 0)]
+        not_numeric = rejected.any(axis=1) | (lengths == 0)
+
+        numbers = np.full(len(lengths), np.nan)
+        numbers[numeric] = strings[numeric].astype(np.float64)
+        return numbers, numeric, not_numeric & ~numeric
+
+    @staticmethod
+    def _number_parts(codes, lengths):
+        """Numberformat properties of the values, after removing a leading
+        minus sign"""
+        np = _numpy()
+        minus = codes[:, 0] == 45
+        digit = (codes >= 48) & (codes <= 57)
+        dot = codes == 46
+        padding = codes == 0
+        digit[:, 0] &= ~minus
+        plain = digit | dot | padding
+        plain[:, 0] |= minus
+
+        dots = dot.sum(axis=1)
+        digits = digit.sum(axis=1)
+        numeric = plain.all(axis=1) & ((dots == 1) | ((dots == 0) &
+                                                      (digits > 0)))
+        length = lengths - minus
+        has_dot = dots == 1
+        position = np.where(has_dot, dot.argmax(axis=1), lengths)
+        integer_length = position - minus
+        decimal_length = np.where(has_dot, lengths - position - 1, 0)
+        first = np.where(minus, codes[:, min(1, codes.shape[1] - 1)],
+                         codes[:, 0])
+        starts_digit = (first >= 48) & (first <= 57) & (length > 0)
+        return (numeric, has_dot, length, integer_length, decimal_length,
+                starts_digit)
+
+    def evaluate(self, values):
+        """Evaluate the specifications for the values
+
+        Parameters
+        ----------
+        values : list
+            Distinct non-empty string values of a column.
+
+        Returns
+        -------
+        decided : numpy.ndarray
+            Boolean array, False for the values which need to be validated
+            value by value.
+        value_errors : dict
+            For the decided values with errors, the position of the value as
+            key and a list of `(field, rule, code, constraint, value, info)`
+            error records as value, see
+            :meth:`~pywhip.validators.DwcaValidator.record_errors`.
+        """
+        np = _numpy()
+        strings, codes, lengths, decided = self._code_points(values)
+        failures = []
+
+        if 'min' in self.constraints or 'max' in self.constraints:
+            numbers, numeric, not_numeric = self._float_values(
+                strings, codes, lengths, decided)
+            decided &= numeric | not_numeric
+            for rule, out_of_range, non_numeric, compare in [
+                    ('min', MIN_VALUE, MIN_NON_NUMERIC, np.greater),
+                    ('max', MAX_VALUE, MAX_NON_NUMERIC, np.less)]:
+                if rule not in self.constraints:
+                    continue
+                limit = float(self.constraints[rule])
+                failures.append((rule, out_of_range.code,
+                                 numeric & compare(limit, numbers)))
+                failures.append((rule, non_numeric.code, not_numeric))
+
+        if 'numberformat' in self.constraints:
+            failures.extend(self._numberformat_failures(codes, lengths))
+            decided &= ~(codes == 10).any(axis=1)
+
+        value_errors = {}
+        for rule, code, failed in failures:
+            constraint = self.constraints[rule]
+            for position in np.flatnonzero(failed & decided):
+                value_errors.setdefault(int(position), []).append(
+                    (self.field, rule, code, constraint, values[position],
+                     ()))
+        return decided, value_errors
+
+    def _numberformat_failures(self, codes, lengths):
+        """`(rule, code, failed)` of the numberformat specification"""
+        formatter = self.constraints['numberformat']
+        kind = _numberformat_kind(formatter)
+        (numeric, has_dot, length, integer_length, decimal_length,
+         starts_digit) = self._number_parts(codes, lengths)
+
+        failures = [('numberformat', NUMBERFORMAT_NON_NUM.code, ~numeric)]
+        if kind == 'integer':
+            failures.append(('numberformat', NUMBERFORMAT_NON_INT.code,
+                             numeric & has_dot))
+            return failures
+
+        expected = [int(length) for length in formatter.split(".")
+                    if not length == '']
+        if kind == 'both':
+            matches = has_dot & (integer_length == expected[0]) & \
+                (decimal_length == expected[1])
+        elif kind == 'decimals':
+            matches = decimal_length == expected[0]
+        elif kind == 'digits':
+            matches = integer_length == expected[0]
+        elif kind == 'length':
+            failures.append(('numberformat', NUMBERFORMAT_NON_INT.code,
+                             numeric & ~starts_digit))
+            numeric = numeric & starts_digit
+            matches = length == expected[0]
+        else:  # float
+            failures.append(('numberformat', NUMBERFORMAT_NON_FLOAT.code,
+                             numeric & ~has_dot))
+            return failures
+        failures.append(('numberformat', NUMBERFORMAT_VALUE.code,
+                         numeric & ~matches))
+        return failures
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import json
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+def _dumps(value):
+    return json.dumps(value, default=str)
+
+
+def iter_json(value, chunk_size=10000):
+    """Encode a report as json, section by section
+
+    Mappings are encoded key by key and long lists (e.g. the
+    `passed_row_ids`) in chunks of ``chunk_size`` items, the json document
+    is never created as a single string.
+
+    Parameters
+    ----------
+    value : dict
+        Report as provided by :meth:`~pywhip.pywhip.Whip.get_report`.
+    chunk_size : int
+        Number of list items to encode at once.
+
+    Yields
+    ------
+    str
+        Consecutive parts of the json document.
+    """
+    if isinstance(value, Mapping):
+        yield '{'
+        for number, (key, item) in enumerate(value.items()):
+            yield '{}{}: '.format(', ' if number else '', _dumps(str(key)))
+            for chunk in iter_json(item, chunk_size):
+                yield chunk
+        yield '}'
+    elif isinstance(value, (list, tuple)) and len(value) > chunk_size:
+        yield '['
+        for start in range(0, len(value), chunk_size):
+            chunk = _dumps(list(value[start:start + chunk_size]))
+            yield '{}{}'.format(', ' if start else '', chunk[1:-1])
+        yield ']'
+    else:
+        yield _dumps(value)
+
+
+def write_json(report, report_file, chunk_size=10000):
+    """Write a report as json to a file, section by section
+
+    Parameters
+    ----------
+    report : dict
+        Report as provided by :meth:`~pywhip.pywhip.Whip.get_report`.
+    report_file : file
+        Text file object to write the json document to.
+    chunk_size : int
+        Number of list items to encode at once, see :func:`iter_json`.
+    """
+    for chunk in iter_json(report, chunk_size):
+        report_file.write(chunk)
+
+
+def iter_ndjson(report, chunk_size=10000):
+    """Encode a report as newline delimited json records
+
+    The first record (``"record": "summary"``) contains the report without
+    the `specified_fields` and `passed_row_ids`. Each field-rule combination
+    follows as a separate ``"record": "rule"`` with the `field` and `rule`
+    names added to its report, the passed row identifiers are provided in
+    ``"record": "passed_row_ids"`` records of at most ``chunk_size`` row
+    identifiers.
+
+    Parameters
+    ----------
+    report : dict
+        Report as provided by :meth:`~pywhip.pywhip.Whip.get_report`.
+    chunk_size : int
+        Maximum number of row identifiers in a `passed_row_ids` record.
+
+    Yields
+    ------
+    str
+        Json record, including the newline character.
+    """
+    results = report['results']
+    summary = {key: value for key, value in report.items()
+               if key != 'results'}
+    summary['results'] = {key: value for key, value in results.items()
+                          if key not in ['specified_fields',
+                                         'passed_row_ids']}
+    summary['record'] = 'summary'
+    yield _dumps(summary) + '\n'
+
+    for field, rules in results['specified_fields'].items():
+        for rule, info in rules.items():
+            record = {'record': 'rule', 'field': field, 'rule': rule}
+            record.update(info)
+            yield _dumps(record) + '\n'
+
+    passed_row_ids = results['passed_row_ids']
+    for start in range(0, len(passed_row_ids), chunk_size):
+        yield _dumps({'record': 'passed_row_ids',
+                      'row_ids': passed_row_ids[start:start + chunk_size]}
+                     ) + '\n'
+
+
+def write_ndjson(report, report_file, chunk_size=10000):
+    """Write a report as newline delimited json records to a file
+
+    Parameters
+    ----------
+    report : dict
+        Report as provided by :meth:`~pywhip.pywhip.Whip.get_report`.
+    report_file : file
+        Text file object to write the records to.
+    chunk_size : int
+        Maximum number of row identifiers in a record, see
+        :func:`iter_ndjson`.
+    """
+    for record in iter_ndjson(report, chunk_size):
+        report_file.write(record)
@@ -31,11 +31,17 @@ setup(
     packages=find_packages(include=['pywhip']),
     entry_points={
         'console_scripts': [
-            'whip_csv=pywhip.cli:main'
+            'whip_csv=pywhip.cli:main',
+            'whip_serve=pywhip.cli:serve'
         ]
     },
     include_package_data=True,
+    python_requires='>=3.8',
     install_requires=requirements,
+    extras_require={
+        'numpy': ['numpy'],
+        'arrow': ['numpy', 'pyarrow'],
+    },
     license="MIT license",
     zip_safe=False,
     keywords='pywhip, whip, Darwin_Core_Archive, data validation',
@@ -44,11 +50,8 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
-        "Programming Language :: Python :: 2",
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3 :: Only',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
         'Programming Language :: Python :: 3.10'
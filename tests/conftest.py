@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+"""Shared fixtures of the `pywhip` tests."""
+
+import json
+
+import pytest
+
+from benchmarks.generate import write_csv
+
+
+def _report_of(report):
+    """Report of a Whip instance (or the report itself) as plain json data
+    types, without the execution time"""
+    if not isinstance(report, dict):
+        report = report.get_report()
+    report = json.loads(json.dumps(report, default=str))
+    report['executed_at'] = None
+    return report
+
+
+@pytest.fixture
+def report_of():
+    """Function providing reports which can be compared between runs"""
+    return _report_of
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """Synthetic occurrence data set of 300 rows with many failing values"""
+    data_file = str(tmp_path / "occurrence.tsv")
+    write_csv(data_file, 300, error_rate=0.3, cardinality=20)
+    return data_file
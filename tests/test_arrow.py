@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the validation of Arrow data and Parquet files."""
+
+import pytest
+
+from pywhip import whip_csv, whip_arrow, whip_parquet
+from benchmarks.generate import load_specifications
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+pytest.importorskip("numpy")
+
+from pywhip.arrow import ArrowBatch, required_columns  # noqa: E402
+
+
+def _read(data_file):
+    """Read a tab-delimited file as Arrow table of string columns"""
+    with open(data_file, encoding='utf-8') as data:
+        header, *rows = [line.rstrip('\n').split('\t') for line in data]
+    return pa.table({field: [row[position] for row in rows] for
+                     position, field in enumerate(header)})
+
+
+def test_whip_arrow(data_file, report_of):
+    """Arrow validation provides the report of the csv validation"""
+    expected = report_of(whip_csv(data_file, load_specifications(), '\t'))
+    report = report_of(whip_arrow(_read(data_file), load_specifications(),
+                                  batch_size=64))
+    assert report == expected
+
+
+def test_whip_parquet(data_file, report_of, tmp_path):
+    """Parquet files are validated per row group"""
+    parquet_file = str(tmp_path / "occurrence.parquet")
+    pq.write_table(_read(data_file), parquet_file, row_group_size=70)
+    expected = report_of(whip_csv(data_file, load_specifications(), '\t',
+                                  maxentries=200))
+    report = report_of(whip_parquet(parquet_file, load_specifications(),
+                                    maxentries=200))
+    assert report == expected
+    assert report['results']['total_rows'] == 200
+
+
+@pytest.mark.parametrize("batch_size", [None, 0, -1])
+def test_whip_arrow_batch_size(tmp_path, batch_size):
+    """the rows are validated in batches of a positive number of rows"""
+    table = pa.table({'sex': ['male']})
+    parquet_file = str(tmp_path / "sex.parquet")
+    pq.write_table(table, parquet_file)
+    with pytest.raises(ValueError):
+        whip_arrow(table, {'sex': {'allowed': 'male'}},
+                   batch_size=batch_size)
+    with pytest.raises(ValueError):
+        whip_parquet(parquet_file, {'sex': {'allowed': 'male'}},
+                     batch_size=batch_size)
+
+
+def test_arrow_batch_encode():
+    """dictionary-encoded and missing values are encoded as strings"""
+    sex = pa.array(['male', 'female', 'male', None]).dictionary_encode()
+    batch = ArrowBatch(pa.record_batch({'sex': sex,
+                                        'age': [1, 1, 1, None]}))
+    uniques, codes = batch.encode(('sex',))
+    assert uniques == ['male', 'female', '']
+    assert list(codes) == [0, 1, 0, 2]
+    uniques, codes = batch.encode(('sex', 'age'))
+    assert uniques == [('male', '1'), ('female', '1'), ('', '')]
+    assert list(codes) == [0, 1, 0, 2]
+    assert batch.rows()[3] == {'sex': '', 'age': ''}
+
+
+def test_required_columns():
+    """only the columns of the specifications and conditions are read"""
+    columns = ['id', 'sex', 'age', 'weight']
+    assert required_columns({'age': {'if': {'sex': {'allowed': 'male'},
+                                            'min': 1}}}, columns) == \
+        ['sex', 'age']
+    assert required_columns({'age': {'dependencies': 'sex'}},
+                            columns) == columns
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the columnar batch validation of `pywhip`."""
+
+import csv
+
+import pytest
+
+from pywhip import whip_csv, Whip
+from pywhip.batches import condition_fields, encode_column, BatchValidator
+from benchmarks.generate import load_specifications
+
+
+def test_condition_fields():
+    """fields of if conditions are part of the column of a field"""
+    assert condition_fields({'allowed': ['male']}) == []
+    assert condition_fields({'if': {'sex': {'allowed': 'male'},
+                                    'allowed': 'a'}}) == ['sex']
+    assert condition_fields({'if': [{'sex': {'allowed': 'male'}},
+                                    {'sex': {'allowed': 'female'},
+                                     'age': {'min': 1}}]}) == ['sex', 'age']
+    assert condition_fields({'delimitedvalues': {
+        'delimiter': '|', 'if': {'sex': {'allowed': 'male'}}}}) == ['sex']
+    assert condition_fields({'dependencies': 'sex'}) is None
+
+
+def test_encode_column():
+    """values are encoded as distinct values and integer codes"""
+    batch = [{'sex': 'male', 'age': '1'}, {'sex': 'female', 'age': '1'},
+             {'sex': 'male', 'age': '1'}, {'age': '2'}]
+    uniques, codes = encode_column(batch, ('sex',))
+    assert uniques[:2] == ['male', 'female']
+    assert list(codes) == [0, 1, 0, 2]
+    uniques, codes = encode_column(batch, ('sex', 'age'))
+    assert uniques[:2] == [('male', '1'), ('female', '1')]
+    assert list(codes) == [0, 1, 0, 2]
+
+
+def test_batch_validator_columns():
+    """fields depending on the entire row are validated row by row"""
+    whip_it = Whip({'sex': {'allowed': 'male'},
+                    'age': {'if': {'sex': {'allowed': 'male'},
+                                   'min': 10}},
+                    'weight': {'dependencies': 'age'}})
+    batches = BatchValidator(whip_it.validation, whip_it.schema)
+    assert set(batches.columns) == {('sex',), ('age', 'sex')}
+    assert list(batches.row_validator.schema) == ['weight']
+
+    errors = batches.validate([{'sex': 'male', 'age': '5'},
+                               {'sex': 'female', 'age': '5'}])
+    assert [(field, rule) for field, rule, _, _ in errors[0]] == \
+        [('age', 'min_if_1')]
+    assert [(field, rule) for field, rule, _, _ in errors[1]] == \
+        [('sex', 'allowed')]
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 65536])
+def test_batch_report(data_file, report_of, batch_size):
+    """batch validation provides the report of the row validation"""
+    expected = report_of(whip_csv(data_file, load_specifications(), '\t'))
+    report = report_of(whip_csv(data_file, load_specifications(), '\t',
+                                batch_size=batch_size))
+    assert report == expected
+
+
+def test_check_record(data_file, report_of, capsys):
+    """single records get the errors of the row validation, without logging
+    the errors"""
+    whip_it = Whip(load_specifications())
+    whip_it.check({})  # the first record sets up the checker
+    whip_it._record_checker.cache_size = 16
+    with open(data_file) as dwc:
+        for row in csv.DictReader(dwc, delimiter='\t'):
+            assert sorted(whip_it.check(row)) == \
+                sorted(whip_it._row_errors(row))
+
+    assert report_of(whip_it) == report_of(Whip(load_specifications()))
+    assert capsys.readouterr().out == ""
+
+
+def test_check_record_rules():
+    """fields depending on the record, missing and unhashable values"""
+    whip_it = Whip({'sex': {'allowed': 'male'},
+                    'age': {'if': {'sex': {'allowed': 'male'},
+                                   'min': 10}},
+                    'weight': {'dependencies': 'age'}})
+    assert whip_it.check({'sex': 'male', 'age': '12', 'weight': '2'}) == []
+    assert [(field, rule) for field, rule, _, _ in whip_it.check(
+        {'sex': 'male', 'age': '5'})] == [('age', 'min_if_1')]
+    assert [(field, rule) for field, rule, _, _ in whip_it.check(
+        {'sex': 'female', 'weight': '2'})] == [('sex', 'allowed'),
+                                               ('weight', 'dependencies')]
+    record = {'sex': ['female'], 'age': '12'}
+    assert whip_it.check(record) == whip_it._row_errors(record)
+    assert whip_it.check(record)
+
+
+def test_check_record_value_types():
+    """equal values of other types are reported as provided"""
+    whip_it = Whip({'age': {'max': 0}})
+    for value in [1, 1.0, True]:
+        (_, _, reported, _), = whip_it.check({'age': value})
+        assert type(reported) is type(value)
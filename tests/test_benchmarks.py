@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the synthetic datasets of the benchmark suite."""
+
+from pywhip import whip_csv
+from benchmarks.generate import (generate_rows, write_csv,
+                                 load_specifications)
+
+
+def test_generate_deterministic():
+    """same arguments provide the same dataset"""
+    assert list(generate_rows(50, seed=1)) == list(generate_rows(50, seed=1))
+    assert list(generate_rows(50, seed=1)) != list(generate_rows(50, seed=2))
+
+
+def test_generate_cardinality():
+    """number of distinct values is limited by the cardinality"""
+    rows = generate_rows(500, error_rate=0., cardinality=10)
+    header = next(rows)
+    column = header.index('eventDate')
+    assert len({row[column] for row in rows}) == 10
+
+
+def test_generate_valid(tmp_path):
+    """dataset without errors complies with the specifications"""
+    data_file = str(tmp_path / "occurrence.tsv")
+    write_csv(data_file, 100, error_rate=0.)
+    report = whip_csv(data_file, load_specifications(), '\t').get_report()
+    assert report['results']['passed_rows'] == 100
+
+
+def test_generate_errors(tmp_path):
+    """error rate defines the fraction of failing values"""
+    data_file = str(tmp_path / "occurrence.tsv")
+    write_csv(data_file, 200, error_rate=0.2)
+    report = whip_csv(data_file, load_specifications(), '\t').get_report()
+    failed = report['results']['specified_fields']['datasetID']['allowed'][
+        'failed_rows']
+    assert 20 < failed < 60
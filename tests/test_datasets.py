@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the validation of collections of data files."""
+
+import os
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from pywhip import whip_csv, cli
+from pywhip.datasets import (find_data_files, is_collection, report_filename,
+                             whip_csv_files)
+from benchmarks.generate import write_csv, load_specifications, \
+    SPECIFICATIONS_FILE
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data_dir = tmp_path / "data"
+    (data_dir / "extra").mkdir(parents=True)
+    for name, error_rate in [("a.tsv", 0.), ("b.tsv", 0.3),
+                             ("extra/c.tsv", 0.6)]:
+        write_csv(str(data_dir / name), 40, error_rate=error_rate,
+                  cardinality=10)
+    (data_dir / ".hidden").write_text("id\n")
+    return data_dir
+
+
+def test_find_data_files(data_dir):
+    """directories, glob patterns and file lists are supported"""
+    base = str(data_dir)
+    assert find_data_files(base) == [os.path.join(base, "a.tsv"),
+                                     os.path.join(base, "b.tsv")]
+    assert find_data_files(os.path.join(base, "**", "*.tsv")) == [
+        os.path.join(base, "a.tsv"), os.path.join(base, "b.tsv"),
+        os.path.join(base, "extra", "c.tsv")]
+    file_list = data_dir / "files.txt"
+    file_list.write_text("{0}/b.tsv\n\n{0}/a.tsv\n".format(base))
+    assert find_data_files(str(file_list), file_list=True) == [
+        "{}/b.tsv".format(base), "{}/a.tsv".format(base)]
+    assert is_collection(base) and is_collection("data/*.tsv")
+    assert not is_collection(os.path.join(base, "a.tsv"))
+
+    # existing files with glob characters are single data files
+    literal = os.path.join(base, "a[1].tsv")
+    os.rename(os.path.join(base, "a.tsv"), literal)
+    assert not is_collection(literal)
+    assert find_data_files(literal) == [literal]
+    with pytest.raises(ValueError):
+        find_data_files(os.path.join(base, "*.csv"))
+
+
+def test_report_filename():
+    """the directory structure of the data files is kept"""
+    root = os.path.abspath("data")
+    assert report_filename(os.path.join("data", "extra", "c.tsv"), root,
+                           "json") == "files/extra/c.tsv.json"
+
+
+def test_whip_csv_files(data_dir, tmp_path):
+    """a report is written for each file, unreadable files are listed"""
+    data_files = find_data_files(str(data_dir / "**" / "*.tsv")) + \
+        [str(data_dir / "missing.tsv")]
+    output_dir = str(tmp_path / "reports")
+    summary = whip_csv_files(data_files, load_specifications(), '\t',
+                             output_dir, 'json', workers=2, batch_size=16)
+
+    with open(os.path.join(output_dir, "summary.json")) as summary_file:
+        index = json.load(summary_file)
+    assert os.path.exists(os.path.join(output_dir, "index.html"))
+    assert index['total_files'] == 4
+    assert index['total_rows'] == 120
+    assert [item['report'] for item in index['files']] == [
+        "files/a.tsv.json", "files/b.tsv.json", "files/extra/c.tsv.json",
+        None]
+    assert index['files'][3]['error'].startswith('FileNotFoundError')
+    assert summary.files_per_second > 0
+
+    expected = whip_csv(data_files[1], load_specifications(), '\t')
+    with open(os.path.join(output_dir, "files", "b.tsv.json")) as report_file:
+        report = json.load(report_file)
+    assert report['results']['specified_fields'] == json.loads(json.dumps(
+        expected.get_report()['results']['specified_fields'], default=str))
+
+
+def test_whip_csv_files_same_stem(tmp_path):
+    """data files only differing in their extension get their own report"""
+    data_files = [str(tmp_path / "a.tsv"), str(tmp_path / "a.csv")]
+    write_csv(data_files[0], 20, error_rate=0.)
+    write_csv(data_files[1], 30, error_rate=0.5)
+    output_dir = str(tmp_path / "reports")
+    summary = whip_csv_files(data_files, load_specifications(), '\t',
+                             output_dir, 'json', workers=1)
+
+    assert [item['report'] for item in summary.files] == [
+        "files/a.tsv.json", "files/a.csv.json"]
+    for item in summary.files:
+        with open(os.path.join(output_dir, item['report'])) as report_file:
+            report = json.load(report_file)
+        assert report['results']['total_rows'] == item['total_rows']
+    assert [item['total_rows'] for item in summary.files] == [20, 30]
+
+
+def test_cli_data_directory(data_dir, tmp_path):
+    """command line interface validates all files of a directory"""
+    output_dir = str(tmp_path / "reports")
+    result = CliRunner().invoke(cli.main, [
+        str(data_dir), SPECIFICATIONS_FILE, output_dir, '--delimiter', '\t',
+        '--workers', '1', '--progress'])
+    assert result.exit_code == 0, result.output
+    assert sorted(os.listdir(os.path.join(output_dir, "files"))) == \
+        ["a.tsv.html", "b.tsv.html"]
+    assert "files/s" in result.output
+
+    result = CliRunner().invoke(cli.main, [
+        str(data_dir), SPECIFICATIONS_FILE, output_dir, '--tail', 'x.json'])
+    assert result.exit_code == 2
+
+
+def test_cli_defaults(tmp_path):
+    """the delimiter and output file have working defaults"""
+    data_file = str(tmp_path / "occurrence.csv")
+    with open(data_file, "w") as csv_file:
+        csv_file.write("occurrenceID,sex\n1,male\n2,unknown\n")
+
+    runner = CliRunner()
+    with runner.isolated_filesystem(temp_dir=str(tmp_path)):
+        result = runner.invoke(cli.main, [
+            data_file, os.path.join(DATA_DIR, "example_dwc_occurrence.yaml")])
+        assert result.exit_code == 0, result.output
+        assert os.path.exists("index.html")
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the validation of pandas DataFrames."""
+
+import pytest
+
+from pywhip import whip_csv, whip_dataframe, whip_dataframe_chunks
+from benchmarks.generate import load_specifications
+
+pd = pytest.importorskip("pandas")
+
+from pywhip.frames import FrameBatch  # noqa: E402
+
+
+def _read(data_file, **kwargs):
+    return pd.read_csv(data_file, sep='\t', dtype=str, keep_default_na=False,
+                       **kwargs)
+
+
+def test_whip_dataframe(data_file, report_of):
+    """DataFrame validation provides the report of the csv validation"""
+    expected = report_of(whip_csv(data_file, load_specifications(), '\t'))
+    report = report_of(whip_dataframe(_read(data_file), load_specifications(),
+                                      batch_size=64))
+    assert report == expected
+
+
+def test_whip_dataframe_chunks(data_file, report_of):
+    """chunks are validated as a single data set"""
+    expected = report_of(whip_csv(data_file, load_specifications(), '\t',
+                                  maxentries=200))
+    report = report_of(whip_dataframe_chunks(_read(data_file, chunksize=70),
+                                             load_specifications(),
+                                             maxentries=200))
+    assert report == expected
+    assert report['results']['total_rows'] == 200
+
+
+@pytest.mark.parametrize("batch_size", [None, 0, -1])
+def test_whip_dataframe_batch_size(batch_size):
+    """the rows are validated in batches of a positive number of rows"""
+    with pytest.raises(ValueError):
+        whip_dataframe(pd.DataFrame({'sex': ['male']}),
+                       {'sex': {'allowed': 'male'}}, batch_size=batch_size)
+
+
+def test_whip_dataframe_missing_values():
+    """missing values are validated as empty strings"""
+    frame = pd.DataFrame({'sex': ['male', None, float('nan'), ''],
+                          'age': [1, 2, None, 4]})
+    whip_it = whip_dataframe(frame, {'sex': {'allowed': 'male'},
+                                     'age': {'empty': True, 'max': 3}})
+    fields = whip_it.get_report()['results']['specified_fields']
+    assert fields['sex']['empty']['failed_rows'] == 3
+    assert fields['sex']['allowed']['failed_rows'] == 0
+    assert fields['age']['max']['samples'] == {
+        '4.0': {'message': 'max value is 3', 'first_row': 4,
+                'failed_rows': 1}}
+
+
+def test_frame_batch_encode():
+    """combined columns are encoded in order of appearance"""
+    batch = FrameBatch(pd.DataFrame({'sex': ['male', 'female', 'male', None],
+                                     'age': ['1', '1', '1', '2']}))
+    uniques, codes = batch.encode(('sex', 'age'))
+    assert uniques == [('male', '1'), ('female', '1'), ('', '2')]
+    assert list(codes) == [0, 1, 0, 2]
+    uniques, codes = batch.encode(('weight',))
+    assert list(codes) == [0, 0, 0, 0]
+    assert batch.rows()[3] == {'sex': '', 'age': '2'}
+
+
+def test_whip_dataframe_row_validation():
+    """fields depending on the entire row are validated row by row"""
+    frame = pd.DataFrame({'sex': ['male', None], 'age': ['1', '2']})
+    whip_it = whip_dataframe(frame, {'sex': {'empty': True},
+                                     'age': {'dependencies': 'sex'}})
+    fields = whip_it.get_report()['results']['specified_fields']
+    assert fields['age']['dependencies']['failed_rows'] == 0
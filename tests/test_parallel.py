@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the multi-process validation of CSV files."""
+
+import io
+
+import pytest
+
+from pywhip import whip_csv, WhipPool
+from pywhip.parallel import SharedSlots, iter_blocks
+from benchmarks.generate import write_csv, load_specifications
+
+
+def test_iter_blocks():
+    """blocks contain complete records and skip the header"""
+    handle = io.StringIO('id,remarks\n1,"multi\nline"\n\n2,a\n3,b\n4,c\n')
+    blocks = list(iter_blocks(handle, ',', block_rows=2, block_size=1000))
+    assert blocks == [('1,"multi\nline"\n\n2,a\n', 2), ('3,b\n4,c\n', 2)]
+
+    handle = io.StringIO('id\n1\n2\n3\n')
+    assert list(iter_blocks(handle, ',', 10, 1000, maxentries=2)) == \
+        [('1\n2\n', 2)]
+
+
+def test_shared_slots():
+    """slots are written at their offset and reused"""
+    slots = SharedSlots(2, slot_size=4)
+    try:
+        assert slots.write(b'ab') == 0
+        assert slots.write(b'cdef') == 1
+        assert not slots.available
+        slots.release(0)
+        assert slots.write(b'gh') == 0
+        assert bytes(slots.memory.buf[:8]) == b'gh\x00\x00cdef'
+    finally:
+        slots.close()
+
+
+@pytest.mark.parametrize("batch_size, maxentries", [(None, None),
+                                                    (64, 250)])
+def test_whip_csv_workers(data_file, report_of, batch_size, maxentries):
+    """the workers provide the report of the single process validation"""
+    expected = report_of(whip_csv(data_file, load_specifications(), '\t',
+                                  maxentries=maxentries))
+    report = report_of(whip_csv(data_file, load_specifications(), '\t',
+                                maxentries=maxentries, batch_size=batch_size,
+                                workers=2))
+    assert report == expected
+
+    with pytest.raises(ValueError):
+        whip_csv(data_file, load_specifications(), '\t', workers=2,
+                 pipeline=True)
+
+
+def test_whip_pool_blocks(data_file, report_of):
+    """blocks validated by different workers are merged in order"""
+    expected = report_of(whip_csv(data_file, load_specifications(), '\t'))
+
+    with WhipPool(load_specifications(), 2, block_rows=40,
+                  slot_size=2 ** 12) as pool:
+        assert report_of(pool.whip_csv(data_file, '\t')) == expected
+        # the compiled specifications are reused for the next file
+        assert report_of(pool.whip_csv(data_file, '\t')) == expected
+
+
+def test_whip_pool_map_csv(tmp_path, report_of, capsys):
+    """each file is validated by a worker, reported in order"""
+    data_files = []
+    for error_rate in [0., 0.3, 0.6]:
+        data_file = str(tmp_path / "occurrence_{}.tsv".format(error_rate))
+        write_csv(data_file, 100, error_rate=error_rate, cardinality=20)
+        data_files.append(data_file)
+
+    with WhipPool(load_specifications(), 2, batch_size=32) as pool:
+        reports = [(data_file, report_of(whip_it)) for data_file, whip_it in
+                   pool.map_csv(data_files, '\t', maxentries=80)]
+    # nothing is printed for the individual files
+    assert capsys.readouterr().out == ""
+    assert [data_file for data_file, _ in reports] == data_files
+    for data_file, report in reports:
+        assert report == report_of(whip_csv(data_file, load_specifications(),
+                                            '\t', maxentries=80))
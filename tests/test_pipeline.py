@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the pipelined reading of the input data."""
+
+import io
+import os
+import csv
+import threading
+
+import pytest
+
+from pywhip import whip_csv
+from pywhip.pipeline import Stage, QueueReader, CSVPipeline, threaded_rows
+from benchmarks.generate import load_specifications
+
+
+def test_stage():
+    """items are provided in order and exceptions are raised"""
+    assert list(Stage(range(100), queue_size=2)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise KeyError('row')
+
+    with pytest.raises(KeyError):
+        list(Stage(failing()))
+
+
+def test_stage_stops():
+    """the thread stops when the consumer stops iterating"""
+    closed = threading.Event()
+
+    def rows():
+        try:
+            while True:
+                yield {'sex': 'male'}
+        finally:
+            closed.set()
+
+    documents = threaded_rows(rows(), chunk_size=10, queue_size=2)
+    assert next(documents) == {'sex': 'male'}
+    documents.close()
+    assert closed.is_set()
+
+
+def test_queue_reader():
+    """blocks are read as a single binary stream"""
+    reader = QueueReader(iter([b'ab', b'', b'cde', b'f']))
+    stream = io.BufferedReader(reader, buffer_size=2)
+    assert stream.read(4) == b'abcd'
+    assert stream.read() == b'ef'
+    assert reader.position == 6
+
+
+def test_csv_pipeline(tmp_path):
+    """rows split over blocks are parsed as by the csv reader"""
+    data_file = str(tmp_path / "occurrence.csv")
+    with open(data_file, "w") as data:
+        data.write('id,remarks\n1,"multi\nline"\n2,"a,b"\r\n3,\n')
+    pipeline = CSVPipeline(data_file, ',', chunk_size=2, block_size=3,
+                           queue_size=1)
+    with open(data_file, "r") as data:
+        expected = list(csv.DictReader(data, delimiter=','))
+    assert list(pipeline) == expected
+    assert pipeline.position == os.path.getsize(data_file)
+
+
+def test_whip_csv_pipeline(tmp_path, data_file, report_of):
+    """the pipeline provides the report of the serial reading"""
+    expected = report_of(whip_csv(data_file, load_specifications(), '\t',
+                                  maxentries=250))
+    report = report_of(whip_csv(data_file, load_specifications(), '\t',
+                                maxentries=250, pipeline=True))
+    assert report == expected
+
+    with pytest.raises(ValueError):
+        whip_csv(data_file, load_specifications(), '\t', pipeline=True,
+                 tail=str(tmp_path / "tail.json"))
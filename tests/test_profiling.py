@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the profiling of `pywhip` validations."""
+
+import os
+
+import yaml
+import pytest
+
+from pywhip import whip_csv, Whip
+from pywhip.profiling import MemoryProfile
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def specifications():
+    with open(os.path.join(DATA_DIR, "example_dwc_occurrence.yaml")) as specs:
+        return yaml.load(specs, Loader=yaml.FullLoader)
+
+
+@pytest.fixture
+def profiled(specifications):
+    return whip_csv(os.path.join(DATA_DIR, "example_dwc_occurrence_draft.tsv"),
+                    specifications, '\t', profile=True)
+
+
+def test_profile_stages(profiled):
+    """each validation stage is timed"""
+    stages = profiled.get_report()['profile']['stages']
+    assert set(stages) == {'reading', 'validation', 'logging', 'report'}
+    assert stages['validation']['calls'] == 5
+    assert stages['report']['calls'] == 1
+
+
+def test_profile_rules(profiled):
+    """rules are timed with the field-rule names of the report"""
+    fields = profiled.get_report()['profile']['specified_fields']
+    assert fields['type']['allowed']['calls'] == 5
+    assert 'allowed_if_1' in fields['type']
+    assert 'regex_delimitedvalue' in fields['recordedBy']
+    for rules in fields.values():
+        for timing in rules.values():
+            assert timing['seconds'] >= 0.
+
+
+def test_profile_html(profiled):
+    """profile is part of the html report"""
+    assert '<h2>Profile</h2>' in profiled.get_report('html')
+
+
+def test_no_profile(specifications):
+    """profile is only reported when enabled"""
+    whip_it = whip_csv(os.path.join(DATA_DIR,
+                                    "example_dwc_occurrence_draft.tsv"),
+                       specifications, '\t')
+    assert 'profile' not in whip_it.get_report()
+    assert '<h2>Profile</h2>' not in whip_it.get_report('html')
+    assert Whip(specifications)._profile is None
+
+
+def test_memory_profile(specifications):
+    """memory usage is traced for each stage"""
+    whip_it = whip_csv(os.path.join(DATA_DIR,
+                                    "example_dwc_occurrence_draft.tsv"),
+                       specifications, '\t', memory_profile=True)
+    whip_it.get_report('html')
+    whip_it._memory_profile.stop()
+    memory = whip_it._memory_profile.build_memory_report()
+    assert list(memory) == ['header', 'validation', 'report', 'html']
+    for usage in memory.values():
+        assert usage['peak'] >= usage['retained']
+        assert usage['peak_per_million_rows'] == 1e6 * usage['peak'] / 5
+
+
+def test_memory_profile_nested():
+    """peak of a nested stage is part of the enclosing stage"""
+    memory = MemoryProfile()
+    with memory.stage('outer'):
+        with memory.stage('inner'):
+            content = bytearray(1000000)
+        del content
+    memory.stop()
+    assert memory.stages['inner'][0] >= 1000000
+    assert memory.stages['outer'][0] >= 1000000
+    assert memory.stages['outer'][1] < 1000000
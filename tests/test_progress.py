@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the progress reporting of `pywhip`."""
+
+import os
+import json
+
+import yaml
+import pytest
+from click.testing import CliRunner
+
+from pywhip import whip_csv, cli
+from pywhip.progress import Progress, InterimReport, peak_rss
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DATA_FILE = os.path.join(DATA_DIR, "example_dwc_occurrence_draft.tsv")
+
+
+@pytest.fixture
+def specifications():
+    with open(os.path.join(DATA_DIR, "example_dwc_occurrence.yaml")) as specs:
+        return yaml.load(specs, Loader=yaml.FullLoader)
+
+
+def test_progress_messages(specifications):
+    """progress reports rows, bytes, throughput and memory"""
+    messages = []
+    progress = Progress(every=2, seconds=0, echo=messages.append)
+    whip_csv(DATA_FILE, specifications, '\t', hooks=[progress])
+
+    assert len(messages) == 3  # row 2, 4 and the end
+    assert messages[-1].startswith('5 rows | 100.0%')
+    assert 'rows/s' in messages[-1]
+    if peak_rss() is not None:
+        assert 'peak RSS' in messages[-1]
+
+
+def test_interim_report(tmp_path, specifications):
+    """interim reports contain the rows validated so far"""
+    report_file = str(tmp_path / "interim.json")
+    reports = []
+
+    class CollectReport(InterimReport):
+        def write(self, whip_it):
+            super(CollectReport, self).write(whip_it)
+            with open(self.filename) as report:
+                reports.append(json.load(report))
+
+    whip_csv(DATA_FILE, specifications, '\t',
+             hooks=[CollectReport(report_file, every=2)])
+    assert [report['results']['total_rows'] for report in reports] == [2, 4]
+
+
+def test_interim_report_extension():
+    with pytest.raises(ValueError):
+        InterimReport('report.txt')
+    for filename in ['report.json', 'report.ndjson', 'report.html']:
+        assert InterimReport(filename).filename == filename
+
+
+def test_cli_interim_report_extension(tmp_path):
+    """command line interface rejects unsupported interim reports"""
+    result = CliRunner().invoke(cli.main, [
+        DATA_FILE, os.path.join(DATA_DIR, "example_dwc_occurrence.yaml"),
+        str(tmp_path / "report.html"), '--delimiter', '\t',
+        '--interim-report', str(tmp_path / "interim.txt")])
+    assert result.exit_code == 2
+    assert "--interim-report" in result.output
@@ -3,11 +3,16 @@
 
 """Tests for `pywhip` package."""
 
+import re
+import sys
+import subprocess
+
 import pytest
 
 from click.testing import CliRunner
 
 from pywhip import cli
+from pywhip.templates import get_template
 
 
 @pytest.fixture
@@ -27,5 +32,19 @@ def test_command_line_interface():
     assert result.exit_code == 2 # provide error on missing input
     help_result = runner.invoke(cli.main, ['--help'])
     assert help_result.exit_code == 0
-    assert '--help            Show this message and exit.' in \
-           help_result.output
+    assert re.search(r'--help\s+Show this message and exit.',
+                     help_result.output)
+
+
+def test_lazy_imports():
+    """heavy dependencies are only imported when used"""
+    code = ("import sys, pywhip; print(' '.join(sorted(set(sys.modules) & "
+            "{'dwca', 'pandas', 'cerberus', 'jinja2', 'pkg_resources', "
+            "'dateutil', 'rfc3987'})))")
+    imported = subprocess.check_output([sys.executable, '-c', code])
+    assert imported.strip() == b''
+
+
+def test_template_compiled_once():
+    """report template is compiled once per process"""
+    assert get_template('template.html') is get_template('template.html')
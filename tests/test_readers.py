@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the data readers of `pywhip`."""
+
+import csv
+
+from pywhip.readers import CSVReader
+
+
+def _write(filename, content):
+    with open(filename, "wb") as data_file:
+        data_file.write(content)
+
+
+def test_csv_reader_rows(tmp_path):
+    """reader provides the same rows as the standard library reader"""
+    data_file = str(tmp_path / "data.csv")
+    _write(data_file, b'id,name\n1,"a, b"\n2,"multi\nline"\n\n3,c\n')
+
+    reader = CSVReader(data_file, ',')
+    assert reader.read_header() == ['id', 'name']
+    with open(data_file, newline='') as dwc:
+        assert list(reader) == list(csv.DictReader(dwc))
+    assert reader.offset == reader.size
+
+
+def test_csv_reader_offset(tmp_path):
+    """reader continues from a given offset"""
+    data_file = str(tmp_path / "data.csv")
+    _write(data_file, b'id,name\n1,a\n2,b\n')
+
+    reader = CSVReader(data_file, ',')
+    rows = iter(reader)
+    next(rows)
+    assert reader.offset == len(b'id,name\n1,a\n')
+
+    continued = CSVReader(data_file, ',', offset=reader.offset,
+                          fieldnames=reader.fieldnames)
+    assert list(continued) == [{'id': '2', 'name': 'b'}]
+
+
+def test_csv_reader_complete_lines(tmp_path):
+    """unfinished last line is ignored when only complete lines are read"""
+    data_file = str(tmp_path / "data.csv")
+    _write(data_file, b'id,name\n1,a\n2,b')
+
+    assert len(list(CSVReader(data_file, ','))) == 2
+    reader = CSVReader(data_file, ',', complete_lines=True)
+    assert list(reader) == [{'id': '1', 'name': 'a'}]
+    assert reader.offset == len(b'id,name\n1,a\n')
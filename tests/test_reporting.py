@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the reporting of `pywhip`."""
+
+import os
+import json
+
+import yaml
+import pytest
+
+from pywhip import whip_csv
+from pywhip.reporters import (SpecificationErrorHandler, MessageCodes,
+                              WhipReportException)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def whip_it():
+    with open(os.path.join(DATA_DIR, "example_dwc_occurrence.yaml")) as specs:
+        specifications = yaml.load(specs, Loader=yaml.FullLoader)
+    return whip_csv(os.path.join(DATA_DIR, "example_dwc_occurrence_draft.tsv"),
+                    specifications, '\t')
+
+
+def test_html_report(whip_it):
+    """html report contains the details of each field"""
+    html = whip_it.get_report('html')
+    assert '<h2>Summary</h2>' in html
+    for field in whip_it.get_report()['results']['specified_fields']:
+        assert '<h4 id="{}">'.format(field) in html
+
+
+def test_html_shards(tmp_path, whip_it):
+    """sharded html report has a shard with the details of each field"""
+    index_file = str(tmp_path / "report" / "index.html")
+    whip_it.create_html_shards(index_file)
+    with open(index_file) as index_page:
+        html = index_page.read()
+    assert '<h2>Summary</h2>' in html
+
+    specified_fields = whip_it.get_report()['results']['specified_fields']
+    for shard_id, field in enumerate(sorted(specified_fields)):
+        shard = "index_fields/{}.js".format(shard_id)
+        assert 'data-shard="{}"'.format(shard) in html
+        with open(str(tmp_path / "report" / shard)) as shard_file:
+            content = shard_file.read()
+        prefix = "whipShard({}, ".format(shard_id)
+        assert content.startswith(prefix)
+        assert json.loads(content[len(prefix):-3]) == json.loads(
+            json.dumps(specified_fields[field], default=str))
+    # the samples are only part of the shards
+    messages = [sample['message'] for rules in specified_fields.values()
+                for info in rules.values()
+                for sample in info['samples'].values()]
+    assert messages
+    assert not any(message in html for message in messages)
+
+
+def test_error_handler_samples():
+    """logged errors are reported by value, ordered on the failed rows"""
+    handler = SpecificationErrorHandler("1, 2")
+    handler.add("3", "unallowed value 3", 4)
+    handler.add("5", "unallowed value 5", 2)
+    handler.add("5", "unallowed value 5", 6)
+    handler.add("5", "unallowed value 5", 6)
+    assert list(handler[("5", "unallowed value 5")]) == [2, 6]
+    assert set(handler) == {("3", "unallowed value 3"),
+                            ("5", "unallowed value 5")}
+    report = handler.build_error_report(10, 1)
+    assert report == {'constraint': "1, 2",
+                      'passed_rows': 7,
+                      'failed_rows': 3,
+                      'samples': {"5": {'message': "unallowed value 5",
+                                        'first_row': 2,
+                                        'failed_rows': 2}}}
+
+
+def test_error_handler_state():
+    """dumped errors are merged with the logged errors"""
+    messages = MessageCodes()
+    handler = SpecificationErrorHandler("", messages)
+    handler.add("a", "message", 5)
+    other = SpecificationErrorHandler("", messages)
+    other.update_samples([["a", "message", [1, 2]], ["b", "message", [3]]])
+    other.update_samples(handler.dump_samples())
+    assert other.dump_samples() == [["a", "message", [1, 2, 5]],
+                                    ["b", "message", [3]]]
+    assert len(messages) == 1
+    assert other.failed_rows_count() == 4
+
+
+def test_error_handler_failed_rows_count():
+    """distinct failed rows are counted while logging"""
+    handler = SpecificationErrorHandler("")
+    handler.add("a", "message", 1)
+    handler.add("b", "message", 1)
+    handler.add("a", "message", 3)
+    assert handler.failed_rows_count() == 2
+    handler.update_samples([["c", "message", [4, 5]]])
+    assert handler.failed_rows_count() == 4
+    handler.update_samples([["d", "message", [1, 2]]])
+    assert handler._failed_rows_count is None
+    assert handler.failed_rows_count() == 5
+
+
+def test_error_handler_unique_messages():
+    """a value linked to multiple messages can not be reported"""
+    handler = SpecificationErrorHandler("")
+    handler.add("a", "message", 1)
+    handler.add("a", "other message", 2)
+    assert len(handler) == 2
+    with pytest.raises(WhipReportException):
+        handler.build_error_report(2, 10)
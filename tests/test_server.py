@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the local HTTP validation service."""
+
+import json
+import asyncio
+import threading
+from http.client import HTTPConnection
+
+import pytest
+import yaml
+
+from pywhip import whip_csv, whip_dwca
+from pywhip.server import WhipServer, SchemaCache
+from benchmarks.generate import (write_dwca, load_specifications,
+                                 SPECIFICATIONS_FILE)
+
+
+@pytest.fixture(scope="module")
+def service():
+    server = WhipServer(workers=1, batch_size=16, block_rows=25)
+    loop = asyncio.new_event_loop()
+    listener = loop.run_until_complete(server.start('127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    yield HTTPConnection(*listener.sockets[0].getsockname()[:2])
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    listener.close()
+    loop.run_until_complete(listener.wait_closed())
+    loop.close()
+    server.close()
+
+
+def _request(connection, method, path, body=None):
+    connection.request(method, path, body=body)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read().decode('utf-8'))
+
+
+def _register(connection):
+    with open(SPECIFICATIONS_FILE, 'rb') as specifications:
+        status, content = _request(connection, 'POST', '/specifications',
+                                   specifications.read())
+    assert status == 201
+    return content['specification']
+
+
+def test_schema_cache():
+    """the least recently used specifications are removed"""
+    cache = SchemaCache(2)
+    cache.add('a', 1)
+    cache.add('b', 2)
+    assert cache.get('a') == 1
+    cache.add('c', 3)
+    assert 'b' not in cache and len(cache) == 2
+
+
+def test_validate_csv(service, data_file, report_of):
+    """streamed CSV uploads get the report of whip_csv"""
+    key = _register(service)
+    # registering the same specifications reuses the compiled ones
+    assert _register(service) == key
+
+    def chunks():
+        with open(data_file, 'rb') as data:
+            for block in iter(lambda: data.read(1000), b''):
+                yield block
+
+    for maxentries in [None, 50]:
+        path = '/validate/csv?specification={}&delimiter=%09'.format(key)
+        if maxentries:
+            path += '&maxentries={}'.format(maxentries)
+        status, report = _request(service, 'POST', path, chunks())
+        assert status == 200
+        expected = whip_csv(data_file, load_specifications(), '\t',
+                            maxentries=maxentries).get_report()
+        assert report_of(report) == report_of(expected)
+
+
+def test_validate_dwca(service, tmp_path, report_of):
+    """archives are validated once uploaded"""
+    data_file = str(tmp_path / "occurrence.zip")
+    write_dwca(data_file, 60, error_rate=0.3, cardinality=20)
+    key = _register(service)
+    with open(data_file, 'rb') as dwca:
+        status, report = _request(
+            service, 'POST', '/validate/dwca?specification={}'.format(key),
+            dwca.read())
+    assert status == 200
+    expected = whip_dwca(data_file, load_specifications()).get_report()
+    assert report_of(report) == report_of(expected)
+
+
+def test_service_errors(service):
+    """requests with errors get an error status and message"""
+    key = _register(service)
+    status, content = _request(service, 'GET', '/health')
+    assert status == 200 and key in content['specifications']
+
+    status, content = _request(service, 'POST',
+                               '/validate/csv?specification=unknown', b'id')
+    assert status == 404 and 'register' in content['error']
+    status, _ = _request(service, 'POST', '/specifications',
+                         yaml.safe_dump({'sex': {'allowd': ['male']}}))
+    assert status == 400
+    status, _ = _request(service, 'GET', '/validate/csv')
+    assert status == 405
+    status, _ = _request(service, 'GET', '/unknown')
+    assert status == 404
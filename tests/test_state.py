@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the stored state handling of `pywhip`."""
+
+import os
+import csv
+import json
+import zipfile
+
+import yaml
+import pytest
+
+from pywhip import whip_csv, whip_dwca, Whip
+from pywhip.state import (RowManifest, Checkpoint, row_hash,
+                          specification_hash, compress_row_ids,
+                          expand_row_ids, load_state)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def specifications():
+    with open(os.path.join(DATA_DIR, "example_dwc_occurrence.yaml")) as specs:
+        return yaml.load(specs, Loader=yaml.FullLoader)
+
+
+@pytest.fixture
+def csv_rows():
+    """Rows of the example data set"""
+    with open(os.path.join(DATA_DIR, "example_dwc_occurrence_draft.tsv")) as dwc:
+        return list(csv.reader(dwc, delimiter='\t'))
+
+
+def _write_rows(filename, rows):
+    with open(filename, "w", newline='') as dwc:
+        csv.writer(dwc, delimiter='\t').writerows(rows)
+
+
+def _write_dwca(filename, rows):
+    fields = ''.join('<field index="{}" term="http://rs.tdwg.org/dwc/terms/'
+                     '{}"/>'.format(index, term) for index, term in
+                     enumerate(rows[0]))
+    meta = ('<archive xmlns="http://rs.tdwg.org/dwc/text/">'
+            '<core encoding="UTF-8" fieldsTerminatedBy="\\t" '
+            'linesTerminatedBy="\\n" fieldsEnclosedBy="" '
+            'ignoreHeaderLines="1" '
+            'rowType="http://rs.tdwg.org/dwc/terms/Occurrence">'
+            '<files><location>occurrence.txt</location></files>'
+            '<id index="0"/>{}</core></archive>'.format(fields))
+    content = ''.join('\t'.join(row) + '\n' for row in rows)
+    with zipfile.ZipFile(filename, 'w') as dwca:
+        dwca.writestr('meta.xml', meta)
+        dwca.writestr('occurrence.txt', content)
+
+
+class InterruptedCheckpoint(Checkpoint):
+    """Checkpoint stopping the validation after the first checkpoint"""
+
+    def save(self, whip_it):
+        super(InterruptedCheckpoint, self).save(whip_it)
+        raise KeyboardInterrupt
+
+
+def _results(whip_it):
+    results = whip_it.get_report('json')['results']
+    return {key: value for key, value in results.items() if key not in
+            ['unspecified_fields', 'unknown_fields']}
+
+
+def test_row_hash():
+    """row hash depends on the values and their order only"""
+    assert row_hash({'a': '1', 'b': '2'}) == row_hash({'c': '1', 'd': '2'})
+    assert row_hash({'a': '1', 'b': '2'}) != row_hash({'a': '2', 'b': '1'})
+    assert row_hash({'a': '1', 'b': None}) != row_hash({'a': '1', 'b': ''})
+
+
+def test_specification_hash(specifications):
+    """hash changes with the specifications"""
+    reference = specification_hash(specifications)
+    assert reference == specification_hash(dict(specifications))
+    specifications['occurrenceID']['empty'] = True
+    assert reference != specification_hash(specifications)
+
+
+def test_manifest_reuse(tmp_path, specifications, csv_rows):
+    """unchanged rows are not validated again"""
+    data_file = str(tmp_path / "data.tsv")
+    manifest_file = str(tmp_path / "data.whip")
+    _write_rows(data_file, csv_rows)
+
+    schema_hash = Whip(specifications)._schema_hash
+    whip_csv(data_file, specifications, '\t', manifest=manifest_file)
+    assert os.path.exists(manifest_file)
+
+    manifest = RowManifest(manifest_file)
+    manifest.start(schema_hash, csv_rows[0])
+    rows = csv.DictReader(open(data_file), delimiter='\t')
+    for row_id, row in enumerate(rows, start=1):
+        manifest.row_errors(row, row_id, lambda row: pytest.fail())
+    assert manifest.reused_rows == len(csv_rows) - 1
+    assert manifest.validated_rows == 0
+
+
+def test_manifest_incremental_report(tmp_path, specifications, csv_rows):
+    """report of incremental validation equals a full validation"""
+    data_file = str(tmp_path / "data.tsv")
+    manifest_file = str(tmp_path / "data.whip")
+    _write_rows(data_file, csv_rows)
+    whip_csv(data_file, specifications, '\t', manifest=manifest_file)
+
+    # change a row, drop a row and add a new one
+    type_column = csv_rows[0].index('type')
+    csv_rows[1][type_column] = 'Evnt'
+    new_row = list(csv_rows[2])
+    new_row[csv_rows[0].index('occurrenceID')] = 'INBO:VLINDERS:NEW'
+    csv_rows = csv_rows[:2] + csv_rows[3:] + [new_row]
+    _write_rows(data_file, csv_rows)
+
+    incremental = whip_csv(data_file, specifications, '\t',
+                           manifest=manifest_file)
+    full = whip_csv(data_file, specifications, '\t')
+    assert _results(incremental) == _results(full)
+    assert full.get_report()['results']['specified_fields']['type'][
+        'allowed']['samples']['Evnt']['failed_rows'] == 1
+
+
+def test_manifest_other_specifications(tmp_path, specifications, csv_rows):
+    """manifest is not used when the specifications changed"""
+    data_file = str(tmp_path / "data.tsv")
+    manifest_file = str(tmp_path / "data.whip")
+    _write_rows(data_file, csv_rows)
+    whip_csv(data_file, specifications, '\t', manifest=manifest_file)
+
+    specifications['type']['allowed'] = ['Evnt']
+    manifest = RowManifest(manifest_file)
+    manifest.start(Whip(specifications)._schema_hash, csv_rows[0])
+    assert manifest._previous == {}
+
+
+def test_compress_row_ids():
+    """consecutive row identifiers are stored as ranges"""
+    row_ids = [1, 2, 3, 5, 8, 9]
+    assert compress_row_ids(row_ids) == [1, 3, 5, 1, 8, 2]
+    assert expand_row_ids(compress_row_ids(row_ids)) == row_ids
+    assert compress_row_ids([]) == []
+
+
+def test_tail_appended_rows(tmp_path, specifications, csv_rows):
+    """tail mode validates the appended rows only"""
+    data_file = str(tmp_path / "data.tsv")
+    state_file = str(tmp_path / "data.state")
+    _write_rows(data_file, csv_rows[:3])
+    first = whip_csv(data_file, specifications, '\t', tail=state_file)
+    assert first.get_report()['results']['total_rows'] == 2
+
+    with open(data_file, "a", newline='') as dwc:
+        csv.writer(dwc, delimiter='\t').writerows(csv_rows[3:])
+    tail = whip_csv(data_file, specifications, '\t', tail=state_file)
+    full = whip_csv(data_file, specifications, '\t')
+    assert _results(tail) == _results(full)
+
+
+def test_tail_state_size(tmp_path):
+    """the stored state does not grow with the rows validated before"""
+    specifications = {'id': {}, 'sex': {'allowed': ['male', 'female']}}
+    data_file = str(tmp_path / "data.tsv")
+    state_file = str(tmp_path / "data.state")
+    rows = [['id', 'sex']] + [[str(row_id), 'Male'] for row_id in
+                              range(1, 11)]
+    _write_rows(data_file, rows + [[str(row_id), 'male'] for row_id in
+                                   range(11, 2001)])
+
+    sizes = []
+    for appended_rows in [0, 7000]:
+        with open(data_file, "a", newline='') as dwc:
+            csv.writer(dwc, delimiter='\t').writerows(
+                [str(row_id), 'female'] for row_id in
+                range(2001, 2001 + appended_rows))
+        tail = whip_csv(data_file, specifications, '\t', tail=state_file)
+        state = load_state(state_file, Whip(specifications), ['id', 'sex'])
+        sizes.append(len(json.dumps(state['whip'])))
+
+    assert sizes[0] == sizes[1]
+    assert _results(tail) == _results(whip_csv(data_file, specifications,
+                                               '\t'))
+    assert tail.get_report()['results']['specified_fields']['sex'][
+        'allowed']['samples']['Male']['failed_rows'] == 10
+
+
+def test_tail_replaced_file(tmp_path, specifications, csv_rows):
+    """tail mode starts over when the data file is replaced"""
+    data_file = str(tmp_path / "data.tsv")
+    state_file = str(tmp_path / "data.state")
+    _write_rows(data_file, csv_rows)
+    whip_csv(data_file, specifications, '\t', tail=state_file)
+
+    _write_rows(data_file, [csv_rows[0]] + csv_rows[:0:-1])
+    tail = whip_csv(data_file, specifications, '\t', tail=state_file)
+    full = whip_csv(data_file, specifications, '\t')
+    assert _results(tail) == _results(full)
+
+
+def test_checkpoint_resume_csv(tmp_path, specifications, csv_rows):
+    """resumed validation provides the same report"""
+    data_file = str(tmp_path / "data.tsv")
+    checkpoint_file = str(tmp_path / "data.checkpoint")
+    _write_rows(data_file, csv_rows)
+
+    with pytest.raises(KeyboardInterrupt):
+        whip_csv(data_file, specifications, '\t',
+                 checkpoint=InterruptedCheckpoint(checkpoint_file, rows=2,
+                                                  seconds=None))
+    assert os.path.exists(checkpoint_file)
+
+    resumed = whip_csv(data_file, specifications, '\t',
+                       checkpoint=checkpoint_file, resume=True)
+    full = whip_csv(data_file, specifications, '\t')
+    assert _results(resumed) == _results(full)
+    assert not os.path.exists(checkpoint_file)
+
+
+def test_checkpoint_resume_dwca(tmp_path, specifications, csv_rows):
+    """resumed validation of archive provides the same report"""
+    dwca_file = str(tmp_path / "data.zip")
+    checkpoint_file = str(tmp_path / "data.checkpoint")
+    _write_dwca(dwca_file, csv_rows)
+
+    with pytest.raises(KeyboardInterrupt):
+        whip_dwca(dwca_file, specifications,
+                  checkpoint=InterruptedCheckpoint(checkpoint_file, rows=3,
+                                                   seconds=None))
+
+    resumed = whip_dwca(dwca_file, specifications,
+                        checkpoint=checkpoint_file, resume=True)
+    full = whip_dwca(dwca_file, specifications)
+    assert _results(resumed) == _results(full)
+    assert resumed.get_report()['results']['total_rows'] == 5
+
+
+def test_resume_without_checkpoint(specifications):
+    """resume requires a checkpoint file"""
+    with pytest.raises(ValueError):
+        whip_csv(os.path.join(DATA_DIR, "example_dwc_occurrence_draft.tsv"),
+                 specifications, '\t', resume=True)
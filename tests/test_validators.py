@@ -1568,3 +1568,115 @@ class TestRequiredValidator(unittest.TestCase):
         document = {'coordinateUncertaintyInMeters': '22'}
         val.validate(document)
         self.assertEqual(val.errors, {})
+
+
+class TestErrorMessages(unittest.TestCase):
+    """Test the memoization of the formatted error messages"""
+
+    def setUp(self):
+        self.yaml_messages = """
+                             sex:
+                                 allowed: [male, female]
+                             age:
+                                 if:
+                                     - sex:
+                                           allowed: [male]
+                                       minlength: 5
+                                     - sex:
+                                           allowed: [female]
+                                       minlength: 8
+                             """
+
+    def _messages(self, val, document):
+        val.validate(document)
+        handler = val.schema.validator.error_handler
+        messages = []
+        for error in val._errors:
+            for child in error.child_errors or [error]:
+                messages.append(handler.format_message(error.field, child))
+        return messages
+
+    def test_messages_memoized(self):
+        """identical errors share the same message object"""
+        schema = yaml.load(self.yaml_messages, Loader=yaml.FullLoader)
+        val = DwcaValidator(schema, error_handler=WhipErrorHandler)
+        first = self._messages(val, {'sex': 'unknown', 'age': 'adult'})
+        second = self._messages(val, {'sex': 'unknown', 'age': 'adult'})
+        self.assertEqual(first, ['unallowed value unknown'])
+        self.assertIs(first[0], second[0])
+
+    def test_messages_if_constraint(self):
+        """messages of different if statements use their own constraint"""
+        schema = yaml.load(self.yaml_messages, Loader=yaml.FullLoader)
+        val = DwcaValidator(schema, error_handler=WhipErrorHandler)
+        male = self._messages(val, {'sex': 'male', 'age': 'old'})
+        female = self._messages(val, {'sex': 'female', 'age': 'old'})
+        self.assertEqual(male, ['min length is 5'])
+        self.assertEqual(female, ['min length is 8'])
+
+    def test_messages_cache_size(self):
+        """number of memoized messages is bounded"""
+        schema = yaml.load(self.yaml_messages, Loader=yaml.FullLoader)
+        val = DwcaValidator(schema, error_handler=WhipErrorHandler)
+        handler = val.schema.validator.error_handler
+        handler.message_cache_size = 5
+        for number in range(20):
+            self._messages(val, {'sex': str(number)})
+            self.assertLessEqual(len(handler._message_cache), 5)
+
+
+class TestErrorRecords(unittest.TestCase):
+    """Test the recording of errors as compact tuples"""
+
+    def setUp(self):
+        self.yaml_records = """
+                            sex:
+                                allowed: [male, female]
+                            age:
+                                if:
+                                    - sex:
+                                          allowed: [male]
+                                      minlength: 5
+                                    - sex:
+                                          allowed: [female]
+                                      minlength: 8
+                            observer:
+                                delimitedvalues:
+                                    delimiter: " | "
+                                    regex: 'observerID:.+'
+                            """
+
+    def test_records(self):
+        """errors are recorded with the rule names of the report"""
+        schema = yaml.load(self.yaml_records, Loader=yaml.FullLoader)
+        val = DwcaValidator(schema, error_handler=WhipErrorHandler)
+        records = []
+        val.record_errors(records)
+        val.validate({'sex': 'female', 'age': 'old',
+                      'observer': 'observerID:1 | observer 2'})
+        self.assertEqual(val._errors, [])
+        self.assertEqual(
+            sorted((field, rule, value) for field, rule, _, _, value, _ in
+                   records),
+            [('age', 'minlength_if_2', 'old'),
+             ('observer', 'regex_delimitedvalue', 'observer 2')])
+        messages = [val.error_handler.format_record(record) for record in
+                    records]
+        self.assertIn('min length is 8', messages)
+
+    def test_build_errors(self):
+        """recorded errors can be converted to ValidationErrors"""
+        schema = yaml.load(self.yaml_records, Loader=yaml.FullLoader)
+        val = DwcaValidator(schema, error_handler=WhipErrorHandler)
+        records = []
+        val.record_errors(records)
+        val.validate({'sex': 'unknown'})
+        error, = val.build_errors(records)
+        self.assertIsInstance(error, cerberus.errors.ValidationError)
+        self.assertEqual((error.field, error.rule, error.value),
+                         ('sex', 'allowed', 'unknown'))
+
+        # return to Cerberus errors
+        val.record_errors(None)
+        val.validate({'sex': 'unknown'})
+        self.assertEqual(val.errors, {'sex': ['unallowed value unknown']})
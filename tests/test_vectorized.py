@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the vectorised evaluation of numeric specifications."""
+
+import pytest
+
+from pywhip import Whip
+from pywhip.batches import BatchValidator
+from pywhip.validators import DwcaValidator, WhipErrorHandler
+
+np = pytest.importorskip("numpy")
+
+from pywhip import vectorized  # noqa: E402
+from pywhip.vectorized import vectorized_rules  # noqa: E402
+
+VALUES = ['5', '5.', '.5', '+5', '-5', '-0.25', '0012.50', '1.2.3', '--5',
+          '5-', '-', '.', '-.', '1e5', 'nan', 'inf', ' 5', '12\n', '1_000',
+          'many', 'abc', '٣', '5\x00', '9' * 70, '-1234', '123', '12.345']
+
+
+def _expected_errors(rules, value):
+    """`(rule, code)` errors of the numeric specifications by the validator"""
+    validator = DwcaValidator({'value': dict(rules)},
+                              error_handler=WhipErrorHandler)
+    records = []
+    validator.record_errors(records)
+    validator.validate({'value': value})
+    return sorted((record[1], record[2]) for record in records)
+
+
+@pytest.mark.parametrize("rules", [
+    {'min': 2}, {'max': '3.5'}, {'min': -1.5, 'max': 10},
+    {'numberformat': 'x'}, {'numberformat': '2.3'}, {'numberformat': '.2'},
+    {'numberformat': '3.'}, {'numberformat': '3'}, {'numberformat': '.'},
+    {'min': 0, 'max': 200, 'numberformat': 'x'}])
+def test_vectorized_rules(rules):
+    """decided values have the errors of the validator"""
+    decided, value_errors = vectorized_rules('value', rules).evaluate(VALUES)
+    assert decided[:7].all()
+    for position, value in enumerate(VALUES):
+        if decided[position]:
+            errors = sorted((record[1], record[2]) for record in
+                            value_errors.get(position, []))
+            assert errors == _expected_errors(rules, value), value
+
+
+def test_vectorized_undecided():
+    """values with a different meaning for numpy and python are undecided"""
+    decided, _ = vectorized_rules('value', {'min': 1}).evaluate(
+        ['1e5', 'nan', ' 5', '٣', '5\x00', '9' * 70, '5'])
+    assert decided.tolist() == [False] * 6 + [True]
+
+
+def test_vectorized_not_applicable():
+    """specifications stopping the validation are not vectorised"""
+    assert vectorized_rules('value', {'allowed': ['a']}) is None
+    assert vectorized_rules('value', {'min': 'a'}) is None
+    assert vectorized_rules('value', {'type': 'string', 'min': 1}) is None
+
+
+def test_batch_without_numpy(monkeypatch):
+    """without numpy, the values are validated by the validator"""
+    whip_it = Whip({'count': {'min': 1, 'numberformat': 'x'}})
+    batches = BatchValidator(whip_it.validation, whip_it.schema)
+    assert list(batches.vectorized) == [('count',)]
+    batch = [{'count': value} for value in ['0', '1', '', '1.5', 'a']]
+    vectorized_errors = batches.validate(batch)
+
+    monkeypatch.setattr(vectorized, '_numpy', lambda: None)
+    batches = BatchValidator(whip_it.validation, whip_it.schema)
+    assert not batches.vectorized
+    assert batches.validate(batch) == vectorized_errors
+    assert [[rule for _, rule, _, _ in errors] for errors in
+            vectorized_errors] == [['min'], [], ['empty'],
+                                   ['numberformat'], ['min', 'numberformat']]
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the report writers of `pywhip`."""
+
+import os
+import io
+import json
+
+import yaml
+import pytest
+from click.testing import CliRunner
+
+from pywhip import whip_csv, cli
+from pywhip.writers import iter_json, write_json, write_ndjson
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def report():
+    with open(os.path.join(DATA_DIR, "example_dwc_occurrence.yaml")) as specs:
+        specifications = yaml.load(specs, Loader=yaml.FullLoader)
+    return whip_csv(os.path.join(DATA_DIR, "example_dwc_occurrence_draft.tsv"),
+                    specifications, '\t').get_report()
+
+
+def test_write_json(report):
+    """streamed json equals the json of the complete report"""
+    report_file = io.StringIO()
+    write_json(report, report_file)
+    assert json.loads(report_file.getvalue()) == json.loads(
+        json.dumps(report))
+
+
+def test_iter_json_chunks():
+    """long lists are encoded in chunks"""
+    content = {'results': {'passed_row_ids': list(range(25)), 'total': 3}}
+    chunks = list(iter_json(content, chunk_size=10))
+    assert json.loads(''.join(chunks)) == content
+    assert max(len(chunk) for chunk in chunks) < 50
+
+
+def test_write_ndjson(report):
+    """ndjson report has a record for each field-rule combination"""
+    report_file = io.StringIO()
+    write_ndjson(report, report_file, chunk_size=2)
+    records = [json.loads(line) for line in
+               report_file.getvalue().splitlines()]
+
+    summary = records[0]
+    assert summary['record'] == 'summary'
+    assert summary['results']['total_rows'] == 5
+    assert 'specified_fields' not in summary['results']
+
+    rules = [record for record in records if record['record'] == 'rule']
+    specified_fields = report['results']['specified_fields']
+    assert len(rules) == sum(len(rules) for rules in
+                             specified_fields.values())
+    for record in rules:
+        info = specified_fields[record['field']][record['rule']]
+        assert record['failed_rows'] == info['failed_rows']
+
+    row_ids = [row_id for record in records
+               if record['record'] == 'passed_row_ids'
+               for row_id in record['row_ids']]
+    assert row_ids == report['results']['passed_row_ids']
+
+
+@pytest.mark.parametrize("extension", ["json", "ndjson"])
+def test_cli_json_report(tmp_path, extension):
+    """command line interface writes json reports"""
+    output_file = str(tmp_path / "report.{}".format(extension))
+    result = CliRunner().invoke(cli.main, [
+        os.path.join(DATA_DIR, "example_dwc_occurrence_draft.tsv"),
+        os.path.join(DATA_DIR, "example_dwc_occurrence.yaml"),
+        output_file, '--delimiter', '\t'])
+    assert result.exit_code == 0
+    with open(output_file) as report_file:
+        first = json.loads(report_file.readline() if extension == "ndjson"
+                           else report_file.read())
+    assert first['results']['total_rows'] == 5